@@ -0,0 +1,40 @@
+"""
+Application Cache
+Shared Flask-Caching instance and the home dashboard cache helpers.
+
+Backend is selected in config.Config: RedisCache when CACHE_REDIS_URL is set,
+otherwise a FileSystemCache in CACHE_DIR. Both are shared by all workers on a
+host, so invalidate_dashboard_cache reaches every worker; a per-process
+SimpleCache would not.
+"""
+
+import logging
+from datetime import date
+
+from flask import has_app_context
+from flask_caching import Cache
+
+logger = logging.getLogger(__name__)
+
+cache = Cache()
+
+# Dashboard aggregates change at most a few times per hour
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# The page summary and the attendance-trend endpoint are cached under their own keys
+DASHBOARD_CACHE_SECTIONS = ('summary', 'attendance_trend')
+
+
+def dashboard_cache_key(tenant_id: int, day: date = None, section: str = 'summary') -> str:
+    """Cache key for one section of a tenant's home dashboard on a given day"""
+    return f"home_dashboard:{section}:{tenant_id}:{(day or date.today()).isoformat()}"
+
+
+def invalidate_dashboard_cache(tenant_id: int):
+    """Drop today's cached dashboard sections after a write that changes them"""
+    if not has_app_context():
+        return
+    try:
+        cache.delete_many(*[dashboard_cache_key(tenant_id, section=section) for section in DASHBOARD_CACHE_SECTIONS])
+    except Exception as e:
+        logger.warning("Could not invalidate dashboard cache for tenant %s: %s", tenant_id, e)
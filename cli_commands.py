@@ -313,6 +313,44 @@ def register_cli_commands(app: Flask):
             for error in errors:
                 click.echo(f"   - {error}")
     
+    @app.cli.command("refresh-attendance-trend")
+    def refresh_attendance_trend_command():
+        """Rebuild the precomputed monthly attendance trend (run nightly via cron)"""
+        from student_attendance_helpers import refresh_attendance_trend
+        
+        session = get_session()
+        try:
+            rows = refresh_attendance_trend(session)
+            click.echo(f"✅ Attendance trend refreshed ({rows} month rows)")
+        except Exception as e:
+            click.echo(f"❌ Failed to refresh attendance trend: {e}")
+        finally:
+            session.close()
+    
+    @app.cli.command("mark-overdue-fines")
+    @click.option("--slug", help="Only this school (default: all active schools)")
+    def mark_overdue_fines_command(slug):
+        """Accrue fines on overdue library issues (run daily via cron)"""
+        from library_helpers import mark_overdue_fines
+        
+        session = get_session()
+        try:
+            query = session.query(Tenant.id, Tenant.name).filter_by(is_active=True)
+            if slug:
+                query = query.filter_by(slug=slug)
+            total = 0
+            for tenant_id, name in query.all():
+                updated = mark_overdue_fines(session, tenant_id)
+                total += updated
+                if updated:
+                    click.echo(f"  {name}: {updated} issue(s)")
+            click.echo(f"✅ Overdue fines updated on {total} issue(s)")
+        except Exception as e:
+            session.rollback()
+            click.echo(f"❌ Failed to mark overdue fines: {e}")
+        finally:
+            session.close()
+    
     @app.cli.command("list-scheduled-notifications")
     def list_scheduled_notifications_command():
         """List all pending scheduled notifications"""
@@ -381,6 +419,12 @@ flask list-users
 
 # List users for specific school
 flask list-users --slug "xyz"
+
+# Rebuild the dashboard attendance trend (cron, nightly)
+flask refresh-attendance-trend
+
+# Accrue fines on overdue library books (cron, daily)
+flask mark-overdue-fines
 """
 
 if __name__ == "__main__":
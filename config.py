@@ -3,7 +3,9 @@ Configuration for Single Database Multi-Tenant School Management System
 """
 
 import os
+import tempfile
 from urllib.parse import quote_plus
+from sqlalchemy.pool import QueuePool
 import dotenv
 dotenv.load_dotenv()  # Load environment variables from .env file
 
@@ -24,10 +26,39 @@ class Config:
 
     # SQLAlchemy settings
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Pooled connections are reused across requests; session.close() only
+    # returns the connection to the pool. pool_recycle stays below the
+    # server's wait_timeout so stale connections are replaced proactively.
     SQLALCHEMY_ENGINE_OPTIONS = {
+        'poolclass': QueuePool,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': 30,
         'pool_recycle': 280,
         'pool_pre_ping': True,
     }
+    # Echo every SQL statement (local profiling only)
+    SQLALCHEMY_ECHO = os.environ.get('SQLALCHEMY_ECHO', '').lower() in ('1', 'true', 'yes')
+
+    # FORCE_SCHEMA_CHECK=1 makes the startup schema check (init_db) verify
+    # columns, constraints and indexes even when the schema fingerprint is
+    # unchanged, e.g. after the database was altered by hand. It is read
+    # directly from the environment because the check runs before the app exists.
+
+    # Development query profiling (see query_profiling.py)
+    NPLUSONE_ENABLED = os.environ.get('ENABLE_NPLUSONE', '').lower() in ('1', 'true', 'yes')
+    # Raise NPlusOneError on a detected N+1 (default); NPLUSONE_RAISE=0 only logs it
+    NPLUSONE_RAISE = os.environ.get('NPLUSONE_RAISE', '1').lower() in ('1', 'true', 'yes')
+    QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 0))  # 0 disables the per-request check
+
+    # Flask-Caching (see app_cache.py). The cache must be shared by every
+    # gunicorn worker, or invalidation only reaches the worker that handled
+    # the write: Redis when CACHE_REDIS_URL is set, otherwise a directory on
+    # this host (CACHE_DIR)
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CACHE_TYPE = 'RedisCache' if CACHE_REDIS_URL else 'FileSystemCache'
+    CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'thinklly-cache'))
+    CACHE_DEFAULT_TIMEOUT = 300
 
     def _encoded_password(self) -> str:
         """Percent-encode special characters for URL usage."""
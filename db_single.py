@@ -5,6 +5,7 @@ Database management for single database multi-tenant system
 import os
 from urllib.parse import quote_plus
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 from config import Config
@@ -26,10 +27,19 @@ def init_database():
     config = Config()
     database_uri = config.get_database_uri()
     
-    ENGINE = create_engine(
-        database_uri,
-        **config.SQLALCHEMY_ENGINE_OPTIONS
-    )
+    # Adopt the engine left open by the startup integrity check (init_db)
+    # when it points at the same database, keeping its warm pool
+    from init_db import current_engine
+    startup_engine = current_engine()
+    if startup_engine is not None and startup_engine.url == make_url(database_uri):
+        ENGINE = startup_engine
+        ENGINE.echo = config.SQLALCHEMY_ECHO
+    else:
+        ENGINE = create_engine(
+            database_uri,
+            echo=config.SQLALCHEMY_ECHO,
+            **config.SQLALCHEMY_ENGINE_OPTIONS
+        )
     
     SessionLocal = sessionmaker(bind=ENGINE, autoflush=False, autocommit=False)
     
@@ -3,7 +3,7 @@ Expense Management Models
 Handles expense tracking, budgets, and financial reporting
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Numeric, Date, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Numeric, Date, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -84,6 +84,9 @@ class Expense(Base):
 # ===== BUDGET MODEL =====
 class Budget(Base):
     __tablename__ = 'budgets'
+    __table_args__ = (
+        Index('idx_budget_tenant_year_category', 'tenant_id', 'financial_year', 'category'),
+    )
     
     id = Column(Integer, primary_key=True)
     tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
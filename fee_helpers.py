@@ -14,6 +14,7 @@ from fee_models import (
     ConcessionModeEnum, FineTypeEnum, InstallmentStatusEnum
 )
 from models import Student, Class, AcademicSession, StudentStatusEnum
+from app_cache import invalidate_dashboard_cache
 import random
 import string
 
@@ -256,6 +257,7 @@ def process_fee_payment(session: Session, tenant_id: int, student_fee_id: int,
     update_installment_payments(session, student_fee_id, amount_paid)
     
     session.commit()
+    invalidate_dashboard_cache(tenant_id)
     
     # Update collection summary
     update_collection_summary(session, tenant_id, student_fee.session_id, receipt.payment_date, payment_mode, amount_paid)
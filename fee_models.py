@@ -278,6 +278,7 @@ class FeeReceipt(Base):
         Index('idx_receipt_number', 'receipt_number'),
         Index('idx_receipt_date', 'receipt_date'),
         Index('idx_receipt_status', 'status'),
+        Index('idx_receipt_tenant_payment_date', 'tenant_id', 'payment_date'),  # Revenue range scans
     )
 
     id = Column(BigInteger, primary_key=True, autoincrement=True)
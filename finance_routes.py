@@ -5,11 +5,12 @@ Extracted from school_routes_dynamic.py
 
 from flask import render_template, request, redirect, url_for, flash, g, jsonify
 from flask_login import current_user
-from sqlalchemy import func, extract, or_
+from sqlalchemy import func, extract, or_, update
 from datetime import datetime, date, timedelta
 import logging
 from fee_models import FeeReceipt, StudentFee, FeeStatusEnum, PaymentModeEnum
 from db_single import get_session
+from app_cache import invalidate_dashboard_cache
 from models import Tenant, Student, AcademicSession
 from teacher_models import Teacher
 from expense_models import Expense, Budget, RecurringExpense, ExpenseCategoryEnum, PaymentMethodEnum, ExpenseStatusEnum
@@ -574,15 +575,19 @@ def register_finance_routes(school_bp, require_school_auth):
             today = date.today()
             current_year = today.year
             
-            # Monthly expenses for the year
-            monthly_data = []
-            for month in range(1, 13):
-                total = session_db.query(func.sum(Expense.amount)).filter(
-                    Expense.tenant_id == school.id,
-                    extract('year', Expense.expense_date) == current_year,
-                    extract('month', Expense.expense_date) == month
-                ).scalar() or 0
-                monthly_data.append(float(total))
+            # Monthly expenses for the year (one grouped query instead of 12)
+            month_col = extract('month', Expense.expense_date).label('month')
+            monthly_totals = session_db.query(
+                month_col,
+                func.sum(Expense.amount)
+            ).filter(
+                Expense.tenant_id == school.id,
+                Expense.expense_date >= date(current_year, 1, 1),
+                Expense.expense_date < date(current_year + 1, 1, 1)
+            ).group_by(month_col).all()
+
+            totals_by_month = {int(month): total for month, total in monthly_totals}
+            monthly_data = [float(totals_by_month.get(month) or 0) for month in range(1, 13)]
             
             # Category-wise yearly expenses
             category_data = session_db.query(
@@ -637,9 +642,7 @@ def register_finance_routes(school_bp, require_school_auth):
         """Approve an expense"""
         session_db = get_session()
         try:
-            school = session_db.query(Tenant).filter_by(slug=tenant_slug).first()
-            if not school:
-                return jsonify({'success': False, 'message': 'School not found'}), 404
+            school = g.current_tenant
             
             expense = session_db.query(Expense).filter(
                 Expense.id == expense_id,
@@ -653,24 +656,26 @@ def register_finance_routes(school_bp, require_school_auth):
             expense.approved_by = current_user.id
             expense.approved_at = datetime.utcnow()
             
-            # Update budget spent_amount
+            # Update budget spent_amount atomically (no read-modify-write race)
             financial_year = f"{expense.expense_date.year}-{expense.expense_date.year+1}" if expense.expense_date.month >= 4 else f"{expense.expense_date.year-1}-{expense.expense_date.year}"
-            budget = session_db.query(Budget).filter(
-                Budget.tenant_id == school.id,
-                Budget.financial_year == financial_year,
-                Budget.category == expense.category,
-                Budget.month == None  # Only update yearly budgets for now
-            ).first()
-            
-            if budget:
-                budget.spent_amount = float(budget.spent_amount) + float(expense.amount)
+            session_db.execute(
+                update(Budget).where(
+                    Budget.tenant_id == school.id,
+                    Budget.financial_year == financial_year,
+                    Budget.category == expense.category,
+                    Budget.month == None  # Only update yearly budgets for now
+                ).values(
+                    spent_amount=func.coalesce(Budget.spent_amount, 0) + expense.amount
+                )
+            )
             
             session_db.commit()
+            invalidate_dashboard_cache(school.id)
             
             return jsonify({'success': True, 'message': 'Expense approved successfully'})
             
         except Exception as e:
-            logger.error(f"Approve expense error: {e}")
+            logger.exception("Approve expense error for %s, expense %s", tenant_slug, expense_id)
             session_db.rollback()
             return jsonify({'success': False, 'message': str(e)}), 500
         finally:
@@ -681,9 +686,7 @@ def register_finance_routes(school_bp, require_school_auth):
         """Delete an expense"""
         session_db = get_session()
         try:
-            school = session_db.query(Tenant).filter_by(slug=tenant_slug).first()
-            if not school:
-                return jsonify({'success': False, 'message': 'School not found'}), 404
+            school = g.current_tenant
             
             expense = session_db.query(Expense).filter(
                 Expense.id == expense_id,
@@ -695,11 +698,12 @@ def register_finance_routes(school_bp, require_school_auth):
             
             session_db.delete(expense)
             session_db.commit()
+            invalidate_dashboard_cache(school.id)
             
             return jsonify({'success': True, 'message': 'Expense deleted successfully'})
             
         except Exception as e:
-            logger.error(f"Delete expense error: {e}")
+            logger.exception("Delete expense error for %s, expense %s", tenant_slug, expense_id)
             session_db.rollback()
             return jsonify({'success': False, 'message': str(e)}), 500
         finally:
@@ -0,0 +1,36 @@
+"""
+Gunicorn configuration (loaded automatically from the working directory)
+
+    gunicorn main:app
+
+Dashboard requests spend most of their time waiting on MySQL. gevent
+workers let one process keep many requests in flight while their queries
+run; PyMySQL is pure Python, so the worker's monkey-patching makes its
+socket I/O cooperative without an extra driver shim.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Concurrent requests per gevent worker; each one holding a DB connection
+# still draws from the per-process pool (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 200))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Drop pooled connections inherited from the master (only with preload_app)"""
+    from init_db import current_engine
+    engine = current_engine()
+    if engine is not None:
+        engine.dispose(close=False)
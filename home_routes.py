@@ -1,9 +1,9 @@
 """
 Home Dashboard Routes - Unified Dashboard with Real Data
 """
-from flask import Blueprint, render_template, jsonify, redirect, url_for, flash, g
+from flask import Blueprint, render_template, jsonify, redirect, url_for, flash, g, request, make_response
 from flask_login import login_required, current_user
-from sqlalchemy import func, and_, extract, desc
+from sqlalchemy import func, and_, desc, select, case
 from datetime import datetime, date, timedelta
 from functools import wraps
 from models import (
@@ -12,12 +12,19 @@ from models import (
     StudentAttendanceStatusEnum, StudentStatusEnum, User,
     Tenant, ExamSubject
 )
-from teacher_models import Teacher, TeacherAttendance, AttendanceStatusEnum as TeacherAttendanceStatusEnum, EmployeeStatusEnum, TeacherSalary
+from teacher_models import Teacher, TeacherAttendance, AttendanceStatusEnum as TeacherAttendanceStatusEnum, EmployeeStatusEnum
 from fee_models import FeeReceipt
 from db_single import get_session
+from student_attendance_helpers import get_monthly_attendance_trend, months_back
+from app_cache import cache, dashboard_cache_key, DASHBOARD_CACHE_TIMEOUT
 import json
 import logging
 
+try:
+    import orjson
+except ImportError:  # Optional speed-up; fall back to the stdlib encoder
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 home_bp = Blueprint('home', __name__)
@@ -44,20 +51,162 @@ def require_school_auth(f):
     
     return decorated_function
 
+def to_json(value):
+    """Encode dashboard chart data as JSON (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value)
+
+
+# Month labels used by the dashboard charts
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+def _run_with_session(section, tenant_id, today):
+    """Run a dashboard section on its own short-lived session"""
+    session_db = get_session()
+    try:
+        return section(session_db, tenant_id, today)
+    finally:
+        session_db.close()
+
+
+def _dashboard_counts(session_db, tenant_id, today):
+    """Headline counts and weekly revenue totals, fetched in one round-trip"""
+    # This Week vs Last Week
+    start_of_week = today - timedelta(days=today.weekday())
+    end_of_week = start_of_week + timedelta(days=6)
+    start_of_last_week = start_of_week - timedelta(days=7)
+    end_of_last_week = start_of_last_week + timedelta(days=6)
+
+    # Each figure is a scalar subquery of a single SELECT, so the database
+    # is visited once instead of once per count
+    counts = session_db.execute(select(
+        # Total active students
+        select(func.count(Student.id)).where(
+            Student.tenant_id == tenant_id,
+            Student.status == StudentStatusEnum.ACTIVE
+        ).scalar_subquery().label('total_students'),
+        # Total active teachers
+        select(func.count(Teacher.id)).where(
+            Teacher.tenant_id == tenant_id,
+            Teacher.employee_status == EmployeeStatusEnum.ACTIVE
+        ).scalar_subquery().label('total_teachers'),
+        # Total active classes
+        select(func.count(Class.id)).where(
+            Class.tenant_id == tenant_id,
+            Class.is_active == True
+        ).scalar_subquery().label('total_classes'),
+        # Total upcoming exams
+        select(func.count(Exam.id)).where(
+            Exam.tenant_id == tenant_id,
+            Exam.start_date >= today,
+            Exam.is_active == True
+        ).scalar_subquery().label('upcoming_exams_count'),
+        # Total Events (Upcoming Holidays)
+        select(func.count(StudentHoliday.id)).where(
+            StudentHoliday.tenant_id == tenant_id,
+            StudentHoliday.end_date >= today
+        ).scalar_subquery().label('total_events'),
+        # Revenue this week / last week
+        select(func.sum(FeeReceipt.amount_paid)).where(
+            FeeReceipt.tenant_id == tenant_id,
+            FeeReceipt.payment_date >= start_of_week,
+            FeeReceipt.payment_date <= end_of_week
+        ).scalar_subquery().label('this_week_revenue'),
+        select(func.sum(FeeReceipt.amount_paid)).where(
+            FeeReceipt.tenant_id == tenant_id,
+            FeeReceipt.payment_date >= start_of_last_week,
+            FeeReceipt.payment_date <= end_of_last_week
+        ).scalar_subquery().label('last_week_revenue'),
+    )).one()
+
+    return {key: value or 0 for key, value in counts._asdict().items()}
+
+
+# Attendance status -> stats key; other statuses (holiday, week off) only count towards the total
+STUDENT_STATUS_KEYS = {
+    StudentAttendanceStatusEnum.PRESENT: 'present',
+    StudentAttendanceStatusEnum.ABSENT: 'absent',
+    StudentAttendanceStatusEnum.HALF_DAY: 'half_day',
+    StudentAttendanceStatusEnum.ON_LEAVE: 'on_leave',
+}
+TEACHER_STATUS_KEYS = {
+    TeacherAttendanceStatusEnum.PRESENT: 'present',
+    TeacherAttendanceStatusEnum.ABSENT: 'absent',
+    TeacherAttendanceStatusEnum.HALF_DAY: 'half_day',
+    TeacherAttendanceStatusEnum.ON_LEAVE: 'on_leave',
+}
+
+
+def _attendance_counts(model, status_keys, prefix, tenant_id, today):
+    """Single-row subquery of per-status counts (conditional aggregates) for one day"""
+    columns = [
+        func.count(case((model.status == status, 1))).label(f"{prefix}{key}")
+        for status, key in status_keys.items()
+    ]
+    columns.append(func.count(model.id).label(f"{prefix}total"))
+    return select(*columns).where(
+        model.tenant_id == tenant_id,
+        model.attendance_date == today
+    ).subquery()
+
+
+def _attendance_stats(counts, prefix):
+    """Build the attendance stats dict from a row of prefixed counts"""
+    stats = {key: counts[f"{prefix}{key}"] or 0 for key in ('present', 'absent', 'half_day', 'on_leave', 'total')}
+    stats['percentage'] = round(stats['present'] * 100 / stats['total'], 2) if stats['total'] else 0
+    return stats
+
+
+def _today_attendance(session_db, tenant_id, today):
+    """Today's student and teacher attendance breakdown, fetched in one round-trip"""
+    student_counts = _attendance_counts(StudentAttendance, STUDENT_STATUS_KEYS, 's_', tenant_id, today)
+    teacher_counts = _attendance_counts(TeacherAttendance, TEACHER_STATUS_KEYS, 't_', tenant_id, today)
+    
+    # Both subqueries return exactly one row, so the cross join is one row too
+    counts = session_db.execute(select(student_counts, teacher_counts)).one()._mapping
+
+    return {
+        'student_attendance': _attendance_stats(counts, 's_'),
+        'teacher_attendance': _attendance_stats(counts, 't_'),
+    }
+
+
+def _monthly_attendance_trend(session_db, tenant_id, today):
+    """Average attendance percentage per month (last 6 calendar months)"""
+    since_year, since_month = months_back(today, 5)
+    monthly_attendance = get_monthly_attendance_trend(session_db, tenant_id, since_year, since_month)
+
+    return {
+        'labels': [f"{MONTH_NAMES[month-1]} {year}" for month, year, _ in monthly_attendance],
+        'values': [float(avg_percentage) if avg_percentage else 0 for _, _, avg_percentage in monthly_attendance],
+    }
+
+
+# Aggregates rendered with the page; the monthly attendance trend is served
+# separately by /home/api/attendance-trend
+DASHBOARD_SECTIONS = (
+    _dashboard_counts,
+    _today_attendance,
+)
+
+
 @home_bp.route('/<tenant_slug>/home')
 @require_school_auth
 def home_dashboard(tenant_slug):
     """Unified Home Dashboard with real data"""
     session_db = get_session()
     try:
-        # Get school info
-        school = session_db.query(Tenant).filter_by(slug=tenant_slug).first()
-        if not school:
-            return "School not found", 404
+        # School was resolved by tenant_scope and checked by require_school_auth
+        school = g.current_tenant
         
         tenant_id = school.id
         today = date.today()
         
+        # Aggregates are cached per tenant and day
+        cache_key = dashboard_cache_key(tenant_id, today, 'summary')
+        sections = cache.get(cache_key)
+        
         # ===== BASIC STATISTICS =====
         # Get current academic session
         current_session = session_db.query(AcademicSession).filter(
@@ -66,205 +215,75 @@ def home_dashboard(tenant_slug):
                 AcademicSession.is_current == True
             )
         ).first()
-        
-        # Total active students
-        total_students = session_db.query(func.count(Student.id)).filter(
-            and_(
-                Student.tenant_id == tenant_id,
-                Student.status == StudentStatusEnum.ACTIVE
-            )
-        ).scalar() or 0
-        
-        # Total active teachers
-        total_teachers = session_db.query(func.count(Teacher.id)).filter(
-            and_(
-                Teacher.tenant_id == tenant_id,
-                Teacher.employee_status == EmployeeStatusEnum.ACTIVE
-            )
-        ).scalar() or 0
-        
-        # Total active classes
-        total_classes = session_db.query(func.count(Class.id)).filter(
-            and_(
-                Class.tenant_id == tenant_id,
-                Class.is_active == True
-            )
-        ).scalar() or 0
-        
-        # Total upcoming exams
-        upcoming_exams_count = session_db.query(func.count(Exam.id)).filter(
-            and_(
-                Exam.tenant_id == tenant_id,
-                Exam.start_date >= today,
-                Exam.is_active == True
-            )
-        ).scalar() or 0
-
-        # Total Events (Upcoming Holidays)
-        total_events = session_db.query(func.count(StudentHoliday.id)).filter(
-            and_(
-                StudentHoliday.tenant_id == tenant_id,
-                StudentHoliday.end_date >= today
-            )
-        ).scalar() or 0
 
         # Total Foods (Placeholder)
         total_foods = 50
         
-        # ===== TODAY'S STUDENT ATTENDANCE =====
-        today_student_attendance = session_db.query(
-            StudentAttendance.status,
-            func.count(StudentAttendance.id)
-        ).filter(
-            and_(
-                StudentAttendance.tenant_id == tenant_id,
-                StudentAttendance.attendance_date == today
-            )
-        ).group_by(StudentAttendance.status).all()
-        
-        student_attendance_stats = {
-            'present': 0,
-            'absent': 0,
-            'half_day': 0,
-            'on_leave': 0,
-            'total': 0,
-            'percentage': 0
-        }
-        
-        for status, count in today_student_attendance:
-            if status == StudentAttendanceStatusEnum.PRESENT:
-                student_attendance_stats['present'] = count
-            elif status == StudentAttendanceStatusEnum.ABSENT:
-                student_attendance_stats['absent'] = count
-            elif status == StudentAttendanceStatusEnum.HALF_DAY:
-                student_attendance_stats['half_day'] = count
-            elif status == StudentAttendanceStatusEnum.ON_LEAVE:
-                student_attendance_stats['on_leave'] = count
-            student_attendance_stats['total'] += count
-        
-        if student_attendance_stats['total'] > 0:
-            student_attendance_stats['percentage'] = round(
-                (student_attendance_stats['present'] / student_attendance_stats['total']) * 100, 2
-            )
-        
-        # ===== TODAY'S TEACHER ATTENDANCE =====
-        today_teacher_attendance = session_db.query(
-            TeacherAttendance.status,
-            func.count(TeacherAttendance.id)
-        ).filter(
-            and_(
-                TeacherAttendance.tenant_id == tenant_id,
-                TeacherAttendance.attendance_date == today
-            )
-        ).group_by(TeacherAttendance.status).all()
-        
-        teacher_attendance_stats = {
-            'present': 0,
-            'absent': 0,
-            'half_day': 0,
-            'on_leave': 0,
-            'total': 0,
-            'percentage': 0
-        }
-        
-        for status, count in today_teacher_attendance:
-            if status == TeacherAttendanceStatusEnum.PRESENT:
-                teacher_attendance_stats['present'] = count
-            elif status == TeacherAttendanceStatusEnum.ABSENT:
-                teacher_attendance_stats['absent'] = count
-            elif status == TeacherAttendanceStatusEnum.HALF_DAY:
-                teacher_attendance_stats['half_day'] = count
-            elif status == TeacherAttendanceStatusEnum.ON_LEAVE:
-                teacher_attendance_stats['on_leave'] = count
-            teacher_attendance_stats['total'] += count
-        
-        if teacher_attendance_stats['total'] > 0:
-            teacher_attendance_stats['percentage'] = round(
-                (teacher_attendance_stats['present'] / teacher_attendance_stats['total']) * 100, 2
-            )
+        # The top-5 lists below are read-only, so they select just the columns
+        # the template renders as plain rows instead of full ORM entities
         
         # ===== UPCOMING EXAMS =====
-        upcoming_exams = session_db.query(Exam).filter(
-            and_(
+        upcoming_exams = session_db.execute(
+            select(
+                Exam.id,
+                Exam.exam_name,
+                Exam.start_date,
+                Exam.end_date
+            ).where(
                 Exam.tenant_id == tenant_id,
                 Exam.start_date >= today,
                 Exam.is_active == True
-            )
-        ).order_by(Exam.start_date).limit(5).all()
+            ).order_by(Exam.start_date).limit(5)
+        ).all()
         
         # ===== UPCOMING HOLIDAYS =====
-        upcoming_holidays = session_db.query(StudentHoliday).filter(
-            and_(
+        upcoming_holidays = session_db.execute(
+            select(
+                StudentHoliday.id,
+                StudentHoliday.holiday_name,
+                StudentHoliday.start_date,
+                StudentHoliday.end_date,
+                (StudentHoliday.start_date == StudentHoliday.end_date).label('is_single_day')
+            ).where(
                 StudentHoliday.tenant_id == tenant_id,
                 StudentHoliday.end_date >= today
-            )
-        ).order_by(StudentHoliday.start_date).limit(5).all()
-        
-        # ===== MONTHLY ATTENDANCE TREND (Last 6 months) =====
-        six_months_ago = today - timedelta(days=180)
-        monthly_attendance = session_db.query(
-            StudentAttendanceSummary.month,
-            StudentAttendanceSummary.year,
-            func.avg(StudentAttendanceSummary.attendance_percentage)
-        ).filter(
-            and_(
-                StudentAttendanceSummary.tenant_id == tenant_id,
-                StudentAttendanceSummary.year >= six_months_ago.year
-            )
-        ).group_by(
-            StudentAttendanceSummary.year,
-            StudentAttendanceSummary.month
-        ).order_by(
-            StudentAttendanceSummary.year,
-            StudentAttendanceSummary.month
-        ).all()
-        
-        # Format for chart
-        attendance_months = []
-        attendance_percentages = []
-        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        
-        for month, year, avg_percentage in monthly_attendance:
-            attendance_months.append(f"{month_names[month-1]} {year}")
-            attendance_percentages.append(float(avg_percentage) if avg_percentage else 0)
-        
-        # ===== CLASS-WISE STUDENT DISTRIBUTION =====
-        class_distribution = session_db.query(
-            Class.class_name,
-            Class.section,
-            func.count(Student.id)
-        ).join(
-            Student, Student.class_id == Class.id
-        ).filter(
-            and_(
-                Class.tenant_id == tenant_id,
-                Class.is_active == True,
-                Student.status == StudentStatusEnum.ACTIVE
-            )
-        ).group_by(
-            Class.class_name,
-            Class.section
-        ).order_by(
-            Class.class_name,
-            Class.section
+            ).order_by(StudentHoliday.start_date).limit(5)
         ).all()
         
-        # Format for chart
-        class_labels = []
-        class_counts = []
-        for class_name, section, count in class_distribution:
-            class_labels.append(f"{class_name}-{section}")
-            class_counts.append(count)
-        
         # ===== RECENT STUDENTS (Last 5 registered) =====
-        recent_students = session_db.query(Student).filter(
-            Student.tenant_id == tenant_id
-        ).order_by(desc(Student.created_at)).limit(5).all()
+        recent_students = session_db.execute(
+            select(
+                Student.id,
+                Student.first_name,
+                Student.last_name,
+                Student.full_name,
+                Student.admission_number,
+                Student.status,
+                Class.class_name,
+                Class.section
+            ).join(
+                Class, Class.id == Student.class_id
+            ).where(
+                Student.tenant_id == tenant_id
+            ).order_by(desc(Student.created_at)).limit(5)
+        ).all()
         
         # ===== RECENT TEACHERS (Last 5 registered) =====
-        recent_teachers = session_db.query(Teacher).filter(
-            Teacher.tenant_id == tenant_id
-        ).order_by(desc(Teacher.created_at)).limit(5).all()
+        # CONCAT_WS skips NULLs; NULLIF turns an empty middle name into NULL too,
+        # matching Teacher.full_name, which skips any falsy middle name
+        recent_teachers = session_db.execute(
+            select(
+                Teacher.id,
+                Teacher.first_name,
+                Teacher.last_name,
+                func.concat_ws(' ', Teacher.first_name, func.nullif(Teacher.middle_name, ''), Teacher.last_name).label('full_name'),
+                Teacher.email,
+                Teacher.phone_primary,
+                Teacher.employee_status
+            ).where(
+                Teacher.tenant_id == tenant_id
+            ).order_by(desc(Teacher.created_at)).limit(5)
+        ).all()
         
         # ===== EXAM RESULTS STATISTICS =====
         if current_session:
@@ -298,186 +317,84 @@ def home_dashboard(tenant_slug):
         else:
             exam_stats = None
 
-        # ===== FINANCE: SCHOOL PERFORMANCE (REVENUE) =====
-        # This Week vs Last Week
-        start_of_week = today - timedelta(days=today.weekday())
-        end_of_week = start_of_week + timedelta(days=6)
-        start_of_last_week = start_of_week - timedelta(days=7)
-        end_of_last_week = start_of_last_week + timedelta(days=6)
-        
-        this_week_revenue = session_db.query(func.sum(FeeReceipt.amount_paid)).filter(
-            and_(
-                FeeReceipt.tenant_id == tenant_id,
-                FeeReceipt.payment_date >= start_of_week,
-                FeeReceipt.payment_date <= end_of_week
-            )
-        ).scalar() or 0
-        
-        last_week_revenue = session_db.query(func.sum(FeeReceipt.amount_paid)).filter(
-            and_(
-                FeeReceipt.tenant_id == tenant_id,
-                FeeReceipt.payment_date >= start_of_last_week,
-                FeeReceipt.payment_date <= end_of_last_week
-            )
-        ).scalar() or 0
-        
-        # Daily Revenue for Chart (Last 30 days)
-        thirty_days_ago = today - timedelta(days=30)
-        daily_revenue = session_db.query(
-            FeeReceipt.payment_date,
-            func.sum(FeeReceipt.amount_paid)
-        ).filter(
-            and_(
-                FeeReceipt.tenant_id == tenant_id,
-                FeeReceipt.payment_date >= thirty_days_ago
-            )
-        ).group_by(FeeReceipt.payment_date).all()
-        
-        revenue_dates = []
-        revenue_values = []
-        # Fill in missing dates with 0
-        current_date = thirty_days_ago
-        revenue_dict = {r[0]: r[1] for r in daily_revenue}
-        
-        while current_date <= today:
-            revenue_dates.append(current_date.strftime('%Y-%m-%d'))
-            revenue_values.append(float(revenue_dict.get(current_date, 0)))
-            current_date += timedelta(days=1)
-            
-        # ===== FINANCE: SCHOOL OVERVIEW (REVENUE VS EXPENSES) =====
-        # Monthly Revenue vs Expenses (Last 12 months)
-        # Expenses = Total Active Teacher Salaries (Estimated)
-        
-        total_monthly_salary_expense = session_db.query(func.sum(TeacherSalary.net_salary)).join(
-            Teacher, Teacher.id == TeacherSalary.teacher_id
-        ).filter(
-            and_(
-                TeacherSalary.tenant_id == tenant_id,
-                TeacherSalary.is_active == True,
-                Teacher.employee_status == EmployeeStatusEnum.ACTIVE
-            )
-        ).scalar() or 0
-        
-        # Monthly Revenue
-        twelve_months_ago = today.replace(day=1) - timedelta(days=365)
-        monthly_revenue = session_db.query(
-            extract('year', FeeReceipt.payment_date).label('year'),
-            extract('month', FeeReceipt.payment_date).label('month'),
-            func.sum(FeeReceipt.amount_paid)
-        ).filter(
-            and_(
-                FeeReceipt.tenant_id == tenant_id,
-                FeeReceipt.payment_date >= twelve_months_ago
-            )
-        ).group_by('year', 'month').all()
-        
-        overview_labels = []
-        overview_revenue = []
-        overview_expenses = []
-        
-        # Process last 12 months
-        for i in range(11, -1, -1):
-            # Calculate date for i months ago
-            # Simple approximation for month calculation
-            target_month = today.month - i
-            target_year = today.year
-            while target_month <= 0:
-                target_month += 12
-                target_year -= 1
-                
-            month_year = f"{month_names[target_month-1]} {target_year}"
-            overview_labels.append(month_year)
-            
-            # Find revenue for this month
-            rev = next((r[2] for r in monthly_revenue if r[0] == target_year and r[1] == target_month), 0)
-            overview_revenue.append(float(rev))
-            overview_expenses.append(float(total_monthly_salary_expense)) # Assuming constant expense
+        # Each aggregate section is a single SELECT, so on a miss they run in
+        # turn on this request's session rather than holding extra pooled
+        # connections per request
+        if sections is None:
+            sections = {}
+            for section in DASHBOARD_SECTIONS:
+                sections.update(section(session_db, tenant_id, today))
+            cache.set(cache_key, sections, timeout=DASHBOARD_CACHE_TIMEOUT)
         
         return render_template('akademi/home_dashboard.html',
                              school=school,
                              current_user=current_user,
                              current_session=current_session,
                              # Statistics
-                             total_students=total_students,
-                             total_teachers=total_teachers,
-                             total_classes=total_classes,
-                             upcoming_exams_count=upcoming_exams_count,
-                             total_events=total_events,
+                             total_students=sections['total_students'],
+                             total_teachers=sections['total_teachers'],
+                             total_classes=sections['total_classes'],
+                             upcoming_exams_count=sections['upcoming_exams_count'],
+                             total_events=sections['total_events'],
                              total_foods=total_foods,
                              # Attendance
-                             student_attendance=student_attendance_stats,
-                             teacher_attendance=teacher_attendance_stats,
+                             student_attendance=sections['student_attendance'],
+                             teacher_attendance=sections['teacher_attendance'],
                              # Lists
                              upcoming_exams=upcoming_exams,
                              upcoming_holidays=upcoming_holidays,
                              recent_students=recent_students,
                              recent_teachers=recent_teachers,
-                             # Charts data
-                             attendance_months=json.dumps(attendance_months),
-                             attendance_percentages=json.dumps(attendance_percentages),
-                             class_labels=json.dumps(class_labels),
-                             class_counts=json.dumps(class_counts),
                              # Finance Data
-                             this_week_revenue=this_week_revenue,
-                             last_week_revenue=last_week_revenue,
-                             revenue_dates=json.dumps(revenue_dates),
-                             revenue_values=json.dumps(revenue_values),
-                             overview_labels=json.dumps(overview_labels),
-                             overview_revenue=json.dumps(overview_revenue),
-                             overview_expenses=json.dumps(overview_expenses),
+                             this_week_revenue=sections['this_week_revenue'],
+                             last_week_revenue=sections['last_week_revenue'],
                              # Exam stats
                              exam_stats=exam_stats,
                              today=today)
                              
     except Exception as e:
-        logger.error(f"Home dashboard error for {tenant_slug}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Home dashboard error for %s", tenant_slug)
         return f"Error loading dashboard: {str(e)}", 500
     finally:
         session_db.close()
 
 
+def conditional_response(f):
+    """Answer If-None-Match with 304 when it matches the ETag set by the view"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        return response.make_conditional(request)
+    
+    return decorated_function
+
+
+def _section_response(name, section):
+    """JSON response for one dashboard chart section, cached per tenant and day"""
+    tenant_id = g.current_tenant.id
+    today = date.today()
+    
+    cache_key = dashboard_cache_key(tenant_id, today, name)
+    data = cache.get(cache_key)
+    if data is None:
+        data = _run_with_session(section, tenant_id, today)
+        cache.set(cache_key, data, timeout=DASHBOARD_CACHE_TIMEOUT)
+    
+    response = make_response(to_json(data))
+    response.mimetype = 'application/json'
+    response.add_etag()
+    response.cache_control.private = True
+    response.cache_control.max_age = DASHBOARD_CACHE_TIMEOUT
+    return response
+
+
 @home_bp.route('/<tenant_slug>/home/api/attendance-trend')
 @require_school_auth
+@conditional_response
 def get_attendance_trend(tenant_slug):
     """API endpoint for attendance trend data"""
-    session_db = get_session()
     try:
-        school = session_db.query(Tenant).filter_by(slug=tenant_slug).first()
-        if not school:
-            return jsonify({'error': 'School not found'}), 404
-        
-        tenant_id = school.id
-        today = date.today()
-        six_months_ago = today - timedelta(days=180)
-        
-        monthly_attendance = session_db.query(
-            StudentAttendanceSummary.month,
-            StudentAttendanceSummary.year,
-            func.avg(StudentAttendanceSummary.attendance_percentage)
-        ).filter(
-            and_(
-                StudentAttendanceSummary.tenant_id == tenant_id,
-                StudentAttendanceSummary.year >= six_months_ago.year
-            )
-        ).group_by(
-            StudentAttendanceSummary.year,
-            StudentAttendanceSummary.month
-        ).order_by(
-            StudentAttendanceSummary.year,
-            StudentAttendanceSummary.month
-        ).all()
-        
-        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        data = {
-            'labels': [f"{month_names[month-1]} {year}" for month, year, _ in monthly_attendance],
-            'values': [float(avg_percentage) if avg_percentage else 0 for _, _, avg_percentage in monthly_attendance]
-        }
-        
-        return jsonify(data)
+        return _section_response('attendance_trend', _monthly_attendance_trend)
     except Exception as e:
-        logger.error(f"Attendance trend API error: {e}")
+        logger.exception("Attendance trend API error for %s", tenant_slug)
         return jsonify({'error': str(e)}), 500
-    finally:
-        session_db.close()
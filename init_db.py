@@ -5,49 +5,160 @@ Runs on every startup to ensure database and all tables exist
 
 import os
 import sys
-from sqlalchemy import create_engine, inspect, text
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from sqlalchemy import create_engine, inspect, text, MetaData, Table, Column, Integer, String, DateTime, select, insert, update, bindparam
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.sql import sqltypes
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Import all models to register them with Base.metadata
-from models import Base, Tenant, User, Student, Class, AcademicSession
-from models import StudentAttendance, StudentAttendanceSummary, StudentHoliday
-# Note: Deprecated Exam, ExamSubject, StudentMark models are in models.py but not imported
-# They are replaced by examination_models.Examination and related models
-from student_models import StudentAuth, StudentGuardian, StudentMedicalInfo, StudentPreviousSchool, StudentSibling, StudentDocument
-from teacher_models import (
-    Teacher, TeacherAuth, Subject, Department, Designation, 
-    TeacherDepartment, TeacherDesignation, TeacherSubject,
-    Qualification, TeacherExperience, TeacherCertification, TeacherDocument,
-    TeacherBankingDetails, TeacherLeave, TeacherAttendance, TeacherSalary
-)
-from timetable_models import TimeSlot, TimeSlotClass, ClassTeacherAssignment, TimetableSchedule, ClassRoom, TimeSlotGroup, TimeSlotGroupClass, SubstituteAssignment, WorkloadSettings
-from leave_models import LeaveQuotaSettings, TeacherLeaveBalance, TeacherLeaveApplication, StudentLeave
-from fee_models import (
-    FeeCategory, FeeStructure, FeeStructureDetail, StudentFee,
-    StudentFeeConcession, FeeReceipt, FeeFine, FeeInstallment, FeeCollectionSummary
-)
-from library_models import LibraryCategory, LibraryBook, LibraryIssue, LibrarySettings
-from examination_models import (
-    Examination, ExaminationSubject, ExaminationSchedule,
-    ExaminationMark, ExaminationResult, GradeScale,
-    ExaminationPublication, ResultNotification
+logger = logging.getLogger(__name__)
+
+# Modules that define tables on Base.metadata. They are only imported when
+# the schema actually has to be checked (see load_models).
+MODEL_MODULES = (
+    'models', 'student_models', 'teacher_models', 'timetable_models', 'leave_models',
+    'fee_models', 'library_models', 'examination_models', 'notification_models',
+    'expense_models', 'chat_models', 'question_paper_models', 'copy_checking_models',
+    'transport_models',
 )
-from notification_models import (
-    NotificationTemplate, Notification, NotificationRecipient, NotificationDocument,
-    WhatsAppSettings, WhatsAppMessageLog
+
+# Source files whose changes force a full check: the models, plus this module,
+# since its column DDL, obsolete-index list and backfills shape the schema too
+SCHEMA_SOURCE_MODULES = MODEL_MODULES + ('init_db',)
+
+
+@lru_cache(maxsize=1)
+def load_models():
+    """Import all models to register them with Base.metadata; returns Base"""
+    from models import Base, Tenant, User, Student, Class, AcademicSession
+    from models import StudentAttendance, StudentAttendanceSummary, StudentHoliday, AttendanceTrendMonthly
+    # Note: Deprecated Exam, ExamSubject, StudentMark models are in models.py but not imported
+    # They are replaced by examination_models.Examination and related models
+    from student_models import StudentAuth, StudentGuardian, StudentMedicalInfo, StudentPreviousSchool, StudentSibling, StudentDocument
+    from teacher_models import (
+        Teacher, TeacherAuth, Subject, Department, Designation, 
+        TeacherDepartment, TeacherDesignation, TeacherSubject,
+        Qualification, TeacherExperience, TeacherCertification, TeacherDocument,
+        TeacherBankingDetails, TeacherLeave, TeacherAttendance, TeacherSalary
+    )
+    from timetable_models import TimeSlot, TimeSlotClass, ClassTeacherAssignment, TimetableSchedule, ClassRoom, TimeSlotGroup, TimeSlotGroupClass, SubstituteAssignment, WorkloadSettings
+    from leave_models import LeaveQuotaSettings, TeacherLeaveBalance, TeacherLeaveApplication, StudentLeave
+    from fee_models import (
+        FeeCategory, FeeStructure, FeeStructureDetail, StudentFee,
+        StudentFeeConcession, FeeReceipt, FeeFine, FeeInstallment, FeeCollectionSummary
+    )
+    from library_models import LibraryCategory, LibraryBook, LibraryIssue, LibrarySettings
+    from examination_models import (
+        Examination, ExaminationSubject, ExaminationSchedule,
+        ExaminationMark, ExaminationResult, GradeScale,
+        ExaminationPublication, ResultNotification
+    )
+    from notification_models import (
+        NotificationTemplate, Notification, NotificationRecipient, NotificationDocument,
+        WhatsAppSettings, WhatsAppMessageLog
+    )
+    from expense_models import Expense, Budget, RecurringExpense
+    from chat_models import ChatConversation, ChatMessage
+    from question_paper_models import QuestionPaperAssignment, QuestionPaper, QuestionPaperReview
+    from copy_checking_models import CopyCheckingAssignment
+    from transport_models import TransportVehicle, TransportRoute, TransportStop, TransportAssignment
+    return Base
+
+
+# ===== SCHEMA FINGERPRINT =====
+# Kept outside Base.metadata so the bookkeeping table is not part of the hash
+schema_meta = MetaData()
+schema_version_table = Table(
+    'schema_version', schema_meta,
+    Column('id', Integer, primary_key=True),
+    Column('schema_hash', String(64), nullable=False),
+    Column('source_hash', String(64), nullable=True),
+    Column('applied_at', DateTime, nullable=False),
 )
-from expense_models import Expense, Budget, RecurringExpense
-from chat_models import ChatConversation, ChatMessage
-from question_paper_models import QuestionPaperAssignment, QuestionPaper, QuestionPaperReview
-from copy_checking_models import CopyCheckingAssignment
-from transport_models import TransportVehicle, TransportRoute, TransportStop, TransportAssignment
 
 
+def compute_source_hash():
+    """Hash of the model source files and init_db, computed without importing them"""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for module_name in SCHEMA_SOURCE_MODULES:
+        digest.update(module_name.encode())
+        try:
+            with open(os.path.join(base_dir, f"{module_name}.py"), 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            pass
+    return digest.hexdigest()
+
+
+def compute_schema_hash(metadata):
+    """Hash of the tables, columns, constraints and indexes declared on the models"""
+    tables = []
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        tables.append((
+            table.name,
+            tuple((column.name, str(column.type), column.nullable) for column in table.columns),
+            tuple(sorted(
+                (type(constraint).__name__, constraint.name or '', tuple(sorted(c.name for c in getattr(constraint, 'columns', []))))
+                for constraint in table.constraints
+            )),
+            tuple(sorted(
+                (index.name or '', bool(index.unique), tuple(c.name for c in index.columns))
+                for index in table.indexes
+            )),
+        ))
+    return hashlib.sha256(repr(tables).encode()).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def get_schema_hash():
+    """
+    Schema hash of the current models (imports them on first call), salted with
+    this file so an init_db change alone is never mistaken for an unchanged schema
+    """
+    with open(os.path.abspath(__file__), 'rb') as f:
+        init_db_source = f.read()
+    digest = hashlib.sha256(compute_schema_hash(load_models().metadata).encode())
+    digest.update(init_db_source)
+    return digest.hexdigest()
+
+
+def get_stored_schema_hashes(conn):
+    """(schema_hash, source_hash) recorded by the last clean run, or (None, None)"""
+    try:
+        row = conn.execute(
+            select(schema_version_table.c.schema_hash, schema_version_table.c.source_hash)
+            .where(schema_version_table.c.id == 1)
+        ).first()
+    except (OperationalError, ProgrammingError):
+        # schema_version does not exist yet
+        return None, None
+    return (row.schema_hash, row.source_hash) if row else (None, None)
+
+
+def store_schema_hash(engine, schema_hash, source_hash=None):
+    """Record the schema hash after a run that left the database matching the models"""
+    values = {'schema_hash': schema_hash, 'source_hash': source_hash, 'applied_at': datetime.utcnow()}
+    with engine.begin() as conn:
+        schema_version_table.create(conn, checkfirst=True)
+        updated = conn.execute(
+            update(schema_version_table).where(schema_version_table.c.id == 1).values(**values)
+        ).rowcount
+        if not updated:
+            conn.execute(insert(schema_version_table).values(id=1, **values))
+
+
+# Environment is constant per process; tests that change it must call
+# get_database_url.cache_clear()
+@lru_cache(maxsize=1)
 def get_database_url():
     """Get database URL from environment or config"""
     # Try DATABASE_URL environment variable first
@@ -91,19 +202,64 @@ def get_database_url():
     return 'sqlite:///school_management.db'
 
 
+# Engine created by the startup check and kept open afterwards, so the
+# application (db_single.init_database) can adopt its warm connection pool
+_ENGINE = None
+
+
+def get_engine(db_url=None):
+    """Get the process-wide engine for db_url, creating it on first use"""
+    global _ENGINE
+    db_url = db_url or get_database_url()
+    
+    if _ENGINE is None or _ENGINE.url != make_url(db_url):
+        if db_url.startswith('sqlite'):
+            engine_options = {'pool_pre_ping': True}
+        else:
+            # Same pool settings as the application engine
+            from config import Config
+            engine_options = Config.SQLALCHEMY_ENGINE_OPTIONS
+        _ENGINE = create_engine(db_url, **engine_options)
+    
+    return _ENGINE
+
+
+def current_engine():
+    """Engine created by get_engine(), or None if there is none yet"""
+    return _ENGINE
+
+
+# Databases already seen to exist in this process, keyed by URL. Only
+# positive results are kept: a missing database may be created later.
+_DB_EXISTS_CACHE = {}
+
+
 def database_exists(engine, db_name=None):
     """Check if database exists"""
+    cache_key = str(engine.url)
+    if _DB_EXISTS_CACHE.get(cache_key):
+        return True
+    
     try:
         # For SQLite, check if file exists
         if 'sqlite' in str(engine.url):
             db_path = str(engine.url).replace('sqlite:///', '')
-            return os.path.exists(db_path)
-        
-        # For PostgreSQL/MySQL, try to connect
-        with engine.connect() as conn:
-            return True
+            exists = os.path.exists(db_path)
+        else:
+            # For PostgreSQL/MySQL, try to connect (a pooled connection when warm)
+            with engine.connect() as conn:
+                exists = True
     except (OperationalError, ProgrammingError):
-        return False
+        exists = False
+    
+    if exists:
+        _DB_EXISTS_CACHE[cache_key] = True
+    return exists
+
+
+# Source hash last verified against each database URL in this process, so a
+# repeated initialize_database() call is decided without touching the database
+_VERIFIED_SOURCE_HASHES = {}
 
 
 def create_database_if_not_exists(db_url):
@@ -117,34 +273,44 @@ def create_database_if_not_exists(db_url):
         # Create engine without database
         url_obj = url_obj.set(database='postgres' if 'postgresql' in db_url else 'mysql')
         temp_engine = create_engine(str(url_obj))
+        quote = temp_engine.dialect.identifier_preparer.quote_identifier
         
         try:
             with temp_engine.connect() as conn:
                 conn.execution_options(isolation_level="AUTOCOMMIT")
                 # Check if database exists
                 if 'postgresql' in db_url:
-                    result = conn.execute(text(f"SELECT 1 FROM pg_database WHERE datname = '{db_name}'"))
+                    result = conn.execute(
+                        text("SELECT 1 FROM pg_database WHERE datname = :db_name"),
+                        {'db_name': db_name}
+                    )
                     if not result.fetchone():
-                        conn.execute(text(f'CREATE DATABASE "{db_name}"'))
-                        print(f"Created database: {db_name}")
+                        conn.execute(text(f'CREATE DATABASE {quote(db_name)}'))
+                        logger.info("Created database: %s", db_name)
                 else:  # MySQL
-                    conn.execute(text(f'CREATE DATABASE IF NOT EXISTS `{db_name}`'))
-                    print(f"Created database: {db_name}")
+                    conn.execute(text(f'CREATE DATABASE IF NOT EXISTS {quote(db_name)}'))
+                    logger.info("Created database: %s", db_name)
         except Exception as e:
-            print(f"Warning: Could not create database: {e}")
+            logger.warning("Could not create database: %s", e)
         finally:
             temp_engine.dispose()
 
 
-def get_existing_tables(engine):
+def get_existing_tables(inspector):
     """Get list of existing tables in database"""
-    inspector = inspect(engine)
     return set(inspector.get_table_names())
 
 
+@lru_cache(maxsize=4)
+def get_display_url(db_url):
+    """Database URL with the password masked, for logging"""
+    return make_url(db_url).render_as_string(hide_password=True)
+
+
+@lru_cache(maxsize=1)
 def get_expected_tables():
-    """Get list of all expected tables from models"""
-    return set(Base.metadata.tables.keys())
+    """Get all expected table names from models (cached; metadata is fixed after import)"""
+    return frozenset(load_models().metadata.tables.keys())
 
 
 def create_missing_tables(engine, existing_tables, expected_tables):
@@ -152,218 +318,333 @@ def create_missing_tables(engine, existing_tables, expected_tables):
     missing_tables = expected_tables - existing_tables
     
     if not missing_tables:
-        print(" All tables exist")
+        logger.info("All tables exist")
         return []
     
-    print(f"\n Found {len(missing_tables)} missing tables:")
-    for table in sorted(missing_tables):
-        print(f"  - {table}")
-    
-    print("\n Creating missing tables...")
+    logger.info("Creating %d missing tables", len(missing_tables))
+    logger.debug("Missing tables: %s", ', '.join(sorted(missing_tables)))
     
     # Get tables in dependency order (sorted by foreign keys)
     from sqlalchemy.schema import sort_tables
-    all_tables = [Base.metadata.tables[name] for name in missing_tables]
+    metadata = load_models().metadata
+    all_tables = [metadata.tables[name] for name in missing_tables]
     sorted_tables = sort_tables(all_tables)
     
     created = []
     failed = []
     retry_queue = []
     
-    # First pass: try to create all tables
-    for table in sorted_tables:
+    # All CREATEs share one connection. MySQL commits DDL implicitly, so it
+    # runs in autocommit mode: a failed table neither rolls back the ones
+    # before it nor leaves the connection in an aborted transaction.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # The diff above already excludes existing tables, so create them all
+        # at once without a per-table existence check (create_all sorts them
+        # by foreign keys)
         try:
-            table.create(engine, checkfirst=True)
-            created.append(table.name)
-        except OperationalError as e:
-            error_msg = str(e).lower()
-            # Handle duplicate index/key errors
-            if 'duplicate key' in error_msg or 'already exists' in error_msg or '1061' in error_msg:
+            metadata.create_all(conn, tables=sorted_tables, checkfirst=False)
+            created = [table.name for table in sorted_tables]
+        except (OperationalError, ProgrammingError) as e:
+            # Another process may have created some of them meanwhile, or one
+            # table failed part-way: fall back to table by table with checks
+            logger.warning("Bulk create stopped (%s), retrying table by table", str(e)[:80])
+            
+            # First pass: try to create all tables
+            for table in sorted_tables:
                 try:
-                    # Table might exist but indexes failed
+                    table.create(conn, checkfirst=True)
                     created.append(table.name)
-                    print(f"   {table.name}: already exists (skipped duplicate indexes)")
-                except Exception:
-                    retry_queue.append(table)
-            # Handle foreign key reference errors - retry later
-            elif '1824' in str(e) or 'referenced table' in error_msg:
-                retry_queue.append(table)
-            else:
-                failed.append((table.name, str(e)))
-                print(f"   {table.name}: {str(e)[:80]}")
-    
-    # Second pass: retry failed tables (dependencies might be created now)
-    if retry_queue:
-        for table in retry_queue:
-            try:
-                table.create(engine, checkfirst=True)
-                created.append(table.name)
-            except Exception as e:
-                failed.append((table.name, str(e)))
+                except OperationalError as e:
+                    error_msg = str(e).lower()
+                    # Handle duplicate index/key errors
+                    if 'duplicate key' in error_msg or 'already exists' in error_msg or '1061' in error_msg:
+                        try:
+                            # Table might exist but indexes failed
+                            created.append(table.name)
+                            logger.debug("%s: already exists (skipped duplicate indexes)", table.name)
+                        except Exception:
+                            retry_queue.append(table)
+                    # Handle foreign key reference errors - retry later
+                    elif '1824' in str(e) or 'referenced table' in error_msg:
+                        retry_queue.append(table)
+                    else:
+                        failed.append((table.name, str(e)))
+            
+            # Second pass: retry failed tables (dependencies might be created now)
+            if retry_queue:
+                for table in retry_queue:
+                    try:
+                        table.create(conn, checkfirst=True)
+                        created.append(table.name)
+                    except Exception as e:
+                        failed.append((table.name, str(e)))
     
     if created:
-        print(f"\n Successfully created {len(created)} tables")
+        logger.info("Created %d tables", len(created))
     
-    if failed:
-        print(f"\n Failed to create {len(failed)} tables:")
-        for table_name, error in failed:
-            print(f"  - {table_name}: {error[:100]}")
+    for table_name, error in failed:
+        logger.warning("Failed to create table %s: %s", table_name, error[:100])
     
     return created
 
 
+# SQL type per dialect, keyed by SQLAlchemy type class. Lookup walks the
+# type's MRO, so subclasses (Text < String, BigInteger < Integer,
+# Float < Numeric, Enum < String) resolve to their most specific entry.
+COLUMN_TYPE_SQL = {
+    'mysql': {
+        sqltypes.Integer: lambda t: 'INT',
+        sqltypes.BigInteger: lambda t: 'BIGINT',
+        # Native ENUM stores a 1-2 byte index per row instead of the string
+        sqltypes.Enum: lambda t: (
+            'ENUM(' + ', '.join("'" + value.replace("'", "''") + "'" for value in t.enums) + ')'
+            if t.native_enum else f'VARCHAR({t.length})'
+        ),
+        sqltypes.String: lambda t: f'VARCHAR({t.length})' if t.length else 'VARCHAR(255)',
+        sqltypes.Text: lambda t: 'TEXT',
+        sqltypes.Boolean: lambda t: 'TINYINT(1)',
+        sqltypes.DateTime: lambda t: 'DATETIME',
+        sqltypes.Date: lambda t: 'DATE',
+        sqltypes.Time: lambda t: 'TIME',
+        sqltypes.Float: lambda t: 'FLOAT',
+        # The model's precision and scale, e.g. DECIMAL(4,1) for leave days
+        sqltypes.Numeric: lambda t: (
+            f'DECIMAL({t.precision},{t.scale or 0})' if t.precision is not None else 'DECIMAL(10,2)'
+        ),
+    },
+    'sqlite': {
+        sqltypes.Integer: lambda t: 'INTEGER',
+        sqltypes.String: lambda t: 'TEXT',
+        sqltypes.Boolean: lambda t: 'INTEGER',
+        sqltypes.DateTime: lambda t: 'DATETIME',
+        sqltypes.Date: lambda t: 'DATE',
+        sqltypes.Time: lambda t: 'TIME',
+        sqltypes.Numeric: lambda t: 'REAL',
+    },
+}
+
+
 def get_column_type_sql(column, dialect_name):
     """Generate SQL type string for a column based on database dialect"""
     col_type = column.type
-    type_map = {
-        'mysql': {
-            'INTEGER': 'INT',
-            'BIGINT': 'BIGINT',
-            'VARCHAR': lambda: f'VARCHAR({col_type.length})' if hasattr(col_type, 'length') and col_type.length else 'VARCHAR(255)',
-            'TEXT': 'TEXT',
-            'BOOLEAN': 'TINYINT(1)',
-            'DATETIME': 'DATETIME',
-            'DATE': 'DATE',
-            'TIME': 'TIME',
-            'FLOAT': 'FLOAT',
-            'NUMERIC': 'DECIMAL(10,2)',
-            'DECIMAL': 'DECIMAL(10,2)',
-        },
-        'sqlite': {
-            'INTEGER': 'INTEGER',
-            'BIGINT': 'INTEGER',
-            'VARCHAR': 'TEXT',
-            'TEXT': 'TEXT',
-            'BOOLEAN': 'INTEGER',
-            'DATETIME': 'DATETIME',
-            'DATE': 'DATE',
-            'TIME': 'TIME',
-            'FLOAT': 'REAL',
-            'NUMERIC': 'REAL',
-            'DECIMAL': 'REAL',
-        }
-    }
-    
-    type_str = str(col_type).split('(')[0].upper()
-    
-    if dialect_name == 'mysql':
-        mapping = type_map['mysql']
-        if type_str == 'VARCHAR':
-            return mapping['VARCHAR']()
-        elif type_str in mapping:
-            return mapping[type_str]
-        elif 'ENUM' in type_str:
-            return 'VARCHAR(50)'
-        else:
-            return 'TEXT'
-    elif dialect_name == 'sqlite':
-        mapping = type_map['sqlite']
-        return mapping.get(type_str, 'TEXT')
-    else:
+    type_map = COLUMN_TYPE_SQL.get(dialect_name)
+    if type_map is None:
         return str(col_type)
+    
+    for type_class in type(col_type).__mro__:
+        type_sql = type_map.get(type_class)
+        if type_sql is not None:
+            return type_sql(col_type)
+    return 'TEXT'
+
+
+def fetch_all_column_names(engine):
+    """
+    Get the column names of every table in the current MySQL schema with one query.
+    Returns: {table_name: {column_name, ...}}
+    """
+    column_names = {}
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT table_name, column_name "
+            "FROM information_schema.COLUMNS "
+            "WHERE table_schema = DATABASE()"
+        ))
+        for table_name, column_name in rows:
+            column_names.setdefault(table_name, set()).add(column_name)
+    return column_names
 
 
-def add_missing_columns(engine):
-    """Add missing columns to existing tables"""
-    inspector = inspect(engine)
+def add_missing_columns(engine, inspector, existing_tables, all_column_names=None):
+    """
+    Add missing columns to existing tables
+    all_column_names: result of fetch_all_column_names when the caller already read it
+    """
     dialect_name = engine.dialect.name
+    # DDL cannot take bound parameters: identifiers go through the dialect's
+    # quoting and literal defaults through its String literal processor
+    quote = engine.dialect.identifier_preparer.quote_identifier
+    string_literal = sqltypes.String().literal_processor(engine.dialect)
     added_columns = []
     failed_columns = []
     
-    for table_name, table in Base.metadata.tables.items():
-        if table_name not in inspector.get_table_names():
-            continue
+    # On MySQL read every table's columns in one round-trip; other dialects
+    # ask the inspector per table
+    if all_column_names is None and dialect_name == 'mysql':
+        all_column_names = fetch_all_column_names(engine)
+    
+    tables = load_models().metadata.tables
+    for table_name in sorted(get_expected_tables() & existing_tables):
+        table = tables[table_name]
         
-        existing_columns = {col['name'] for col in inspector.get_columns(table_name)}
+        if all_column_names is not None:
+            existing_columns = all_column_names.get(table_name, set())
+        else:
+            existing_columns = {col['name'] for col in inspector.get_columns(table_name)}
         expected_columns = {col.name: col for col in table.columns}
         
         missing_column_names = set(expected_columns.keys()) - existing_columns
         
         if missing_column_names:
-            print(f"\n Adding missing columns to '{table_name}':")
-            
+            # Build (name, type, column definition) for every missing column
+            column_defs = []
             for col_name in sorted(missing_column_names):
                 column = expected_columns[col_name]
                 
+                col_type_sql = get_column_type_sql(column, dialect_name)
+                
+                # Generated columns carry their expression instead of a default;
+                # SQLite can only add VIRTUAL ones through ALTER TABLE
+                if column.computed is not None:
+                    storage = 'STORED' if column.computed.persisted and dialect_name != 'sqlite' else 'VIRTUAL'
+                    generated_sql = f"{col_type_sql} GENERATED ALWAYS AS ({column.computed.sqltext}) {storage}"
+                    column_defs.append((col_name, col_type_sql, f"{quote(col_name)} {generated_sql}"))
+                    continue
+                
+                # Add NULL/NOT NULL constraint
+                null_constraint = 'NOT NULL' if not column.nullable else 'NULL'
+                
+                # Add default value if exists
+                default_clause = ''
+                if column.default is not None and hasattr(column.default, 'arg'):
+                    default_val = column.default.arg
+                    if callable(default_val):
+                        # Skip callable defaults (like datetime.now)
+                        default_clause = ''
+                    elif isinstance(default_val, bool):
+                        default_clause = f" DEFAULT {1 if default_val else 0}"
+                    elif isinstance(default_val, (int, float)):
+                        default_clause = f" DEFAULT {default_val}"
+                    elif isinstance(default_val, str):
+                        default_clause = f" DEFAULT {string_literal(default_val)}"
+                
+                # For NOT NULL columns without defaults, make them nullable to avoid errors
+                if not column.nullable and not default_clause and not column.server_default:
+                    null_constraint = 'NULL'
+                    logger.warning("%s.%s: making nullable (no default provided)", table_name, col_name)
+                
+                if dialect_name == 'sqlite':
+                    # SQLite has limited ALTER TABLE support
+                    column_defs.append((col_name, col_type_sql, f"{quote(col_name)} {col_type_sql}{default_clause}"))
+                else:
+                    column_defs.append((col_name, col_type_sql, f"{quote(col_name)} {col_type_sql}{default_clause} {null_constraint}"))
+            
+            # MySQL adds all columns in one ALTER, i.e. one table rebuild
+            # instead of one per column; on error fall back to one at a time
+            if dialect_name == 'mysql' and len(column_defs) > 1:
+                alter_sql = f"ALTER TABLE {quote(table_name)} " + ', '.join(
+                    f"ADD COLUMN {column_def}" for _, _, column_def in column_defs
+                )
                 try:
-                    # Build ALTER TABLE statement
-                    col_type_sql = get_column_type_sql(column, dialect_name)
-                    
-                    # Add NULL/NOT NULL constraint
-                    null_constraint = 'NOT NULL' if not column.nullable else 'NULL'
-                    
-                    # Add default value if exists
-                    default_clause = ''
-                    if column.default is not None and hasattr(column.default, 'arg'):
-                        default_val = column.default.arg
-                        if callable(default_val):
-                            # Skip callable defaults (like datetime.now)
-                            default_clause = ''
-                        elif isinstance(default_val, bool):
-                            default_clause = f" DEFAULT {1 if default_val else 0}"
-                        elif isinstance(default_val, (int, float)):
-                            default_clause = f" DEFAULT {default_val}"
-                        elif isinstance(default_val, str):
-                            default_clause = f" DEFAULT '{default_val}'"
-                    
-                    # For NOT NULL columns without defaults, make them nullable to avoid errors
-                    if not column.nullable and not default_clause and not column.server_default:
-                        null_constraint = 'NULL'
-                        print(f"   Warning: {col_name} - Making nullable (no default provided)")
-                    
-                    alter_sql = f"ALTER TABLE `{table_name}` ADD COLUMN `{col_name}` {col_type_sql}{default_clause} {null_constraint}"
+                    with engine.begin() as conn:
+                        conn.execute(text(alter_sql))
                     
-                    if dialect_name == 'sqlite':
-                        # SQLite has limited ALTER TABLE support
-                        alter_sql = f"ALTER TABLE {table_name} ADD COLUMN {col_name} {col_type_sql}{default_clause}"
+                    added_columns.extend(f"{table_name}.{col_name}" for col_name, _, _ in column_defs)
+                    logger.info("Added %d columns to %s: %s", len(column_defs), table_name,
+                                ', '.join(f"{col_name} ({col_type_sql})" for col_name, col_type_sql, _ in column_defs))
+                    continue
+                except Exception as e:
+                    logger.warning("Combined ALTER on %s failed, adding columns one by one: %s", table_name, str(e)[:80])
+            
+            added_here = []
+            for col_name, col_type_sql, column_def in column_defs:
+                try:
+                    alter_sql = f"ALTER TABLE {quote(table_name)} ADD COLUMN {column_def}"
                     
                     with engine.connect() as conn:
                         conn.execute(text(alter_sql))
                         conn.commit()
                     
                     added_columns.append(f"{table_name}.{col_name}")
-                    print(f"   ✓ Added column: {col_name} ({col_type_sql})")
+                    added_here.append(f"{col_name} ({col_type_sql})")
                     
                 except Exception as e:
                     error_msg = str(e)
                     # Skip if column already exists (race condition or duplicate)
                     if 'duplicate column' in error_msg.lower() or 'already exists' in error_msg.lower():
-                        print(f"   ⊳ {col_name}: already exists")
+                        logger.debug("%s.%s: already exists", table_name, col_name)
                     else:
                         failed_columns.append(f"{table_name}.{col_name}: {error_msg[:80]}")
-                        print(f"   ✗ {col_name}: {error_msg[:80]}")
-    
-    if added_columns:
-        print(f"\n Successfully added {len(added_columns)} columns")
+            
+            if added_here:
+                logger.info("Added %d columns to %s: %s", len(added_here), table_name, ', '.join(added_here))
     
-    if failed_columns:
-        print(f"\n Failed to add {len(failed_columns)} columns:")
-        for failure in failed_columns:
-            print(f"  - {failure}")
+    for failure in failed_columns:
+        logger.warning("Failed to add column %s", failure)
     
     return added_columns, failed_columns
 
 
-def sync_unique_constraints(engine):
+def backfill_student_leave_days(engine):
+    """Fill student_leaves.total_days for rows written before the column existed"""
+    from leave_models import StudentLeave, student_leave_days
+    
+    table = StudentLeave.__table__
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(table.c.id, table.c.from_date, table.c.to_date, table.c.is_half_day)
+            .where(table.c.total_days.is_(None))
+        ).all()
+        if rows:
+            conn.execute(
+                update(table).where(table.c.id == bindparam('row_id')).values(total_days=bindparam('days')),
+                [{'row_id': row.id, 'days': student_leave_days(row.from_date, row.to_date, row.is_half_day)}
+                 for row in rows]
+            )
+    logger.info("Backfilled total_days for %d student leaves", len(rows))
+    return len(rows)
+
+
+def fetch_all_unique_metadata(engine):
+    """
+    Get every unique index in the current MySQL schema with one query.
+    MySQL implements unique constraints as unique indexes, so this covers both.
+    Returns: {table_name: {index_name: (sorted column names)}}
+    """
+    unique_columns = {}
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT table_name, index_name, column_name "
+            "FROM information_schema.STATISTICS "
+            "WHERE table_schema = DATABASE() AND non_unique = 0 AND index_name <> 'PRIMARY' "
+            "ORDER BY table_name, index_name, seq_in_index"
+        ))
+        for table_name, index_name, column_name in rows:
+            unique_columns.setdefault(table_name, {}).setdefault(index_name, []).append(column_name)
+    
+    return {
+        table_name: {index_name: tuple(sorted(columns)) for index_name, columns in indexes.items()}
+        for table_name, indexes in unique_columns.items()
+    }
+
+
+def sync_unique_constraints(engine, existing_tables, all_unique_constraints=None):
     """
     Sync unique constraints between model definitions and database.
     Drops and recreates constraints that don't match the model definition.
+    all_unique_constraints: result of fetch_all_unique_metadata when the caller already read it
     """
-    inspector = inspect(engine)
     dialect_name = engine.dialect.name
     
     if dialect_name != 'mysql':
-        print("  Constraint sync only supported for MySQL currently")
+        logger.debug("Constraint sync only supported for MySQL currently")
         return [], []
     
+    quote = engine.dialect.identifier_preparer.quote_identifier
     fixed_constraints = []
     failed_constraints = []
     
-    print("\n Checking unique constraints...")
+    # Unique indexes of all tables in one round-trip instead of two per table
+    if all_unique_constraints is None:
+        try:
+            all_unique_constraints = fetch_all_unique_metadata(engine)
+        except Exception as e:
+            logger.warning("Could not read unique constraints: %s", str(e)[:80])
+            return [], [f"unique constraints: {str(e)[:50]}"]
     
-    for table_name, table in Base.metadata.tables.items():
-        if table_name not in inspector.get_table_names():
-            continue
+    tables = load_models().metadata.tables
+    for table_name in sorted(get_expected_tables() & existing_tables):
+        table = tables[table_name]
         
         # Get expected unique constraints from model
         expected_constraints = {}
@@ -382,52 +663,67 @@ def sync_unique_constraints(engine):
         
         # Get actual unique constraints from database
         try:
-            actual_constraints = {}
+            actual_constraints = all_unique_constraints.get(table_name, {})
             
-            # Get unique constraints
-            for constraint in inspector.get_unique_constraints(table_name):
-                if constraint['name']:
-                    col_names = tuple(sorted(constraint['column_names']))
-                    actual_constraints[constraint['name']] = col_names
+            # Compare: (name, expected columns, actual columns or None if missing)
+            changes = [
+                (constraint_name, expected_cols, actual_constraints.get(constraint_name))
+                for constraint_name, expected_cols in expected_constraints.items()
+                if actual_constraints.get(constraint_name) != expected_cols
+            ]
             
-            # Get unique indexes
-            for index in inspector.get_indexes(table_name):
-                if index.get('unique') and index['name']:
-                    col_names = tuple(sorted(index['column_names']))
-                    actual_constraints[index['name']] = col_names
-            
-            # Compare and fix mismatches
-            for constraint_name, expected_cols in expected_constraints.items():
-                actual_cols = actual_constraints.get(constraint_name)
+            # Apply all of a table's changes in one ALTER (one table rebuild);
+            # on error fall back to one change at a time below
+            if len(changes) > 1:
+                alter_parts = []
+                for constraint_name, expected_cols, actual_cols in changes:
+                    if actual_cols is not None:
+                        alter_parts.append(f"DROP INDEX {quote(constraint_name)}")
+                    cols_sql = ', '.join([quote(c) for c in expected_cols])
+                    alter_parts.append(f"ADD UNIQUE INDEX {quote(constraint_name)} ({cols_sql})")
                 
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(text(f"ALTER TABLE {quote(table_name)} " + ', '.join(alter_parts)))
+                    
+                    for constraint_name, expected_cols, actual_cols in changes:
+                        if actual_cols is None:
+                            fixed_constraints.append(f"{table_name}.{constraint_name} (created)")
+                        else:
+                            fixed_constraints.append(f"{table_name}.{constraint_name} (updated)")
+                            logger.debug("%s.%s: %s -> %s", table_name, constraint_name, actual_cols, expected_cols)
+                    continue
+                except Exception as e:
+                    logger.warning("Combined ALTER on %s failed, applying changes one by one: %s", table_name, str(e)[:80])
+            
+            # Fix mismatches
+            for constraint_name, expected_cols, actual_cols in changes:
                 if actual_cols is None:
                     # Constraint doesn't exist - create it
                     try:
-                        cols_sql = ', '.join([f'`{c}`' for c in expected_cols])
-                        create_sql = f"ALTER TABLE `{table_name}` ADD UNIQUE INDEX `{constraint_name}` ({cols_sql})"
+                        cols_sql = ', '.join([quote(c) for c in expected_cols])
+                        create_sql = f"ALTER TABLE {quote(table_name)} ADD UNIQUE INDEX {quote(constraint_name)} ({cols_sql})"
                         
                         with engine.connect() as conn:
                             conn.execute(text(create_sql))
                             conn.commit()
                         
                         fixed_constraints.append(f"{table_name}.{constraint_name} (created)")
-                        print(f"   ✓ Created constraint: {table_name}.{constraint_name}")
                     except Exception as e:
                         if 'duplicate' in str(e).lower():
-                            print(f"   ⊳ {table_name}.{constraint_name}: already exists")
+                            logger.debug("%s.%s: already exists", table_name, constraint_name)
                         else:
                             failed_constraints.append(f"{table_name}.{constraint_name}: {str(e)[:50]}")
-                            print(f"   ✗ {table_name}.{constraint_name}: {str(e)[:80]}")
                 
-                elif actual_cols != expected_cols:
+                else:
                     # Constraint exists but columns don't match - drop and recreate
                     try:
                         # Drop old constraint
-                        drop_sql = f"ALTER TABLE `{table_name}` DROP INDEX `{constraint_name}`"
+                        drop_sql = f"ALTER TABLE {quote(table_name)} DROP INDEX {quote(constraint_name)}"
                         
                         # Create new constraint
-                        cols_sql = ', '.join([f'`{c}`' for c in expected_cols])
-                        create_sql = f"ALTER TABLE `{table_name}` ADD UNIQUE INDEX `{constraint_name}` ({cols_sql})"
+                        cols_sql = ', '.join([quote(c) for c in expected_cols])
+                        create_sql = f"ALTER TABLE {quote(table_name)} ADD UNIQUE INDEX {quote(constraint_name)} ({cols_sql})"
                         
                         with engine.connect() as conn:
                             conn.execute(text(drop_sql))
@@ -435,156 +731,326 @@ def sync_unique_constraints(engine):
                             conn.commit()
                         
                         fixed_constraints.append(f"{table_name}.{constraint_name} (updated)")
-                        print(f"   ✓ Updated constraint: {table_name}.{constraint_name}")
-                        print(f"     Old: {actual_cols}")
-                        print(f"     New: {expected_cols}")
+                        logger.debug("%s.%s: %s -> %s", table_name, constraint_name, actual_cols, expected_cols)
                     except Exception as e:
                         failed_constraints.append(f"{table_name}.{constraint_name}: {str(e)[:50]}")
-                        print(f"   ✗ {table_name}.{constraint_name}: {str(e)[:80]}")
         
         except Exception as e:
-            print(f"   Warning: Could not check constraints for {table_name}: {str(e)[:50]}")
+            logger.warning("Could not check constraints for %s: %s", table_name, str(e)[:50])
     
     if fixed_constraints:
-        print(f"\n Fixed {len(fixed_constraints)} constraints")
+        logger.info("Fixed %d constraints: %s", len(fixed_constraints), ', '.join(fixed_constraints))
     elif not failed_constraints:
-        print("   All constraints match model definitions")
+        logger.info("All constraints match model definitions")
+    
+    for failure in failed_constraints:
+        logger.warning("Failed to fix constraint %s", failure)
     
     return fixed_constraints, failed_constraints
 
 
-def create_default_admin_user(engine):
-    """Create default portal admin user if no users exist"""
-    from sqlalchemy.orm import sessionmaker
-    Session = sessionmaker(bind=engine)
-    session = Session()
+# Indexes removed from the models that existing databases may still carry
+OBSOLETE_INDEXES = {
+    # Both duplicate the unique_teacher_year (teacher_id, academic_year) index
+    'teacher_leave_balance': ('idx_balance_check', 'idx_teacher'),
+}
+
+
+def create_missing_indexes(engine, inspector, existing_tables):
+    """
+    Create non-unique indexes declared on models but missing from existing tables,
+    and drop the OBSOLETE_INDEXES still present.
+    New tables get their indexes from create(); this covers indexes added later.
+    """
+    created_indexes = []
+    failed_indexes = []
+    dropped_indexes = []
+    quote = engine.dialect.identifier_preparer.quote
+    
+    tables = load_models().metadata.tables
+    for table_name in sorted(get_expected_tables() & existing_tables):
+        table = tables[table_name]
+        
+        expected_indexes = [index for index in table.indexes if not index.unique and index.name]
+        obsolete_index_names = OBSOLETE_INDEXES.get(table_name, ())
+        if not expected_indexes and not obsolete_index_names:
+            continue
+        
+        try:
+            actual_index_names = {index['name'] for index in inspector.get_indexes(table_name)}
+        except Exception as e:
+            logger.warning("Could not check indexes for %s: %s", table_name, str(e)[:50])
+            continue
+        
+        for index_name in obsolete_index_names:
+            if index_name not in actual_index_names:
+                continue
+            if engine.dialect.name == 'mysql':
+                drop_sql = f"DROP INDEX {quote(index_name)} ON {quote(table_name)}"
+            else:
+                drop_sql = f"DROP INDEX {quote(index_name)}"
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(drop_sql))
+                dropped_indexes.append(f"{table_name}.{index_name}")
+            except Exception as e:
+                failed_indexes.append(f"{table_name}.{index_name}: {str(e)[:50]}")
+        
+        for index in expected_indexes:
+            if index.name in actual_index_names:
+                continue
+            try:
+                index.create(engine)
+                created_indexes.append(f"{table_name}.{index.name}")
+            except Exception as e:
+                if 'duplicate' in str(e).lower() or 'already exists' in str(e).lower():
+                    logger.debug("%s.%s: already exists", table_name, index.name)
+                else:
+                    failed_indexes.append(f"{table_name}.{index.name}: {str(e)[:50]}")
+    
+    if created_indexes:
+        logger.info("Created %d indexes: %s", len(created_indexes), ', '.join(created_indexes))
+    
+    if dropped_indexes:
+        logger.info("Dropped %d obsolete indexes: %s", len(dropped_indexes), ', '.join(dropped_indexes))
+    
+    for failure in failed_indexes:
+        logger.warning("Failed to create index %s", failure)
+    
+    return created_indexes, failed_indexes
+
+
+# Portal admin seeded into an empty users table
+DEFAULT_ADMIN_USER = {
+    'username': 'admin',
+    'email': 'admin@school.com',
+    'password': 'admin123',  # Change this in production!
+    'role': 'portal_admin',
+    'first_name': 'Portal',
+    'last_name': 'Admin',
+    'is_active': True,
+}
+
+# Rows per multi-row INSERT when seeding many users
+SEED_INSERT_PAGE_SIZE = 1000
+
+
+def create_default_admin_user(engine, users=None):
+    """
+    Seed users if no users exist (default: the portal admin).
+    users: list of dicts of users columns, with a plain 'password' instead of
+    password_hash; they are inserted in batches with one executemany.
+    """
+    load_models()  # users references tenants, which must be registered too
+    from models import User
+    from werkzeug.security import generate_password_hash
+    
+    if users is None:
+        users = [DEFAULT_ADMIN_USER]
     
     try:
-        # Check if any users exist
-        user_count = session.query(User).count()
-        if user_count == 0:
-            # Create default admin
-            admin = User(
-                username='admin',
-                email='admin@school.com',
-                role='portal_admin',
-                first_name='Portal',
-                last_name='Admin',
-                is_active=True
-            )
-            admin.set_password('admin123')  # Change this in production!
-            
-            session.add(admin)
-            session.commit()
+        # Hash every password up front, outside the transaction
+        rows = []
+        for user in users:
+            row = dict(user)
+            row['password_hash'] = generate_password_hash(row.pop('password'))
+            rows.append(row)
+        
+        # One transaction: commits on success, rolls back on error
+        with engine.begin() as conn:
+            # Check if any users exist (stops at the first row)
+            if conn.execute(select(User.__table__.c.id).limit(1)).first() is not None:
+                return False
             
-            print("\nCreated default admin user:")
-            print("  Username: admin")
-            print("  Password: admin123")
-            print("  IMPORTANT: Change this password immediately in production!")
-            return True
-        return False
+            conn.execute(
+                insert(User.__table__).execution_options(insertmanyvalues_page_size=SEED_INSERT_PAGE_SIZE),
+                rows
+            )
+        
+        if users == [DEFAULT_ADMIN_USER]:
+            # Warning level so the credentials notice shows even with logging unconfigured
+            logger.warning("Created default admin user 'admin' with password 'admin123' - "
+                           "change this password immediately in production!")
+        else:
+            logger.info("Seeded %d users", len(rows))
+        return True
     except Exception as e:
-        session.rollback()
-        print(f"Warning: Could not create default admin user: {e}")
+        logger.warning("Could not create default admin user: %s", e)
         return False
-    finally:
-        session.close()
 
 
-def initialize_database(verbose=True):
+def initialize_database(verbose=True, force=False):
     """
     Main function to initialize and verify database integrity
+    
+    Skips the column, constraint and index checks when the stored schema hash
+    matches the models and init_db, and every model table exists. Set
+    FORCE_SCHEMA_CHECK=1 (or pass force=True) to run them anyway, e.g. after
+    the database was changed by hand.
     Returns: (success: bool, created_tables: list, issues: list)
     """
-    if verbose:
-        print("\n" + "="*60)
-        print("DATABASE INITIALIZATION & INTEGRITY CHECK")
-        print("="*60)
-        print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    force = force or os.getenv('FORCE_SCHEMA_CHECK', '').lower() in ('1', 'true', 'yes')
+    
+    # Non-verbose runs only report warnings and errors; the level is restored on return
+    previous_level = logger.level
+    logger.setLevel(logging.NOTSET if verbose else logging.WARNING)
+    logger.info("Database initialization & integrity check (%s)", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
     
     try:
         # Get database URL
         db_url = get_database_url()
-        if verbose:
-            # Mask password in URL for display
-            display_url = db_url
-            if '@' in db_url:
-                parts = db_url.split('@')
-                user_pass = parts[0].split('://')[-1]
-                if ':' in user_pass:
-                    user = user_pass.split(':')[0]
-                    display_url = db_url.replace(user_pass, f"{user}:****")
-            print(f"\nDatabase URL: {display_url}")
-        
-        # Create database if needed (for PostgreSQL/MySQL)
-        create_database_if_not_exists(db_url)
-        
-        # Create engine
-        engine = create_engine(db_url, echo=False)
-        
-        if verbose:
-            print(f"\n Checking database connection...")
-        
-        # Test connection
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Database URL: %s", get_display_url(db_url))
+        
+        # Shared engine; left open on return so the application reuses its pool
+        engine = get_engine(db_url)
+        
+        if not force and _VERIFIED_SOURCE_HASHES.get(str(engine.url)) == compute_source_hash():
+            logger.info("Schema already verified in this process - skipping integrity checks")
+            return True, [], {
+                'added_columns': [],
+                'failed_columns': [],
+                'fixed_constraints': [],
+                'failed_constraints': [],
+                'created_indexes': [],
+                'failed_indexes': []
+            }
+        
+        # Create database if needed (for PostgreSQL/MySQL). Probing through the
+        # shared engine first avoids a separate server-level connection and
+        # CREATE DATABASE on every start.
+        if not database_exists(engine):
+            create_database_if_not_exists(db_url)
+        
+        # Test connection; the stored fingerprint is read on the same connection
         try:
             with engine.connect() as conn:
-                if verbose:
-                    print("Database connection successful")
+                if not force:
+                    stored_schema_hash, stored_source_hash = get_stored_schema_hashes(conn)
         except Exception as e:
-            print(f" Database connection failed: {e}")
+            logger.error("Database connection failed: %s", e)
             return False, [], [{'error': str(e)}]
         
+        # Nothing to do if the models have not changed since the last clean run.
+        # Unchanged model files are detected without importing them; edited
+        # files that still produce the same schema only cost the import.
+        schema_unchanged = False
+        source_hash = compute_source_hash()
+        if not force:
+            schema_unchanged = stored_source_hash == source_hash
+            if not schema_unchanged and stored_schema_hash == get_schema_hash():
+                schema_unchanged = True
+                store_schema_hash(engine, stored_schema_hash, source_hash)
+        
+        # Cheap drift check on the fast path: a dropped table still triggers a
+        # full check (one table-name query)
+        if schema_unchanged:
+            missing_tables = get_expected_tables() - get_existing_tables(inspect(engine))
+            if missing_tables:
+                logger.warning("Schema fingerprint matches but %d tables are missing - running full check",
+                               len(missing_tables))
+                schema_unchanged = False
+        
+        if schema_unchanged:
+            _VERIFIED_SOURCE_HASHES[str(engine.url)] = source_hash
+            logger.info("Schema fingerprint unchanged - skipping integrity checks "
+                        "(set FORCE_SCHEMA_CHECK=1 to run them)")
+            return True, [], {
+                'added_columns': [],
+                'failed_columns': [],
+                'fixed_constraints': [],
+                'failed_constraints': [],
+                'created_indexes': [],
+                'failed_indexes': []
+            }
+        
+        # One inspector for the whole run: it memoizes table names, columns,
+        # constraints and indexes, so each is fetched from the database once
+        inspector = inspect(engine)
+        
         # Get existing and expected tables
-        existing_tables = get_existing_tables(engine)
+        existing_tables = get_existing_tables(inspector)
         expected_tables = get_expected_tables()
         
-        if verbose:
-            print(f"\nExisting tables: {len(existing_tables)}")
-            print(f"Expected tables: {len(expected_tables)}")
+        logger.info("Existing tables: %d, expected tables: %d", len(existing_tables), len(expected_tables))
         
         # Create missing tables
         created_tables = create_missing_tables(engine, existing_tables, expected_tables)
         
+        # The passes below only look at tables that existed before this run;
+        # tables created above already match their models
+        
+        all_column_names = all_unique_constraints = None
+        if engine.dialect.name == 'mysql':
+            # Only the two read-only information_schema fetches overlap, each on
+            # its own pooled connection. The ALTERs below stay sequential: a
+            # unique constraint may cover a column added in this run.
+            # Adding columns never creates unique indexes, so the constraint
+            # snapshot taken before it is still current.
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                columns_future = executor.submit(fetch_all_column_names, engine)
+                constraints_future = executor.submit(fetch_all_unique_metadata, engine)
+                all_column_names = columns_future.result()
+                try:
+                    all_unique_constraints = constraints_future.result()
+                except Exception as e:
+                    # sync_unique_constraints retries the read and reports the failure
+                    logger.warning("Could not prefetch unique constraints: %s", str(e)[:80])
+        
         # Add missing columns to existing tables
-        added_columns, failed_columns = add_missing_columns(engine)
+        added_columns, failed_columns = add_missing_columns(
+            engine, inspector, existing_tables, all_column_names
+        )
         
         # Sync unique constraints (fix mismatched constraints)
-        fixed_constraints, failed_constraint_fixes = sync_unique_constraints(engine)
+        fixed_constraints, failed_constraint_fixes = sync_unique_constraints(
+            engine, existing_tables, all_unique_constraints
+        )
+        
+        if 'student_leaves.total_days' in added_columns:
+            backfill_student_leave_days(engine)
+        
+        # Create indexes added to models after their tables were created
+        created_indexes, failed_indexes = create_missing_indexes(engine, inspector, existing_tables)
         
         # Create default admin user if needed
         if len(existing_tables) == 0 or 'users' in created_tables:
             create_default_admin_user(engine)
         
-        if verbose:
-            print("\n" + "="*60)
-            changes_made = created_tables or added_columns or fixed_constraints
-            if changes_made:
-                print("[OK] Database initialization completed")
-                if created_tables:
-                    print(f"    - Created {len(created_tables)} new tables")
-                if added_columns:
-                    print(f"    - Added {len(added_columns)} missing columns")
-                if fixed_constraints:
-                    print(f"    - Fixed {len(fixed_constraints)} constraints")
-            elif failed_columns or failed_constraint_fixes:
-                print("[WARNING] Database verified with some warnings")
-            else:
-                print("[OK] Database integrity verified - all structures match models")
-            print("="*60 + "\n")
+        # Remember this schema only if the database now matches it completely
+        missing_tables = expected_tables - existing_tables - set(created_tables)
+        if not (missing_tables or failed_columns or failed_constraint_fixes or failed_indexes):
+            try:
+                store_schema_hash(engine, get_schema_hash(), source_hash)
+                _VERIFIED_SOURCE_HASHES[str(engine.url)] = source_hash
+            except Exception as e:
+                logger.warning("Could not store schema fingerprint: %s", e)
+        
+        if created_tables or added_columns or fixed_constraints or created_indexes:
+            logger.info(
+                "Database initialization completed: %d tables created, %d columns added, "
+                "%d constraints fixed, %d indexes created",
+                len(created_tables), len(added_columns), len(fixed_constraints), len(created_indexes)
+            )
+        elif failed_columns or failed_constraint_fixes or failed_indexes:
+            logger.warning("Database verified with some warnings")
+        else:
+            logger.info("Database integrity verified - all structures match models")
         
-        engine.dispose()
         return True, created_tables, {
             'added_columns': added_columns, 
             'failed_columns': failed_columns,
             'fixed_constraints': fixed_constraints,
-            'failed_constraints': failed_constraint_fixes
+            'failed_constraints': failed_constraint_fixes,
+            'created_indexes': created_indexes,
+            'failed_indexes': failed_indexes
         }
         
     except Exception as e:
-        print(f"\n[ERROR] Database initialization failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Database initialization failed: %s", e)
         return False, [], [{'error': str(e)}]
+    finally:
+        logger.setLevel(previous_level)
 
 
 def run_on_startup():
@@ -592,9 +1058,8 @@ def run_on_startup():
     success, created_tables, issues = initialize_database(verbose=True)
     
     if not success:
-        print("\n[WARNING] Database initialization failed!")
-        print("The application may not work correctly.")
-        print("Please check the database configuration and try again.\n")
+        logger.warning("Database initialization failed! The application may not work correctly. "
+                       "Please check the database configuration and try again.")
         return False
     
     return True
@@ -602,5 +1067,6 @@ def run_on_startup():
 
 if __name__ == '__main__':
     """Run standalone"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     success = run_on_startup()
     sys.exit(0 if success else 1)
@@ -3,12 +3,88 @@ Leave Management Helper Functions
 """
 
 from datetime import datetime, date
-from decimal import Decimal
-from dateutil.relativedelta import relativedelta
+from functools import lru_cache
 import logging
+import time
+from sqlalchemy import select, insert, update, bindparam, func, inspect
+from sqlalchemy.orm import joinedload
+from leave_models import (
+    LeaveQuotaSettings, TeacherLeaveBalance, TeacherLeaveApplication,
+    LeaveTypeEnum, LeaveStatusEnum, HalfDayPeriodEnum
+)
+from teacher_models import Teacher, EmployeeStatusEnum
 
 logger = logging.getLogger(__name__)
 
+# Quota policy snapshots per (tenant_id, academic_year): (policy, expires_at).
+# Settings are read-mostly; entries expire after QUOTA_CACHE_TTL seconds and
+# are dropped by invalidate_quota_cache() when the settings are saved.
+QUOTA_CACHE_TTL = 60
+_QUOTA_CACHE = {}
+
+# WEEKDAYS_IN_PARTIAL_WEEK[start_weekday][n]: Mon-Fri days among n (< 7)
+# consecutive days starting on start_weekday (Monday = 0)
+WEEKDAYS_IN_PARTIAL_WEEK = tuple(
+    tuple(sum(1 for i in range(n) if (start_weekday + i) % 7 < 5) for n in range(7))
+    for start_weekday in range(7)
+)
+
+# Balance column prefix per quota-limited leave type (<prefix>_pending / _taken)
+LEAVE_TYPE_PREFIX = {
+    'CL': 'cl',
+    'Half-day': 'cl',  # Half-day uses CL balance
+    'SL': 'sl',
+    'EL': 'el',
+    'Maternity': 'maternity',
+    'Paternity': 'paternity',
+}
+
+# Leave types without a quota only track days taken
+UNLIMITED_LEAVE_TAKEN_FIELD = {
+    'LOP': 'lop_taken',
+    'Duty Leave': 'duty_leave_taken',
+}
+
+
+# The <prefix>_balance columns are generated by the database (Computed)
+_COMPUTED_BALANCE_FIELDS = [
+    column.key for column in TeacherLeaveBalance.__table__.columns if column.computed is not None
+]
+
+
+def _add_to_balance(balance, field, days):
+    """
+    Add days (negative to subtract) to a balance column, treating NULL as 0.
+    The generated balance columns are expired, so the next read flushes the
+    change and reloads them instead of returning the stale values
+    """
+    current = getattr(balance, field)
+    setattr(balance, field, (current or 0.0) + days)
+    state = inspect(balance)
+    if state.persistent:
+        state.session.expire(balance, _COMPUTED_BALANCE_FIELDS)
+
+
+# Balance lookup built once; teacher_id and academic_year are bound per call
+_BALANCE_STMT = select(TeacherLeaveBalance).where(
+    TeacherLeaveBalance.teacher_id == bindparam('teacher_id'),
+    TeacherLeaveBalance.academic_year == bindparam('academic_year')
+)
+_BALANCE_STMT_FOR_UPDATE = _BALANCE_STMT.with_for_update()
+
+
+def _fetch_balance(session, teacher_id, academic_year, for_update=False):
+    """
+    Teacher's TeacherLeaveBalance for the year, or None (unique on teacher_id, academic_year)
+    
+    for_update locks the row until commit, for read-modify-write of the
+    pending/taken columns by concurrent requests
+    """
+    return session.execute(
+        _BALANCE_STMT_FOR_UPDATE if for_update else _BALANCE_STMT,
+        {'teacher_id': teacher_id, 'academic_year': academic_year}
+    ).scalar_one_or_none()
+
 
 def get_current_academic_year():
     """
@@ -18,7 +94,13 @@ def get_current_academic_year():
     Returns:
         str: Academic year in format "2024-25"
     """
-    today = date.today()
+    return _academic_year_for(date.today().toordinal())
+
+
+@lru_cache(maxsize=8)
+def _academic_year_for(day_ordinal):
+    """Academic year containing the given date ordinal (cached per day)"""
+    today = date.fromordinal(day_ordinal)
     
     # If month is Jan-Mar, academic year is previous year
     if today.month < 4:
@@ -43,7 +125,6 @@ def get_or_create_quota_settings(session, tenant_id, academic_year=None):
     Returns:
         LeaveQuotaSettings: Quota settings object
     """
-    from leave_models import LeaveQuotaSettings
     
     if not academic_year:
         academic_year = get_current_academic_year()
@@ -73,11 +154,41 @@ def get_or_create_quota_settings(session, tenant_id, academic_year=None):
         )
         session.add(settings)
         session.flush()
-        logger.info(f"Created default quota settings for tenant {tenant_id}, year {academic_year}")
+        logger.info("Created default quota settings for tenant %s, year %s", tenant_id, academic_year)
     
     return settings
 
 
+def get_quota_policy(session, tenant_id, academic_year=None):
+    """
+    Get a school's quota settings as a read-only snapshot, cached in-process
+    
+    Args:
+        session: Database session (used on a cache miss)
+        tenant_id: School tenant ID
+        academic_year: Academic year string (e.g., "2024-25")
+    
+    Returns:
+        dict: LeaveQuotaSettings.to_dict() of the settings
+    """
+    if not academic_year:
+        academic_year = get_current_academic_year()
+    
+    key = (tenant_id, academic_year)
+    cached = _QUOTA_CACHE.get(key)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    
+    policy = get_or_create_quota_settings(session, tenant_id, academic_year).to_dict()
+    _QUOTA_CACHE[key] = (policy, time.monotonic() + QUOTA_CACHE_TTL)
+    return policy
+
+
+def invalidate_quota_cache(tenant_id, academic_year):
+    """Drop the cached quota policy after its settings changed"""
+    _QUOTA_CACHE.pop((tenant_id, academic_year), None)
+
+
 def initialize_teacher_balance(session, teacher_id, tenant_id, quota_settings, academic_year=None):
     """
     Initialize leave balance for a single teacher based on quota settings
@@ -92,19 +203,15 @@ def initialize_teacher_balance(session, teacher_id, tenant_id, quota_settings, a
     Returns:
         TeacherLeaveBalance: Created balance object
     """
-    from leave_models import TeacherLeaveBalance
     
     if not academic_year:
         academic_year = get_current_academic_year()
     
     # Check if balance already exists
-    existing = session.query(TeacherLeaveBalance).filter_by(
-        teacher_id=teacher_id,
-        academic_year=academic_year
-    ).first()
+    existing = _fetch_balance(session, teacher_id, academic_year)
     
     if existing:
-        logger.warning(f"Balance already exists for teacher {teacher_id}, year {academic_year}")
+        logger.warning("Balance already exists for teacher %s, year %s", teacher_id, academic_year)
         return existing
     
     # Create new balance
@@ -134,7 +241,9 @@ def initialize_teacher_balance(session, teacher_id, tenant_id, quota_settings, a
     )
     
     session.add(balance)
-    logger.info(f"Initialized balance for teacher {teacher_id}, year {academic_year}")
+    # Insert now: the generated balance columns read None until the row exists
+    session.flush()
+    logger.info("Initialized balance for teacher %s, year %s", teacher_id, academic_year)
     
     return balance
 
@@ -152,8 +261,6 @@ def initialize_all_teacher_balances(session, tenant_id, academic_year=None, forc
     Returns:
         dict: Statistics about initialization
     """
-    from teacher_models import Teacher, EmployeeStatusEnum
-    from leave_models import TeacherLeaveBalance
     
     if not academic_year:
         academic_year = get_current_academic_year()
@@ -161,58 +268,91 @@ def initialize_all_teacher_balances(session, tenant_id, academic_year=None, forc
     # Get quota settings
     quota_settings = get_or_create_quota_settings(session, tenant_id, academic_year)
     
-    # Get all active teachers
-    teachers = session.query(Teacher).filter_by(
-        tenant_id=tenant_id,
-        employee_status=EmployeeStatusEnum.ACTIVE
-    ).all()
+    # Get all active teachers (only their ids are needed)
+    teacher_ids = {
+        teacher_id for (teacher_id,) in session.query(Teacher.id).filter_by(
+            tenant_id=tenant_id,
+            employee_status=EmployeeStatusEnum.ACTIVE
+        )
+    }
+    
+    # Active teachers that already have a balance for this year, in one query
+    existing_ids = teacher_ids & {
+        teacher_id for (teacher_id,) in session.query(TeacherLeaveBalance.teacher_id).filter_by(
+            tenant_id=tenant_id,
+            academic_year=academic_year
+        )
+    }
+    new_ids = teacher_ids - existing_ids
+    reset_ids = existing_ids if force_reset else set()
     
     stats = {
-        'total_teachers': len(teachers),
+        'total_teachers': len(teacher_ids),
         'initialized': 0,
-        'already_exists': 0,
+        'already_exists': 0 if force_reset else len(existing_ids),
         'reset': 0,
         'errors': 0
     }
     
-    for teacher in teachers:
-        try:
-            existing = session.query(TeacherLeaveBalance).filter_by(
-                teacher_id=teacher.id,
-                academic_year=academic_year
-            ).first()
-            
-            if existing:
-                if force_reset:
-                    # Reset totals to quota values, preserve taken/pending
-                    existing.cl_total = quota_settings.cl_quota
-                    existing.sl_total = quota_settings.sl_quota
-                    existing.el_total = quota_settings.el_quota
-                    existing.maternity_total = quota_settings.maternity_quota
-                    existing.paternity_total = quota_settings.paternity_quota
-                    existing.last_reset_date = date.today()
-                    stats['reset'] += 1
-                    logger.info(f"Reset balance for teacher {teacher.id}")
-                else:
-                    stats['already_exists'] += 1
-            else:
-                # Create new balance
-                initialize_teacher_balance(
-                    session, teacher.id, tenant_id, quota_settings, academic_year
-                )
-                stats['initialized'] += 1
-        
-        except Exception as e:
-            logger.error(f"Error initializing balance for teacher {teacher.id}: {e}")
-            stats['errors'] += 1
-            continue
+    today = date.today()
+    new_balances = [
+        {
+            'tenant_id': tenant_id,
+            'teacher_id': teacher_id,
+            'academic_year': academic_year,
+            'cl_total': quota_settings.cl_quota,
+            'cl_taken': 0,
+            'cl_pending': 0,
+            'sl_total': quota_settings.sl_quota,
+            'sl_taken': 0,
+            'sl_pending': 0,
+            'el_total': quota_settings.el_quota,
+            'el_taken': 0,
+            'el_pending': 0,
+            'maternity_total': quota_settings.maternity_quota,
+            'maternity_taken': 0,
+            'maternity_pending': 0,
+            'paternity_total': quota_settings.paternity_quota,
+            'paternity_taken': 0,
+            'paternity_pending': 0,
+            'lop_taken': 0,
+            'duty_leave_taken': 0,
+            'el_carried_forward': 0,
+            'last_reset_date': today
+        }
+        for teacher_id in sorted(new_ids)
+    ]
     
     try:
+        if new_balances:
+            # One multi-row INSERT instead of one per teacher
+            session.execute(insert(TeacherLeaveBalance), new_balances)
+            stats['initialized'] = len(new_balances)
+        
+        if reset_ids:
+            # Reset totals to quota values, preserve taken/pending
+            session.execute(
+                update(TeacherLeaveBalance)
+                .where(
+                    TeacherLeaveBalance.teacher_id.in_(reset_ids),
+                    TeacherLeaveBalance.academic_year == academic_year
+                )
+                .values(
+                    cl_total=quota_settings.cl_quota,
+                    sl_total=quota_settings.sl_quota,
+                    el_total=quota_settings.el_quota,
+                    maternity_total=quota_settings.maternity_quota,
+                    paternity_total=quota_settings.paternity_quota,
+                    last_reset_date=today
+                )
+            )
+            stats['reset'] = len(reset_ids)
+        
         session.commit()
-        logger.info(f"Batch balance initialization complete: {stats}")
+        logger.info("Batch balance initialization complete: %s", stats)
     except Exception as e:
         session.rollback()
-        logger.error(f"Error committing balance initialization: {e}")
+        logger.error("Error committing balance initialization: %s", e)
         raise
     
     return stats
@@ -231,12 +371,7 @@ def update_teacher_balance(session, teacher_id, academic_year, balance_updates):
     Returns:
         TeacherLeaveBalance: Updated balance object
     """
-    from leave_models import TeacherLeaveBalance
-    
-    balance = session.query(TeacherLeaveBalance).filter_by(
-        teacher_id=teacher_id,
-        academic_year=academic_year
-    ).first()
+    balance = _fetch_balance(session, teacher_id, academic_year)
     
     if not balance:
         raise ValueError(f"Balance not found for teacher {teacher_id}, year {academic_year}")
@@ -255,7 +390,7 @@ def update_teacher_balance(session, teacher_id, academic_year, balance_updates):
     balance.updated_at = datetime.utcnow()
     session.commit()
     
-    logger.info(f"Updated balance for teacher {teacher_id}: {balance_updates}")
+    logger.info("Updated balance for teacher %s: %s", teacher_id, balance_updates)
     return balance
 
 
@@ -271,15 +406,10 @@ def get_teacher_balance(session, teacher_id, academic_year=None):
     Returns:
         TeacherLeaveBalance or None
     """
-    from leave_models import TeacherLeaveBalance
-    
     if not academic_year:
         academic_year = get_current_academic_year()
     
-    return session.query(TeacherLeaveBalance).filter_by(
-        teacher_id=teacher_id,
-        academic_year=academic_year
-    ).first()
+    return _fetch_balance(session, teacher_id, academic_year)
 
 
 def get_all_teacher_balances(session, tenant_id, academic_year=None):
@@ -292,19 +422,95 @@ def get_all_teacher_balances(session, tenant_id, academic_year=None):
         academic_year: Academic year string
     
     Returns:
-        List of TeacherLeaveBalance objects
+        List of TeacherLeaveBalance objects, with their teacher loaded
     """
-    from leave_models import TeacherLeaveBalance
     
     if not academic_year:
         academic_year = get_current_academic_year()
     
-    return session.query(TeacherLeaveBalance).filter_by(
+    return session.query(TeacherLeaveBalance).options(
+        joinedload(TeacherLeaveBalance.teacher)
+    ).filter_by(
         tenant_id=tenant_id,
         academic_year=academic_year
     ).all()
 
 
+# Balance columns written by export_teacher_balances(), in CSV order
+BALANCE_EXPORT_FIELDS = tuple(
+    f'{prefix}_{part}'
+    for prefix in ('cl', 'sl', 'el', 'maternity', 'paternity')
+    for part in ('total', 'taken', 'pending', 'balance')
+) + ('lop_taken', 'duty_leave_taken')
+
+
+def export_teacher_balances(session, tenant_id, academic_year=None):
+    """
+    Leave balances of every teacher of a school as flat rows for CSV export.
+    Balances come from the generated columns, so no per-row arithmetic or ORM
+    instances are involved.
+    
+    Args:
+        session: Database session
+        tenant_id: School tenant ID
+        academic_year: Academic year string
+    
+    Returns:
+        tuple: (header names, list of row tuples)
+    """
+    if not academic_year:
+        academic_year = get_current_academic_year()
+    
+    table = TeacherLeaveBalance.__table__
+    stmt = select(
+        Teacher.employee_id,
+        Teacher.first_name,
+        Teacher.last_name,
+        *(table.c[field] for field in BALANCE_EXPORT_FIELDS)
+    ).join(
+        Teacher, Teacher.id == table.c.teacher_id
+    ).where(
+        table.c.tenant_id == tenant_id,
+        table.c.academic_year == academic_year
+    ).order_by(Teacher.first_name, Teacher.last_name)
+    
+    header = ('employee_id', 'first_name', 'last_name') + BALANCE_EXPORT_FIELDS
+    return header, session.execute(stmt).all()
+
+
+def summarize_leave_applications(session, tenant_id, academic_year=None):
+    """
+    Count and total days of teacher leave applications per status and leave type,
+    aggregated in the database (an index-only scan of idx_dash_cover)
+    
+    Args:
+        session: Database session
+        tenant_id: School tenant ID
+        academic_year: Academic year string; None summarizes all years
+    
+    Returns:
+        dict: {status value: {leave type value: (count, total_days)}}
+    """
+    stmt = select(
+        TeacherLeaveApplication.status,
+        TeacherLeaveApplication.leave_type,
+        func.count(),
+        func.sum(TeacherLeaveApplication.total_days)
+    ).where(
+        TeacherLeaveApplication.tenant_id == tenant_id
+    ).group_by(
+        TeacherLeaveApplication.status,
+        TeacherLeaveApplication.leave_type
+    )
+    if academic_year:
+        stmt = stmt.where(TeacherLeaveApplication.academic_year == academic_year)
+    
+    summary = {}
+    for status, leave_type, count, total_days in session.execute(stmt):
+        summary.setdefault(status.value, {})[leave_type.value] = (count, float(total_days or 0))
+    return summary
+
+
 def calculate_leave_days(start_date, end_date, is_half_day=False, count_weekends=False):
     """
     Calculate number of leave days between start and end date
@@ -321,20 +527,19 @@ def calculate_leave_days(start_date, end_date, is_half_day=False, count_weekends
     if is_half_day:
         return 0.5
     
+    if start_date == end_date:
+        # Single-day leave, the most common case
+        return 1.0 if count_weekends or start_date.weekday() < 5 else 0.0
+    
     if start_date > end_date:
         raise ValueError("Start date cannot be after end date")
     
     days = (end_date - start_date).days + 1
     
     if not count_weekends:
-        # Count only weekdays
-        total_days = 0
-        current = start_date
-        while current <= end_date:
-            if current.weekday() < 5:  # Monday = 0, Friday = 4
-                total_days += 1
-            current += relativedelta(days=1)
-        return float(total_days)
+        # Count only weekdays: 5 per full week plus those in the partial week
+        full_weeks, remainder = divmod(days, 7)
+        return float(full_weeks * 5 + WEEKDAYS_IN_PARTIAL_WEEK[start_date.weekday()][remainder])
     
     return float(days)
 
@@ -374,7 +579,36 @@ def validate_leave_dates(start_date, end_date, is_half_day=False, min_advance_da
     return (True, None)
 
 
-def check_balance_availability(session, teacher_id, leave_type, total_days, academic_year=None):
+def prepare_leave_range(start_date, end_date, is_half_day=False, min_advance_days=1,
+                        count_weekends=False, max_continuous_days=None):
+    """
+    Validate leave dates and count the leave days in one call
+    
+    Args:
+        start_date: Start date
+        end_date: End date
+        is_half_day: Whether it's half-day
+        min_advance_days: Minimum advance notice required
+        count_weekends: Whether to count weekends
+        max_continuous_days: Maximum days per application (None for no limit)
+    
+    Returns:
+        tuple: (is_valid, error_message, total_days); total_days is None when invalid
+    """
+    is_valid, error_msg = validate_leave_dates(start_date, end_date, is_half_day, min_advance_days)
+    if not is_valid:
+        # Invalid ranges are rejected before any day counting
+        return (False, error_msg, None)
+    
+    total_days = calculate_leave_days(start_date, end_date, is_half_day, count_weekends)
+    
+    if max_continuous_days is not None and total_days > max_continuous_days:
+        return (False, f"Maximum {max_continuous_days} continuous days allowed", None)
+    
+    return (True, None, total_days)
+
+
+def check_balance_availability(session, teacher_id, leave_type, total_days, academic_year=None, balance=None):
     """
     Check if teacher has sufficient balance for leave type
     
@@ -384,12 +618,11 @@ def check_balance_availability(session, teacher_id, leave_type, total_days, acad
         leave_type: Leave type string (CL, SL, EL, etc.)
         total_days: Number of days requested
         academic_year: Academic year
+        balance: Already loaded TeacherLeaveBalance, to skip the lookup
     
     Returns:
         tuple: (has_balance, available_balance, message)
     """
-    from leave_models import TeacherLeaveBalance
-    
     if not academic_year:
         academic_year = get_current_academic_year()
     
@@ -397,25 +630,15 @@ def check_balance_availability(session, teacher_id, leave_type, total_days, acad
     if leave_type in ['LOP', 'Duty Leave']:
         return (True, None, "No quota limit for this leave type")
     
-    balance = session.query(TeacherLeaveBalance).filter_by(
-        teacher_id=teacher_id,
-        academic_year=academic_year
-    ).first()
+    if balance is None:
+        balance = _fetch_balance(session, teacher_id, academic_year)
     
     if not balance:
         return (False, 0, "Leave balance not initialized. Contact admin.")
     
-    # Check balance based on leave type
-    balance_map = {
-        'CL': balance.cl_balance,
-        'SL': balance.sl_balance,
-        'EL': balance.el_balance,
-        'Half-day': balance.cl_balance,  # Half-day uses CL balance
-        'Maternity': balance.maternity_balance,
-        'Paternity': balance.paternity_balance
-    }
-    
-    available = balance_map.get(leave_type, 0)
+    # Check balance based on leave type (<prefix>_balance generated column)
+    prefix = LEAVE_TYPE_PREFIX.get(leave_type)
+    available = getattr(balance, f'{prefix}_balance') if prefix else 0
     
     if available < total_days:
         return (False, available, f"Insufficient balance. Available: {available} days")
@@ -437,7 +660,6 @@ def apply_leave(session, teacher_id, tenant_id, leave_data, academic_year=None):
     Returns:
         tuple: (success, leave_application_or_error_message)
     """
-    from leave_models import TeacherLeaveApplication, LeaveTypeEnum, HalfDayPeriodEnum
     
     if not academic_year:
         academic_year = get_current_academic_year()
@@ -456,30 +678,31 @@ def apply_leave(session, teacher_id, tenant_id, leave_data, academic_year=None):
         leave_type = leave_data['leave_type']
         
         # Get quota settings for validation
-        quota_settings = get_or_create_quota_settings(session, tenant_id, academic_year)
+        quota_settings = get_quota_policy(session, tenant_id, academic_year)
         
-        # Validate dates
-        is_valid, error_msg = validate_leave_dates(
-            start_date, end_date, is_half_day, quota_settings.min_advance_days
+        # Validate dates and calculate total days
+        is_valid, error_msg, total_days = prepare_leave_range(
+            start_date, end_date, is_half_day,
+            quota_settings['min_advance_days'],
+            quota_settings['weekend_counted'],
+            quota_settings['max_continuous_days']
         )
         if not is_valid:
             return (False, error_msg)
         
-        # Calculate total days
-        total_days = calculate_leave_days(
-            start_date, end_date, is_half_day, quota_settings.weekend_counted
-        )
-        
-        # Check max continuous days
-        if total_days > quota_settings.max_continuous_days:
-            return (False, f"Maximum {quota_settings.max_continuous_days} continuous days allowed")
-        
-        # Check balance availability (except for LOP and Duty Leave)
-        has_balance, available, balance_msg = check_balance_availability(
-            session, teacher_id, leave_type, total_days, academic_year
-        )
-        if not has_balance:
-            return (False, balance_msg)
+        # LOP and Duty Leave have no quota: their balance is neither checked
+        # nor reserved, so it is not read at all
+        balance = None
+        if leave_type not in UNLIMITED_LEAVE_TAKEN_FIELD:
+            # Loaded once for both the availability check and the pending update
+            balance = _fetch_balance(session, teacher_id, academic_year, for_update=True)
+            
+            # Check balance availability
+            has_balance, available, balance_msg = check_balance_availability(
+                session, teacher_id, leave_type, total_days, academic_year, balance=balance
+            )
+            if not has_balance:
+                return (False, balance_msg)
         
         # Create leave application
         half_day_period = None
@@ -505,41 +728,18 @@ def apply_leave(session, teacher_id, tenant_id, leave_data, academic_year=None):
         session.add(leave_app)
         
         # Update pending balance
-        from leave_models import TeacherLeaveBalance
-        balance = session.query(TeacherLeaveBalance).filter_by(
-            teacher_id=teacher_id,
-            academic_year=academic_year
-        ).first()
-        
-        if balance and leave_type not in ['LOP', 'Duty Leave']:
-            # Convert to Decimal before updating DECIMAL columns to avoid Decimal+float errors
-            td = Decimal(str(total_days))
-            if leave_type == 'CL' or leave_type == 'Half-day':
-                current = balance.cl_pending if balance.cl_pending is not None else Decimal('0')
-                balance.cl_pending = current + td
-            elif leave_type == 'SL':
-                current = balance.sl_pending if balance.sl_pending is not None else Decimal('0')
-                balance.sl_pending = current + td
-            elif leave_type == 'EL':
-                current = balance.el_pending if balance.el_pending is not None else Decimal('0')
-                balance.el_pending = current + td
-            elif leave_type == 'Maternity':
-                current = balance.maternity_pending if balance.maternity_pending is not None else Decimal('0')
-                balance.maternity_pending = current + td
-            elif leave_type == 'Paternity':
-                current = balance.paternity_pending if balance.paternity_pending is not None else Decimal('0')
-                balance.paternity_pending = current + td
+        prefix = LEAVE_TYPE_PREFIX.get(leave_type)
+        if balance and prefix:
+            _add_to_balance(balance, f'{prefix}_pending', total_days)
         
         session.commit()
-        logger.info(f"Leave applied successfully: teacher_id={teacher_id}, type={leave_type}, days={total_days}")
+        logger.info("Leave applied successfully: teacher_id=%s, type=%s, days=%s", teacher_id, leave_type, total_days)
         
         return (True, leave_app)
     
     except Exception as e:
         session.rollback()
-        logger.error(f"Error applying leave: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error applying leave: %s", e)
         return (False, f"Error applying leave: {str(e)}")
 
 
@@ -555,7 +755,6 @@ def cancel_leave_application(session, leave_id, teacher_id):
     Returns:
         tuple: (success, message)
     """
-    from leave_models import TeacherLeaveApplication, LeaveStatusEnum, TeacherLeaveBalance
     
     leave_app = session.query(TeacherLeaveApplication).filter_by(
         id=leave_id,
@@ -575,42 +774,71 @@ def cancel_leave_application(session, leave_id, teacher_id):
         
         # Restore pending balance
         leave_type = leave_app.leave_type.value
-        # Use Decimal for arithmetic with DECIMAL columns
-        total_days = Decimal(str(float(leave_app.total_days)))
+        total_days = leave_app.total_days
 
         if leave_type not in ['LOP', 'Duty Leave']:
-            balance = session.query(TeacherLeaveBalance).filter_by(
-                teacher_id=teacher_id,
-                academic_year=leave_app.academic_year
-            ).first()
-
-            if balance:
-                if leave_type == 'CL' or leave_type == 'Half-day':
-                    current = balance.cl_pending if balance.cl_pending is not None else Decimal('0')
-                    balance.cl_pending = current - total_days
-                elif leave_type == 'SL':
-                    current = balance.sl_pending if balance.sl_pending is not None else Decimal('0')
-                    balance.sl_pending = current - total_days
-                elif leave_type == 'EL':
-                    current = balance.el_pending if balance.el_pending is not None else Decimal('0')
-                    balance.el_pending = current - total_days
-                elif leave_type == 'Maternity':
-                    current = balance.maternity_pending if balance.maternity_pending is not None else Decimal('0')
-                    balance.maternity_pending = current - total_days
-                elif leave_type == 'Paternity':
-                    current = balance.paternity_pending if balance.paternity_pending is not None else Decimal('0')
-                    balance.paternity_pending = current - total_days
+            balance = _fetch_balance(session, teacher_id, leave_app.academic_year, for_update=True)
+
+            prefix = LEAVE_TYPE_PREFIX.get(leave_type)
+            if balance and prefix:
+                _add_to_balance(balance, f'{prefix}_pending', -total_days)
         
         session.commit()
-        logger.info(f"Leave cancelled: leave_id={leave_id}")
+        logger.info("Leave cancelled: leave_id=%s", leave_id)
         return (True, "Leave application cancelled successfully")
     
     except Exception as e:
         session.rollback()
-        logger.error(f"Error cancelling leave: {e}")
+        logger.error("Error cancelling leave: %s", e)
         return (False, f"Error cancelling leave: {str(e)}")
 
 
+def _close_pending_leave(session, leave_id, status, **values):
+    """
+    Move a pending leave application to status with one conditional UPDATE,
+    so concurrent approve/reject calls cannot both change the balance
+    
+    Returns:
+        tuple: (leave application row, error_message)
+    """
+    
+    # Only the columns the balance update needs, no ORM object
+    leave_app = session.query(
+        TeacherLeaveApplication.status,
+        TeacherLeaveApplication.teacher_id,
+        TeacherLeaveApplication.leave_type,
+        TeacherLeaveApplication.total_days,
+        TeacherLeaveApplication.academic_year
+    ).filter_by(id=leave_id).first()
+    
+    if not leave_app:
+        return (None, "Leave application not found")
+    
+    if leave_app.status != LeaveStatusEnum.PENDING:
+        return (None, f"Leave is already {leave_app.status.value}")
+    
+    now = datetime.utcnow()
+    result = session.execute(
+        update(TeacherLeaveApplication)
+        .where(
+            TeacherLeaveApplication.id == leave_id,
+            TeacherLeaveApplication.status == LeaveStatusEnum.PENDING
+        )
+        .values(status=status, approved_date=now, updated_at=now, **values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        return (None, "Leave application was already processed")
+    
+    # The UPDATE bypasses the unit of work: expire a copy of the application
+    # loaded in this session, so it reloads the new status
+    loaded = session.identity_map.get(session.identity_key(TeacherLeaveApplication, leave_id))
+    if loaded is not None:
+        session.expire(loaded)
+    
+    return (leave_app, None)
+
+
 def approve_leave_application(session, leave_id, admin_user_id, admin_notes=None):
     """
     Approve a leave application
@@ -624,74 +852,39 @@ def approve_leave_application(session, leave_id, admin_user_id, admin_notes=None
     Returns:
         tuple: (success, message)
     """
-    from leave_models import TeacherLeaveApplication, LeaveStatusEnum, TeacherLeaveBalance
-    
-    leave_app = session.query(TeacherLeaveApplication).get(leave_id)
-    
-    if not leave_app:
-        return (False, "Leave application not found")
-    
-    if leave_app.status != LeaveStatusEnum.PENDING:
-        return (False, f"Leave is already {leave_app.status.value}")
     
     try:
         # Update application status
-        leave_app.status = LeaveStatusEnum.APPROVED
-        leave_app.approved_by = admin_user_id
-        leave_app.approved_date = datetime.utcnow()
-        leave_app.admin_notes = admin_notes
-        leave_app.updated_at = datetime.utcnow()
+        leave_app, error_msg = _close_pending_leave(
+            session, leave_id, LeaveStatusEnum.APPROVED,
+            approved_by=admin_user_id,
+            admin_notes=admin_notes
+        )
+        if error_msg:
+            session.rollback()
+            return (False, error_msg)
         
         # Update balance: move from pending to taken
         leave_type = leave_app.leave_type.value
-        # Use Decimal for arithmetic with DECIMAL columns
-        total_days = Decimal(str(float(leave_app.total_days)))
+        total_days = leave_app.total_days
 
-        balance = session.query(TeacherLeaveBalance).filter_by(
-            teacher_id=leave_app.teacher_id,
-            academic_year=leave_app.academic_year
-        ).first()
+        balance = _fetch_balance(session, leave_app.teacher_id, leave_app.academic_year, for_update=True)
 
         if balance:
-            if leave_type == 'CL' or leave_type == 'Half-day':
-                current_pending = balance.cl_pending if balance.cl_pending is not None else Decimal('0')
-                current_taken = balance.cl_taken if balance.cl_taken is not None else Decimal('0')
-                balance.cl_pending = current_pending - total_days
-                balance.cl_taken = current_taken + total_days
-            elif leave_type == 'SL':
-                current_pending = balance.sl_pending if balance.sl_pending is not None else Decimal('0')
-                current_taken = balance.sl_taken if balance.sl_taken is not None else Decimal('0')
-                balance.sl_pending = current_pending - total_days
-                balance.sl_taken = current_taken + total_days
-            elif leave_type == 'EL':
-                current_pending = balance.el_pending if balance.el_pending is not None else Decimal('0')
-                current_taken = balance.el_taken if balance.el_taken is not None else Decimal('0')
-                balance.el_pending = current_pending - total_days
-                balance.el_taken = current_taken + total_days
-            elif leave_type == 'Maternity':
-                current_pending = balance.maternity_pending if balance.maternity_pending is not None else Decimal('0')
-                current_taken = balance.maternity_taken if balance.maternity_taken is not None else Decimal('0')
-                balance.maternity_pending = current_pending - total_days
-                balance.maternity_taken = current_taken + total_days
-            elif leave_type == 'Paternity':
-                current_pending = balance.paternity_pending if balance.paternity_pending is not None else Decimal('0')
-                current_taken = balance.paternity_taken if balance.paternity_taken is not None else Decimal('0')
-                balance.paternity_pending = current_pending - total_days
-                balance.paternity_taken = current_taken + total_days
-            elif leave_type == 'LOP':
-                current = balance.lop_taken if balance.lop_taken is not None else Decimal('0')
-                balance.lop_taken = current + total_days
-            elif leave_type == 'Duty Leave':
-                current = balance.duty_leave_taken if balance.duty_leave_taken is not None else Decimal('0')
-                balance.duty_leave_taken = current + total_days
+            prefix = LEAVE_TYPE_PREFIX.get(leave_type)
+            if prefix:
+                _add_to_balance(balance, f'{prefix}_pending', -total_days)
+                _add_to_balance(balance, f'{prefix}_taken', total_days)
+            elif leave_type in UNLIMITED_LEAVE_TAKEN_FIELD:
+                _add_to_balance(balance, UNLIMITED_LEAVE_TAKEN_FIELD[leave_type], total_days)
         
         session.commit()
-        logger.info(f"Leave approved: leave_id={leave_id} by admin={admin_user_id}")
+        logger.info("Leave approved: leave_id=%s by admin=%s", leave_id, admin_user_id)
         return (True, "Leave approved successfully")
     
     except Exception as e:
         session.rollback()
-        logger.error(f"Error approving leave: {e}")
+        logger.error("Error approving leave: %s", e)
         return (False, f"Error approving leave: {str(e)}")
 
 
@@ -708,57 +901,34 @@ def reject_leave_application(session, leave_id, admin_user_id, rejection_reason)
     Returns:
         tuple: (success, message)
     """
-    from leave_models import TeacherLeaveApplication, LeaveStatusEnum, TeacherLeaveBalance
-    
-    leave_app = session.query(TeacherLeaveApplication).get(leave_id)
-    
-    if not leave_app:
-        return (False, "Leave application not found")
-    
-    if leave_app.status != LeaveStatusEnum.PENDING:
-        return (False, f"Leave is already {leave_app.status.value}")
     
     try:
         # Update application status
-        leave_app.status = LeaveStatusEnum.REJECTED
-        leave_app.approved_by = admin_user_id
-        leave_app.approved_date = datetime.utcnow()
-        leave_app.rejection_reason = rejection_reason
-        leave_app.updated_at = datetime.utcnow()
+        leave_app, error_msg = _close_pending_leave(
+            session, leave_id, LeaveStatusEnum.REJECTED,
+            approved_by=admin_user_id,
+            rejection_reason=rejection_reason
+        )
+        if error_msg:
+            session.rollback()
+            return (False, error_msg)
         
         # Restore pending balance
         leave_type = leave_app.leave_type.value
-        # Use Decimal for arithmetic with DECIMAL columns
-        total_days = Decimal(str(float(leave_app.total_days)))
+        total_days = leave_app.total_days
 
         if leave_type not in ['LOP', 'Duty Leave']:
-            balance = session.query(TeacherLeaveBalance).filter_by(
-                teacher_id=leave_app.teacher_id,
-                academic_year=leave_app.academic_year
-            ).first()
-
-            if balance:
-                if leave_type == 'CL' or leave_type == 'Half-day':
-                    current = balance.cl_pending if balance.cl_pending is not None else Decimal('0')
-                    balance.cl_pending = current - total_days
-                elif leave_type == 'SL':
-                    current = balance.sl_pending if balance.sl_pending is not None else Decimal('0')
-                    balance.sl_pending = current - total_days
-                elif leave_type == 'EL':
-                    current = balance.el_pending if balance.el_pending is not None else Decimal('0')
-                    balance.el_pending = current - total_days
-                elif leave_type == 'Maternity':
-                    current = balance.maternity_pending if balance.maternity_pending is not None else Decimal('0')
-                    balance.maternity_pending = current - total_days
-                elif leave_type == 'Paternity':
-                    current = balance.paternity_pending if balance.paternity_pending is not None else Decimal('0')
-                    balance.paternity_pending = current - total_days
+            balance = _fetch_balance(session, leave_app.teacher_id, leave_app.academic_year, for_update=True)
+
+            prefix = LEAVE_TYPE_PREFIX.get(leave_type)
+            if balance and prefix:
+                _add_to_balance(balance, f'{prefix}_pending', -total_days)
         
         session.commit()
-        logger.info(f"Leave rejected: leave_id={leave_id} by admin={admin_user_id}")
+        logger.info("Leave rejected: leave_id=%s by admin=%s", leave_id, admin_user_id)
         return (True, "Leave rejected successfully")
     
     except Exception as e:
         session.rollback()
-        logger.error(f"Error rejecting leave: {e}")
+        logger.error("Error rejecting leave: %s", e)
         return (False, f"Error rejecting leave: {str(e)}")
@@ -3,12 +3,20 @@ Leave Management Models
 Models for leave quota settings and teacher leave balances
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, BigInteger, Index, UniqueConstraint, DECIMAL, Date, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, BigInteger, Index, UniqueConstraint, Numeric, Date, Enum, Computed
+from sqlalchemy import event, update, bindparam, type_coerce, inspect
 from sqlalchemy.orm import relationship
+from dataclasses import dataclass, asdict
 from datetime import datetime, date
 import enum
+import json
 from models import Base
 
+try:
+    import orjson
+except ImportError:  # Optional speed-up; fall back to the stdlib decoder
+    orjson = None
+
 
 class LeaveTypeEnum(enum.Enum):
     """Leave type enumeration"""
@@ -51,6 +59,30 @@ class HalfDayPeriodEnum(enum.Enum):
     FIRST_HALF = "First Half"
     SECOND_HALF = "Second Half"
 
+
+# Enum member -> stored value, looked up per row instead of reading .value
+_LEAVE_TYPE_VALUE = {member: member.value for member in LeaveTypeEnum}
+_LEAVE_STATUS_VALUE = {member: member.value for member in LeaveStatusEnum}
+_HALF_DAY_PERIOD_VALUE = {member: member.value for member in HalfDayPeriodEnum}
+
+# Unbound isoformat methods for the to_dict paths (Date and DateTime columns)
+_date_iso = date.isoformat
+_datetime_iso = datetime.isoformat
+
+
+def _maybe_iso(value):
+    """ISO string of a nullable DateTime value"""
+    return _datetime_iso(value) if value is not None else None
+
+
+# Bootstrap badge class per LeaveStatusEnum value
+_BADGE_BY_STATUS = {
+    'Pending': 'warning',
+    'Approved': 'success',
+    'Rejected': 'danger',
+    'Cancelled': 'secondary',
+}
+
 class LeaveQuotaSettings(Base):
     """School-level leave quota configuration per academic year"""
     __tablename__ = 'leave_quota_settings'
@@ -64,11 +96,11 @@ class LeaveQuotaSettings(Base):
     academic_year = Column(String(10), nullable=False)  # "2024-25"
     
     # Leave Quotas
-    cl_quota = Column(DECIMAL(4, 1), default=12.0, nullable=False)
-    sl_quota = Column(DECIMAL(4, 1), default=12.0, nullable=False)
-    el_quota = Column(DECIMAL(4, 1), default=15.0, nullable=False)
-    maternity_quota = Column(DECIMAL(4, 1), default=180.0, nullable=False)
-    paternity_quota = Column(DECIMAL(4, 1), default=15.0, nullable=False)
+    cl_quota = Column(Numeric(4, 1, asdecimal=False), default=12.0, nullable=False)
+    sl_quota = Column(Numeric(4, 1, asdecimal=False), default=12.0, nullable=False)
+    el_quota = Column(Numeric(4, 1, asdecimal=False), default=15.0, nullable=False)
+    maternity_quota = Column(Numeric(4, 1, asdecimal=False), default=180.0, nullable=False)
+    paternity_quota = Column(Numeric(4, 1, asdecimal=False), default=15.0, nullable=False)
     
     # Policy Settings
     allow_half_day = Column(Boolean, default=True)
@@ -95,11 +127,11 @@ class LeaveQuotaSettings(Base):
         return {
             'id': self.id,
             'academic_year': self.academic_year,
-            'cl_quota': float(self.cl_quota),
-            'sl_quota': float(self.sl_quota),
-            'el_quota': float(self.el_quota),
-            'maternity_quota': float(self.maternity_quota),
-            'paternity_quota': float(self.paternity_quota),
+            'cl_quota': self.cl_quota,
+            'sl_quota': self.sl_quota,
+            'el_quota': self.el_quota,
+            'maternity_quota': self.maternity_quota,
+            'paternity_quota': self.paternity_quota,
             'allow_half_day': self.allow_half_day,
             'allow_lop': self.allow_lop,
             'duty_leave_unlimited': self.duty_leave_unlimited,
@@ -110,14 +142,43 @@ class LeaveQuotaSettings(Base):
         }
 
 
+@dataclass(slots=True)
+class LeaveQuotaDTO:
+    """One leave type of a TeacherLeaveBalanceDTO"""
+    total: float
+    taken: float
+    pending: float
+    balance: float
+
+
+@dataclass(slots=True)
+class TeacherLeaveBalanceDTO:
+    """Slotted mirror of TeacherLeaveBalance.to_dict(); orjson serializes it directly"""
+    id: int
+    teacher_id: int
+    academic_year: str
+    cl: LeaveQuotaDTO
+    sl: LeaveQuotaDTO
+    el: LeaveQuotaDTO
+    maternity: LeaveQuotaDTO
+    paternity: LeaveQuotaDTO
+    lop_taken: float
+    duty_leave_taken: float
+
+
+def to_json_bytes(value):
+    """Encode a payload that may contain DTO dataclasses as JSON (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=asdict).encode()
+
+
 class TeacherLeaveBalance(Base):
     """Individual teacher leave balance per academic year"""
     __tablename__ = 'teacher_leave_balance'
     __table_args__ = (
         UniqueConstraint('teacher_id', 'academic_year', name='unique_teacher_year'),
         Index('idx_tenant_year', 'tenant_id', 'academic_year'),
-        Index('idx_teacher', 'teacher_id'),
-        Index('idx_balance_check', 'teacher_id', 'academic_year'),
     )
     
     id = Column(BigInteger, primary_key=True, autoincrement=True)
@@ -126,41 +187,41 @@ class TeacherLeaveBalance(Base):
     academic_year = Column(String(10), nullable=False)
     
     # CL - Casual Leave
-    cl_total = Column(DECIMAL(4, 1), default=12.0, nullable=False)
-    cl_taken = Column(DECIMAL(4, 1), default=0, nullable=False)
-    cl_pending = Column(DECIMAL(4, 1), default=0, nullable=False)
-    # cl_balance is computed column in database
+    cl_total = Column(Numeric(4, 1, asdecimal=False), default=12.0, nullable=False)
+    cl_taken = Column(Numeric(4, 1, asdecimal=False), default=0, nullable=False)
+    cl_pending = Column(Numeric(4, 1, asdecimal=False), default=0, nullable=False)
+    cl_balance = Column(Numeric(4, 1, asdecimal=False), Computed('cl_total - cl_taken - cl_pending', persisted=True))
     
     # SL - Sick Leave
-    sl_total = Column(DECIMAL(4, 1), default=12.0, nullable=False)
-    sl_taken = Column(DECIMAL(4, 1), default=0, nullable=False)
-    sl_pending = Column(DECIMAL(4, 1), default=0, nullable=False)
-    # sl_balance is computed column in database
+    sl_total = Column(Numeric(4, 1, asdecimal=False), default=12.0, nullable=False)
+    sl_taken = Column(Numeric(4, 1, asdecimal=False), default=0, nullable=False)
+    sl_pending = Column(Numeric(4, 1, asdecimal=False), default=0, nullable=False)
+    sl_balance = Column(Numeric(4, 1, asdecimal=False), Computed('sl_total - sl_taken - sl_pending', persisted=True))
     
     # EL - Earned Leave
-    el_total = Column(DECIMAL(4, 1), default=15.0, nullable=False)
-    el_taken = Column(DECIMAL(4, 1), default=0, nullable=False)
-    el_pending = Column(DECIMAL(4, 1), default=0, nullable=False)
-    # el_balance is computed column in database
+    el_total = Column(Numeric(4, 1, asdecimal=False), default=15.0, nullable=False)
+    el_taken = Column(Numeric(4, 1, asdecimal=False), default=0, nullable=False)
+    el_pending = Column(Numeric(4, 1, asdecimal=False), default=0, nullable=False)
+    el_balance = Column(Numeric(4, 1, asdecimal=False), Computed('el_total - el_taken - el_pending', persisted=True))
     
     # Maternity Leave
-    maternity_total = Column(DECIMAL(4, 1), default=180.0, nullable=False)
-    maternity_taken = Column(DECIMAL(4, 1), default=0, nullable=False)
-    maternity_pending = Column(DECIMAL(4, 1), default=0, nullable=False)
-    # maternity_balance is computed column in database
+    maternity_total = Column(Numeric(4, 1, asdecimal=False), default=180.0, nullable=False)
+    maternity_taken = Column(Numeric(4, 1, asdecimal=False), default=0, nullable=False)
+    maternity_pending = Column(Numeric(4, 1, asdecimal=False), default=0, nullable=False)
+    maternity_balance = Column(Numeric(4, 1, asdecimal=False), Computed('maternity_total - maternity_taken - maternity_pending', persisted=True))
     
     # Paternity Leave
-    paternity_total = Column(DECIMAL(4, 1), default=15.0, nullable=False)
-    paternity_taken = Column(DECIMAL(4, 1), default=0, nullable=False)
-    paternity_pending = Column(DECIMAL(4, 1), default=0, nullable=False)
-    # paternity_balance is computed column in database
+    paternity_total = Column(Numeric(4, 1, asdecimal=False), default=15.0, nullable=False)
+    paternity_taken = Column(Numeric(4, 1, asdecimal=False), default=0, nullable=False)
+    paternity_pending = Column(Numeric(4, 1, asdecimal=False), default=0, nullable=False)
+    paternity_balance = Column(Numeric(4, 1, asdecimal=False), Computed('paternity_total - paternity_taken - paternity_pending', persisted=True))
     
     # Other Leaves (no quota)
-    lop_taken = Column(DECIMAL(4, 1), default=0, nullable=False)
-    duty_leave_taken = Column(DECIMAL(4, 1), default=0, nullable=False)
+    lop_taken = Column(Numeric(4, 1, asdecimal=False), default=0, nullable=False)
+    duty_leave_taken = Column(Numeric(4, 1, asdecimal=False), default=0, nullable=False)
     
     # Carry Forward
-    el_carried_forward = Column(DECIMAL(4, 1), default=0, nullable=False)
+    el_carried_forward = Column(Numeric(4, 1, asdecimal=False), default=0, nullable=False)
     
     # Metadata
     notes = Column(Text, nullable=True)
@@ -175,30 +236,63 @@ class TeacherLeaveBalance(Base):
     def __repr__(self):
         return f"<TeacherLeaveBalance teacher_id={self.teacher_id} year={self.academic_year}>"
     
-    @property
-    def cl_balance(self):
-        """Calculate CL balance"""
-        return float(self.cl_total - self.cl_taken - self.cl_pending)
-    
-    @property
-    def sl_balance(self):
-        """Calculate SL balance"""
-        return float(self.sl_total - self.sl_taken - self.sl_pending)
-    
-    @property
-    def el_balance(self):
-        """Calculate EL balance"""
-        return float(self.el_total - self.el_taken - self.el_pending)
-    
-    @property
-    def maternity_balance(self):
-        """Calculate Maternity balance"""
-        return float(self.maternity_total - self.maternity_taken - self.maternity_pending)
-    
-    @property
-    def paternity_balance(self):
-        """Calculate Paternity balance"""
-        return float(self.paternity_total - self.paternity_taken - self.paternity_pending)
+    @classmethod
+    def apply_deltas(cls, session, deltas):
+        """
+        Add day deltas to balance columns with one executemany UPDATE per column,
+        bypassing the ORM unit of work. Pending changes are flushed first, and
+        balance objects of the updated rows already loaded in the session are
+        expired so they reload the new totals (and computed balances).
+        
+        Args:
+            session: Database session
+            deltas: Iterable of (teacher_id, academic_year, field, amount),
+                    e.g. (12, '2025-26', 'cl_pending', -2.0)
+        """
+        params_by_field = {}
+        updated_rows = set()
+        for teacher_id, academic_year, field, amount in deltas:
+            updated_rows.add((teacher_id, academic_year))
+            params_by_field.setdefault(field, []).append(
+                {'tid': teacher_id, 'yr': academic_year, 'amt': amount}
+            )
+        
+        if not updated_rows:
+            return
+        
+        session.flush()
+        table = cls.__table__
+        for field, params in params_by_field.items():
+            session.execute(
+                update(table).where(
+                    table.c.teacher_id == bindparam('tid'),
+                    table.c.academic_year == bindparam('yr')
+                ).values({field: table.c[field] + bindparam('amt')}),
+                params
+            )
+        
+        for obj in list(session.identity_map.values()):
+            if not isinstance(obj, cls):
+                continue
+            # Read the loaded key without triggering a refresh of expired objects
+            loaded = inspect(obj).dict
+            if (loaded.get('teacher_id'), loaded.get('academic_year')) in updated_rows:
+                session.expire(obj)
+    
+    def to_dto(self):
+        """Same data as to_dict(), as a TeacherLeaveBalanceDTO"""
+        return TeacherLeaveBalanceDTO(
+            self.id,
+            self.teacher_id,
+            self.academic_year,
+            LeaveQuotaDTO(self.cl_total, self.cl_taken, self.cl_pending, self.cl_balance),
+            LeaveQuotaDTO(self.sl_total, self.sl_taken, self.sl_pending, self.sl_balance),
+            LeaveQuotaDTO(self.el_total, self.el_taken, self.el_pending, self.el_balance),
+            LeaveQuotaDTO(self.maternity_total, self.maternity_taken, self.maternity_pending, self.maternity_balance),
+            LeaveQuotaDTO(self.paternity_total, self.paternity_taken, self.paternity_pending, self.paternity_balance),
+            self.lop_taken,
+            self.duty_leave_taken,
+        )
     
     def to_dict(self):
         """Convert to dictionary for JSON responses"""
@@ -207,37 +301,37 @@ class TeacherLeaveBalance(Base):
             'teacher_id': self.teacher_id,
             'academic_year': self.academic_year,
             'cl': {
-                'total': float(self.cl_total),
-                'taken': float(self.cl_taken),
-                'pending': float(self.cl_pending),
+                'total': self.cl_total,
+                'taken': self.cl_taken,
+                'pending': self.cl_pending,
                 'balance': self.cl_balance
             },
             'sl': {
-                'total': float(self.sl_total),
-                'taken': float(self.sl_taken),
-                'pending': float(self.sl_pending),
+                'total': self.sl_total,
+                'taken': self.sl_taken,
+                'pending': self.sl_pending,
                 'balance': self.sl_balance
             },
             'el': {
-                'total': float(self.el_total),
-                'taken': float(self.el_taken),
-                'pending': float(self.el_pending),
+                'total': self.el_total,
+                'taken': self.el_taken,
+                'pending': self.el_pending,
                 'balance': self.el_balance
             },
             'maternity': {
-                'total': float(self.maternity_total),
-                'taken': float(self.maternity_taken),
-                'pending': float(self.maternity_pending),
+                'total': self.maternity_total,
+                'taken': self.maternity_taken,
+                'pending': self.maternity_pending,
                 'balance': self.maternity_balance
             },
             'paternity': {
-                'total': float(self.paternity_total),
-                'taken': float(self.paternity_taken),
-                'pending': float(self.paternity_pending),
+                'total': self.paternity_total,
+                'taken': self.paternity_taken,
+                'pending': self.paternity_pending,
                 'balance': self.paternity_balance
             },
-            'lop_taken': float(self.lop_taken),
-            'duty_leave_taken': float(self.duty_leave_taken)
+            'lop_taken': self.lop_taken,
+            'duty_leave_taken': self.duty_leave_taken
         }
 
 
@@ -250,6 +344,8 @@ class TeacherLeaveApplication(Base):
         Index('idx_dates', 'start_date', 'end_date'),
         Index('idx_tenant_status', 'tenant_id', 'status', 'applied_date'),
         Index('idx_teacher_year', 'teacher_id', 'academic_year', 'status'),
+        # Covers summarize_leave_applications() without touching table rows
+        Index('idx_dash_cover', 'tenant_id', 'academic_year', 'status', 'teacher_id', 'leave_type', 'total_days'),
     )
     
     id = Column(BigInteger, primary_key=True, autoincrement=True)
@@ -262,7 +358,7 @@ class TeacherLeaveApplication(Base):
     end_date = Column(Date, nullable=False)
     is_half_day = Column(Boolean, default=False)
     half_day_period = Column(Enum(HalfDayPeriodEnum, values_callable=lambda obj: [e.value for e in obj]), nullable=True)
-    total_days = Column(DECIMAL(3, 1), nullable=False)
+    total_days = Column(Numeric(3, 1, asdecimal=False), nullable=False)
     
     # Request Information
     reason = Column(Text, nullable=False)
@@ -288,60 +384,131 @@ class TeacherLeaveApplication(Base):
     teacher = relationship("Teacher", backref="leave_applications")
     
     def __repr__(self):
-        return f"<TeacherLeaveApplication id={self.id} teacher_id={self.teacher_id} type={self.leave_type.value} status={self.status.value}>"
+        return f"<TeacherLeaveApplication id={self.id} teacher_id={self.teacher_id} type={_LEAVE_TYPE_VALUE.get(self.leave_type)} status={_LEAVE_STATUS_VALUE.get(self.status)}>"
+    
+    @staticmethod
+    def badge_class_for(status):
+        """Get Bootstrap badge class for a LeaveStatusEnum"""
+        return _BADGE_BY_STATUS.get(_LEAVE_STATUS_VALUE.get(status), 'secondary')
     
     @property
     def status_badge_class(self):
         """Get Bootstrap badge class for status"""
-        badge_map = {
-            LeaveStatusEnum.PENDING: 'warning',
-            LeaveStatusEnum.APPROVED: 'success',
-            LeaveStatusEnum.REJECTED: 'danger',
-            LeaveStatusEnum.CANCELLED: 'secondary'
-        }
-        return badge_map.get(self.status, 'secondary')
+        return self.badge_class_for(self.status)
     
     @property
     def leave_type_display(self):
         """Get display name for leave type"""
-        return self.leave_type.value
+        return _LEAVE_TYPE_VALUE[self.leave_type]
     
     @property
     def status_display(self):
         """Get display name for status"""
-        return self.status.value
+        return _LEAVE_STATUS_VALUE[self.status]
     
     @property
     def duration_display(self):
         """Get human-readable duration"""
         if self.is_half_day:
-            return f"0.5 day ({self.half_day_period.value if self.half_day_period else 'Half'})"
+            return f"0.5 day ({_HALF_DAY_PERIOD_VALUE.get(self.half_day_period, 'Half')})"
         elif self.total_days == 1:
             return "1 day"
         else:
-            return f"{float(self.total_days)} days"
+            return f"{self.total_days} days"
     
     def to_dict(self):
         """Convert to dictionary for JSON responses"""
         return {
             'id': self.id,
             'teacher_id': self.teacher_id,
-            'leave_type': self.leave_type.value,
-            'start_date': self.start_date.isoformat(),
-            'end_date': self.end_date.isoformat(),
+            'leave_type': _LEAVE_TYPE_VALUE[self.leave_type],
+            'start_date': _date_iso(self.start_date),
+            'end_date': _date_iso(self.end_date),
             'is_half_day': self.is_half_day,
-            'half_day_period': self.half_day_period.value if self.half_day_period else None,
-            'total_days': float(self.total_days),
+            'half_day_period': _HALF_DAY_PERIOD_VALUE.get(self.half_day_period),
+            'total_days': self.total_days,
             'reason': self.reason,
-            'status': self.status.value,
+            'status': _LEAVE_STATUS_VALUE[self.status],
             'status_badge': self.status_badge_class,
-            'applied_date': self.applied_date.isoformat() if self.applied_date else None,
-            'approved_date': self.approved_date.isoformat() if self.approved_date else None,
+            'applied_date': _maybe_iso(self.applied_date),
+            'approved_date': _maybe_iso(self.approved_date),
             'rejection_reason': self.rejection_reason,
             'academic_year': self.academic_year
         }
 
 
+# Columns read by application_rows_to_dicts(). The enum columns store their
+# values, so they are read as plain strings without Enum result processing.
+APPLICATION_DICT_COLUMNS = (
+    TeacherLeaveApplication.id,
+    TeacherLeaveApplication.teacher_id,
+    type_coerce(TeacherLeaveApplication.leave_type, String).label('leave_type'),
+    TeacherLeaveApplication.start_date,
+    TeacherLeaveApplication.end_date,
+    TeacherLeaveApplication.is_half_day,
+    type_coerce(TeacherLeaveApplication.half_day_period, String).label('half_day_period'),
+    TeacherLeaveApplication.total_days,
+    TeacherLeaveApplication.reason,
+    type_coerce(TeacherLeaveApplication.status, String).label('status'),
+    TeacherLeaveApplication.applied_date,
+    TeacherLeaveApplication.approved_date,
+    TeacherLeaveApplication.rejection_reason,
+    TeacherLeaveApplication.academic_year,
+)
+
+
+def application_rows_to_dicts(rows):
+    """
+    Same dicts as TeacherLeaveApplication.to_dict(), built from the rows of a
+    query over APPLICATION_DICT_COLUMNS without loading ORM instances
+    """
+    return [
+        {
+            'id': row.id,
+            'teacher_id': row.teacher_id,
+            'leave_type': row.leave_type,
+            'start_date': _date_iso(row.start_date),
+            'end_date': _date_iso(row.end_date),
+            'is_half_day': row.is_half_day,
+            'half_day_period': row.half_day_period,
+            'total_days': row.total_days,
+            'reason': row.reason,
+            'status': row.status,
+            'status_badge': _BADGE_BY_STATUS.get(row.status, 'secondary'),
+            'applied_date': _maybe_iso(row.applied_date),
+            'approved_date': _maybe_iso(row.approved_date),
+            'rejection_reason': row.rejection_reason,
+            'academic_year': row.academic_year
+        }
+        for row in rows
+    ]
+
+
+# Every column of teacher_leave_applications, for LeaveApplicationView rows
+LEAVE_VIEW_COLUMNS = tuple(TeacherLeaveApplication.__table__.columns)
+
+
+class LeaveApplicationView:
+    """
+    Read-only stand-in for TeacherLeaveApplication in long lists: the row's
+    column values plus teacher and attachments in slots, with the model's
+    display properties but no ORM instance state or __dict__
+    """
+    __slots__ = tuple(column.key for column in LEAVE_VIEW_COLUMNS) + ('teacher', 'attachments')
+    
+    badge_class_for = staticmethod(TeacherLeaveApplication.badge_class_for)
+    status_badge_class = TeacherLeaveApplication.status_badge_class
+    leave_type_display = TeacherLeaveApplication.leave_type_display
+    status_display = TeacherLeaveApplication.status_display
+    duration_display = TeacherLeaveApplication.duration_display
+    
+    def __init__(self, row, teacher=None, attachments=None):
+        for column in LEAVE_VIEW_COLUMNS:
+            setattr(self, column.key, getattr(row, column.key))
+        self.teacher = teacher
+        self.attachments = attachments if attachments is not None else []
+
+
 class StudentLeave(Base):
     """Student Leave Application Model"""
     __tablename__ = 'student_leaves'
@@ -355,6 +522,7 @@ class StudentLeave(Base):
     to_date = Column(Date, nullable=False)
     is_half_day = Column(Boolean, default=False)
     half_day_period = Column(String(20))
+    total_days = Column(Numeric(4, 1, asdecimal=False), nullable=False)  # Set on write, see student_leave_days()
     reason = Column(Text, nullable=False)
     status = Column(Enum(StudentLeaveStatusEnum), default=StudentLeaveStatusEnum.PENDING, nullable=False)
     supporting_documents = Column(Text)  # JSON string of file paths
@@ -375,26 +543,36 @@ class StudentLeave(Base):
     @property
     def documents(self):
         """Get documents as list"""
-        if self.supporting_documents:
-            import json
-            try:
-                return json.loads(self.supporting_documents)
-            except:
-                return []
-        return []
+        data = self.supporting_documents
+        if not data:
+            return []
+        try:
+            return orjson.loads(data) if orjson is not None else json.loads(data)
+        except ValueError:  # orjson.JSONDecodeError subclasses it too
+            return []
     
     def set_documents(self, doc_paths):
         """Set documents from list"""
-        import json
-        self.supporting_documents = json.dumps(doc_paths) if doc_paths else None
-    
-    @property
-    def total_days(self):
-        """Calculate total days of leave"""
-        if self.is_half_day:
-            return 0.5
-        delta = self.to_date - self.from_date
-        return delta.days + 1
+        if not doc_paths:
+            self.supporting_documents = None
+        elif orjson is not None:
+            self.supporting_documents = orjson.dumps(doc_paths).decode()
+        else:
+            self.supporting_documents = json.dumps(doc_paths)
     
     def __repr__(self):
         return f"<StudentLeave {self.id} - {self.student_id} - {self.status.value}>"
+
+
+def student_leave_days(from_date, to_date, is_half_day):
+    """Total days of a student leave: 0.5 for half-day, else the inclusive date range"""
+    if is_half_day:
+        return 0.5
+    return float((to_date - from_date).days + 1)
+
+
+@event.listens_for(StudentLeave, 'before_insert')
+@event.listens_for(StudentLeave, 'before_update')
+def _set_student_leave_total_days(mapper, connection, target):
+    """Keep the stored total_days in step with the dates on every write"""
+    target.total_days = student_leave_days(target.from_date, target.to_date, target.is_half_day)
@@ -3,16 +3,33 @@ Library Management Helper Functions
 Business logic for library operations
 """
 
+from collections import namedtuple
 from datetime import datetime, date, timedelta
-from sqlalchemy import func, and_, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import func, and_, or_, select, insert, update, case, literal, lambda_stmt
+from sqlalchemy.dialects.mysql import insert as mysql_insert, match as mysql_match
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, selectinload
 from library_models import (
-    LibraryBook, LibraryCategory, LibraryIssue, LibrarySettings,
-    BookStatusEnum, IssueStatusEnum, BookConditionEnum
+    LibraryBook, LibraryCategory, LibraryIssue, LibrarySettings, LibraryIssueSequence,
+    BookStatusEnum, IssueStatusEnum, BookConditionEnum, DaysBetween
 )
 from models import Student
 from decimal import Decimal
 import re
+import time
+
+from query_profiling import query_budget
+
+
+def get_tenant_scoped(session: Session, model, pk: int, tenant_id: int):
+    """
+    Load a row by primary key, or None if it belongs to another tenant
+    session.get answers from the identity map when the row is already loaded
+    """
+    obj = session.get(model, pk)
+    if obj is None or obj.tenant_id != tenant_id:
+        return None
+    return obj
 
 
 # ===== ISSUE NUMBER GENERATION =====
@@ -21,29 +38,70 @@ def generate_issue_number(session: Session, tenant_id: int) -> str:
     """
     Generate unique issue number in format: ISS-YYYYMM-XXXXX
     Example: ISS-202511-00001
+    
+    Numbers come from the tenant's LibraryIssueSequence row for the month, taken
+    with one atomic upsert; the row stays locked until the caller commits, so
+    concurrent issues cannot share one.
     """
     now = datetime.now()
-    prefix = f"ISS-{now.strftime('%Y%m')}"
+    period = now.strftime('%Y%m')
+    prefix = f"ISS-{period}"
     
-    # Get last issue number for current month
-    last_issue = session.query(LibraryIssue).filter(
-        LibraryIssue.tenant_id == tenant_id,
-        LibraryIssue.issue_number.like(f"{prefix}-%")
-    ).order_by(LibraryIssue.issue_number.desc()).first()
-    
-    if last_issue:
-        # Extract sequence number and increment
-        match = re.search(r'-(\d+)$', last_issue.issue_number)
-        if match:
-            sequence = int(match.group(1)) + 1
-        else:
-            sequence = 1
-    else:
-        sequence = 1
+    # Used only if this is the first issue of the month: start after any number
+    # already issued (issues made before the counter existed)
+    first_sequence = _last_issue_sequence(session, tenant_id, prefix) + 1
+    sequence = _next_issue_sequence(session, tenant_id, period, first_sequence)
     
     return f"{prefix}-{sequence:05d}"
 
 
+def _next_issue_sequence(session: Session, tenant_id: int, period: str, first_sequence: int) -> int:
+    """
+    Allocate the month's next sequence in a single INSERT ... ON DUPLICATE KEY
+    UPDATE (ON CONFLICT on other dialects). A SELECT ... FOR UPDATE on a missing
+    row takes an InnoDB gap lock, so two first-of-month issues would deadlock.
+    next_val holds the next number to hand out.
+    """
+    if session.get_bind().dialect.name == 'mysql':
+        stmt = mysql_insert(LibraryIssueSequence).values(
+            tenant_id=tenant_id, period=period, next_val=first_sequence + 1
+        )
+        # LAST_INSERT_ID(expr) makes the new value the statement's insert id
+        result = session.execute(stmt.on_duplicate_key_update(
+            next_val=func.last_insert_id(LibraryIssueSequence.next_val + 1)
+        ))
+        # Affected rows: 1 for a fresh insert, 2 for an update of the counter
+        if result.rowcount == 1:
+            return first_sequence
+        return session.scalar(select(func.last_insert_id())) - 1
+    
+    stmt = sqlite_insert(LibraryIssueSequence).values(
+        tenant_id=tenant_id, period=period, next_val=first_sequence + 1
+    )
+    next_val = session.scalar(stmt.on_conflict_do_update(
+        index_elements=['tenant_id', 'period'],
+        set_={'next_val': LibraryIssueSequence.next_val + 1}
+    ).returning(LibraryIssueSequence.next_val))
+    return next_val - 1
+
+
+def _last_issue_sequence(session: Session, tenant_id: int, prefix: str) -> int:
+    """Highest sequence among existing issue numbers starting with prefix (0 if none)"""
+    last_issue_number = session.scalar(
+        select(LibraryIssue.issue_number).where(
+            LibraryIssue.tenant_id == tenant_id,
+            LibraryIssue.issue_number.like(f"{prefix}-%")
+        ).order_by(LibraryIssue.issue_number.desc()).limit(1)
+    )
+    
+    if last_issue_number:
+        # Extract sequence number
+        match = re.search(r'-(\d+)$', last_issue_number)
+        if match:
+            return int(match.group(1))
+    return 0
+
+
 # ===== LIBRARY SETTINGS =====
 
 def get_library_settings(session: Session, tenant_id: int) -> LibrarySettings:
@@ -65,6 +123,36 @@ def get_library_settings(session: Session, tenant_id: int) -> LibrarySettings:
     return settings
 
 
+# Read-only copy of the LibrarySettings fields the issue/return rules use
+LibrarySettingsSnapshot = namedtuple('LibrarySettingsSnapshot', [
+    'max_books_per_student', 'issue_duration_days',
+    'fine_per_day', 'max_fine_amount', 'grace_period_days'
+])
+
+# Settings snapshots per tenant_id: (snapshot, expires_at). Settings change
+# rarely; entries expire after SETTINGS_CACHE_TTL seconds and are dropped by
+# invalidate_library_settings() when an admin saves them.
+SETTINGS_CACHE_TTL = 60
+_SETTINGS_CACHE = {}
+
+
+def get_library_policy(session: Session, tenant_id: int) -> LibrarySettingsSnapshot:
+    """Get the tenant's library settings as a snapshot, cached in-process"""
+    cached = _SETTINGS_CACHE.get(tenant_id)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    
+    settings = get_library_settings(session, tenant_id)
+    snapshot = LibrarySettingsSnapshot(*(getattr(settings, field) for field in LibrarySettingsSnapshot._fields))
+    _SETTINGS_CACHE[tenant_id] = (snapshot, time.monotonic() + SETTINGS_CACHE_TTL)
+    return snapshot
+
+
+def invalidate_library_settings(tenant_id: int):
+    """Drop the cached settings snapshot after the settings changed"""
+    _SETTINGS_CACHE.pop(tenant_id, None)
+
+
 # ===== BOOK MANAGEMENT =====
 
 def add_book(session: Session, tenant_id: int, book_data: dict) -> LibraryBook:
@@ -80,58 +168,71 @@ def add_book(session: Session, tenant_id: int, book_data: dict) -> LibraryBook:
     
     session.add(book)
     session.commit()
-    session.refresh(book)
     
     return book
 
 
+# Rows per IN lookup / INSERT in bulk_add_books; PyMySQL folds each executemany
+# batch into one multi-row INSERT, so this bounds statement size, not round trips
+BULK_INSERT_BATCH_SIZE = 1000
+
+
 def bulk_add_books(session: Session, tenant_id: int, books_data: list) -> dict:
     """
     Bulk add books to library
     Returns: {'success': count, 'failed': count, 'errors': []}
     """
-    success_count = 0
     failed_count = 0
     errors = []
     
+    # Accession numbers already in the catalogue, fetched one batch per query
+    accession_numbers = list({book_data.get('accession_number') for book_data in books_data})
+    existing = set()
+    for start in range(0, len(accession_numbers), BULK_INSERT_BATCH_SIZE):
+        existing.update(session.scalars(
+            select(LibraryBook.accession_number).where(
+                LibraryBook.tenant_id == tenant_id,
+                LibraryBook.accession_number.in_(accession_numbers[start:start + BULK_INSERT_BATCH_SIZE])
+            )
+        ))
+    
+    rows = []
     for idx, book_data in enumerate(books_data):
-        try:
-            # Check for duplicate accession number
-            existing = session.query(LibraryBook).filter_by(
-                tenant_id=tenant_id,
-                accession_number=book_data.get('accession_number')
-            ).first()
-            
-            if existing:
-                errors.append(f"Row {idx + 1}: Accession number '{book_data.get('accession_number')}' already exists")
-                failed_count += 1
-                continue
-            
-            book = LibraryBook(tenant_id=tenant_id, **book_data)
-            
-            # Set available copies
-            if book.total_copies and not book.available_copies:
-                book.available_copies = book.total_copies
-            
-            session.add(book)
-            success_count += 1
-            
-        except Exception as e:
-            errors.append(f"Row {idx + 1}: {str(e)}")
+        accession_number = book_data.get('accession_number')
+        
+        # Check for duplicate accession number (in the library or earlier in this upload)
+        if accession_number in existing:
+            errors.append(f"Row {idx + 1}: Accession number '{accession_number}' already exists")
             failed_count += 1
+            continue
+        existing.add(accession_number)
+        
+        row = dict(book_data, tenant_id=tenant_id)
+        
+        # Set available copies
+        if row.get('total_copies') and not row.get('available_copies'):
+            row['available_copies'] = row['total_copies']
+        
+        rows.append(row)
     
+    if not rows:
+        return {'success': 0, 'failed': failed_count, 'errors': errors}
+    
+    # Multi-row INSERTs of BULK_INSERT_BATCH_SIZE books, committed together
     try:
+        for start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+            session.execute(insert(LibraryBook), rows[start:start + BULK_INSERT_BATCH_SIZE])
         session.commit()
     except Exception as e:
         session.rollback()
         return {'success': 0, 'failed': len(books_data), 'errors': [f"Database error: {str(e)}"]}
     
-    return {'success': success_count, 'failed': failed_count, 'errors': errors}
+    return {'success': len(rows), 'failed': failed_count, 'errors': errors}
 
 
 def update_book(session: Session, book_id: int, tenant_id: int, update_data: dict) -> LibraryBook:
     """Update book details"""
-    book = session.query(LibraryBook).filter_by(id=book_id, tenant_id=tenant_id).first()
+    book = get_tenant_scoped(session, LibraryBook, book_id, tenant_id)
     
     if not book:
         raise ValueError("Book not found")
@@ -141,14 +242,13 @@ def update_book(session: Session, book_id: int, tenant_id: int, update_data: dic
             setattr(book, key, value)
     
     session.commit()
-    session.refresh(book)
     
     return book
 
 
 def delete_book(session: Session, book_id: int, tenant_id: int) -> bool:
     """Delete book (only if not issued)"""
-    book = session.query(LibraryBook).filter_by(id=book_id, tenant_id=tenant_id).first()
+    book = get_tenant_scoped(session, LibraryBook, book_id, tenant_id)
     
     if not book:
         raise ValueError("Book not found")
@@ -168,93 +268,144 @@ def delete_book(session: Session, book_id: int, tenant_id: int) -> bool:
     return True
 
 
-def get_book_details(session: Session, book_id: int, tenant_id: int) -> dict:
-    """Get comprehensive book details with issue history"""
-    book = session.query(LibraryBook).filter_by(id=book_id, tenant_id=tenant_id).first()
+@query_budget(4)
+def get_book_details(session: Session, book_id: int, tenant_id: int, history_limit: int = 100,
+                     before: tuple = None) -> dict:
+    """
+    Get comprehensive book details with issue history
+    Stats cover every issue; the history list holds the latest history_limit issues
+    (None for all), newest first by (issue_date, id). To page back, pass the
+    (issue_date, id) of the last issue shown as before; 'next_before' holds that
+    key when the page is full, None otherwise
+    """
+    book = get_tenant_scoped(session, LibraryBook, book_id, tenant_id)
     
     if not book:
         return None
     
-    # Get issue history
-    issues = session.query(LibraryIssue).filter_by(
-        book_id=book_id,
-        tenant_id=tenant_id
-    ).order_by(LibraryIssue.issue_date.desc()).all()
-    
-    # Calculate statistics
-    total_issues = len(issues)
-    active_issues = sum(1 for i in issues if i.status == IssueStatusEnum.ISSUED)
-    overdue_issues = sum(1 for i in issues if i.is_overdue)
+    # Get issue history, students loaded up front for the template
+    issues_query = select(LibraryIssue).options(
+        selectinload(LibraryIssue.student)
+    ).where(
+        LibraryIssue.book_id == book_id,
+        LibraryIssue.tenant_id == tenant_id
+    ).order_by(LibraryIssue.issue_date.desc(), LibraryIssue.id.desc())
+    if before is not None:
+        before_date, before_id = before
+        issues_query = issues_query.where(or_(
+            LibraryIssue.issue_date < before_date,
+            and_(LibraryIssue.issue_date == before_date, LibraryIssue.id < before_id)
+        ))
+    if history_limit is not None:
+        issues_query = issues_query.limit(history_limit)
+    issues = session.scalars(issues_query).all()
+    
+    # Calculate statistics in one aggregate query, compiled once (see can_issue_book)
+    total_issues, active_issues, overdue_issues = session.execute(
+        lambda_stmt(lambda: _book_issue_stats_select(book_id, tenant_id))
+    ).one()
+    
+    next_before = None
+    if history_limit is not None and len(issues) == history_limit:
+        next_before = (issues[-1].issue_date, issues[-1].id)
     
     return {
         'book': book,
         'issues': issues,
+        'next_before': next_before,
         'stats': {
             'total_issues': total_issues,
-            'active_issues': active_issues,
-            'overdue_issues': overdue_issues
+            'active_issues': int(active_issues),
+            'overdue_issues': int(overdue_issues)
         }
     }
 
 
+def _book_issue_stats_select(book_id, tenant_id):
+    """Total, active and overdue issue counts of a book, for get_book_details"""
+    return select(
+        func.count(),
+        func.coalesce(func.sum(case((LibraryIssue.status == IssueStatusEnum.ISSUED, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((LibraryIssue.is_overdue, 1), else_=0)), 0)
+    ).where(
+        LibraryIssue.book_id == book_id,
+        LibraryIssue.tenant_id == tenant_id
+    )
+
+
 # ===== BOOK ISSUE MANAGEMENT =====
 
+def _issue_facts_select(student_id, book_id, tenant_id):
+    """Student existence and the student's issue counts, for can_issue_book"""
+    is_issued = LibraryIssue.status == IssueStatusEnum.ISSUED
+    has_unpaid_fine = and_(LibraryIssue.fine_amount > 0, LibraryIssue.fine_paid == False)
+    issue_counts = select(
+        func.coalesce(func.sum(case((is_issued, 1), else_=0)), 0).label('current_issues'),
+        func.coalesce(func.sum(case((has_unpaid_fine, 1), else_=0)), 0).label('unpaid_fines'),
+        func.coalesce(func.sum(case((and_(is_issued, LibraryIssue.book_id == book_id), 1), else_=0)), 0).label('has_book')
+    ).where(
+        LibraryIssue.student_id == student_id,
+        LibraryIssue.tenant_id == tenant_id
+    ).subquery()
+    student_exists = select(Student.id).where(
+        Student.id == student_id,
+        Student.tenant_id == tenant_id
+    ).exists()
+    return select(
+        student_exists.label('student_exists'),
+        issue_counts.c.current_issues,
+        issue_counts.c.unpaid_fines,
+        issue_counts.c.has_book
+    )
+
+
+@query_budget(3)
 def can_issue_book(session: Session, student_id: int, book_id: int, tenant_id: int) -> tuple:
     """
     Check if book can be issued to student
-    Returns: (can_issue: bool, reason: str)
+    Returns: (can_issue: bool, reason: str, context: dict)
+    context holds what the checks loaded ('settings', 'book', 'current_issues'),
+    so issue_book does not fetch it again
     """
-    settings = get_library_settings(session, tenant_id)
+    settings = get_library_policy(session, tenant_id)
+    context = {'settings': settings, 'book': None, 'current_issues': None}
     
     # Check if book exists and is available
-    book = session.query(LibraryBook).filter_by(id=book_id, tenant_id=tenant_id).first()
+    book = get_tenant_scoped(session, LibraryBook, book_id, tenant_id)
     if not book:
-        return False, "Book not found"
+        return False, "Book not found", context
+    context['book'] = book
     
     if book.available_copies <= 0:
-        return False, "No copies available"
+        return False, "No copies available", context
     
     if book.status != BookStatusEnum.AVAILABLE:
-        return False, f"Book is {book.status.value}"
+        return False, f"Book is {book.status.value}", context
+    
+    # Student existence and the student's issue counts in one round trip.
+    # lambda_stmt compiles the SQL once; later calls only swap in the ids.
+    facts = session.execute(
+        lambda_stmt(lambda: _issue_facts_select(student_id, book_id, tenant_id))
+    ).one()
+    context['current_issues'] = facts.current_issues
     
     # Check if student exists
-    student = session.query(Student).filter_by(id=student_id, tenant_id=tenant_id).first()
-    if not student:
-        return False, "Student not found"
+    if not facts.student_exists:
+        return False, "Student not found", context
     
     # Check student's current issues
-    current_issues = session.query(LibraryIssue).filter(
-        LibraryIssue.student_id == student_id,
-        LibraryIssue.tenant_id == tenant_id,
-        LibraryIssue.status == IssueStatusEnum.ISSUED
-    ).count()
-    
-    if current_issues >= settings.max_books_per_student:
-        return False, f"Student has reached maximum limit ({settings.max_books_per_student} books)"
+    if facts.current_issues >= settings.max_books_per_student:
+        return False, f"Student has reached maximum limit ({settings.max_books_per_student} books)", context
     
     # Check for unpaid fines
-    unpaid_fines = session.query(LibraryIssue).filter(
-        LibraryIssue.student_id == student_id,
-        LibraryIssue.tenant_id == tenant_id,
-        LibraryIssue.fine_amount > 0,
-        LibraryIssue.fine_paid == False
-    ).count()
-    
-    if unpaid_fines > 0:
-        return False, "Student has unpaid fines"
+    if facts.unpaid_fines > 0:
+        return False, "Student has unpaid fines", context
     
     # Check if student already has this book
-    has_book = session.query(LibraryIssue).filter(
-        LibraryIssue.student_id == student_id,
-        LibraryIssue.book_id == book_id,
-        LibraryIssue.tenant_id == tenant_id,
-        LibraryIssue.status == IssueStatusEnum.ISSUED
-    ).first()
+    if facts.has_book:
+        return False, "Student already has this book", context
     
-    if has_book:
-        return False, "Student already has this book"
-    
-    return True, "Can issue"
+    return True, "Can issue", context
 
 
 def issue_book(session: Session, student_id: int, book_id: int, tenant_id: int, 
@@ -263,12 +414,13 @@ def issue_book(session: Session, student_id: int, book_id: int, tenant_id: int,
     """Issue a book to student"""
     
     # Validation
-    can_issue, reason = can_issue_book(session, student_id, book_id, tenant_id)
+    can_issue, reason, context = can_issue_book(session, student_id, book_id, tenant_id)
     if not can_issue:
         raise ValueError(reason)
     
-    settings = get_library_settings(session, tenant_id)
-    book = session.query(LibraryBook).filter_by(id=book_id, tenant_id=tenant_id).first()
+    # Reuse the settings and book loaded by the checks
+    settings = context['settings']
+    book = context['book']
     
     # Use custom due date if provided, otherwise use default from settings
     if custom_due_date:
@@ -292,24 +444,41 @@ def issue_book(session: Session, student_id: int, book_id: int, tenant_id: int,
     
     session.add(issue)
     
-    # Update book availability
-    book.available_copies -= 1
-    if book.available_copies == 0:
-        book.status = BookStatusEnum.ISSUED
+    # Take a copy in one conditional UPDATE, so concurrent issues cannot both
+    # take the last one. status is assigned first: MySQL evaluates SET
+    # assignments in order, and the CASE must see the copies before the decrement.
+    result = session.execute(
+        update(LibraryBook).where(
+            LibraryBook.id == book_id,
+            LibraryBook.tenant_id == tenant_id,
+            LibraryBook.available_copies > 0
+        ).ordered_values(
+            (LibraryBook.status, case((LibraryBook.available_copies == 1, _book_status(BookStatusEnum.ISSUED)), else_=LibraryBook.status)),
+            (LibraryBook.available_copies, LibraryBook.available_copies - 1)
+        ).execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        session.rollback()
+        raise ValueError("No copies available")
+    session.expire(book, ['available_copies', 'status'])
     
     session.commit()
-    session.refresh(issue)
     
     return issue
 
 
+def _book_status(status: BookStatusEnum):
+    """BookStatusEnum bound with the status column type, for CASE results in UPDATEs"""
+    return literal(status, LibraryBook.status.type)
+
+
 def return_book(session: Session, issue_id: int, tenant_id: int, 
                 return_condition: BookConditionEnum = None,
                 returned_by_user_id: int = None,
                 return_remarks: str = None) -> LibraryIssue:
     """Process book return"""
     
-    issue = session.query(LibraryIssue).filter_by(id=issue_id, tenant_id=tenant_id).first()
+    issue = get_tenant_scoped(session, LibraryIssue, issue_id, tenant_id)
     
     if not issue:
         raise ValueError("Issue record not found")
@@ -317,8 +486,8 @@ def return_book(session: Session, issue_id: int, tenant_id: int,
     if issue.status != IssueStatusEnum.ISSUED:
         raise ValueError(f"Book is not currently issued (Status: {issue.status.value})")
     
-    book = session.query(LibraryBook).filter_by(id=issue.book_id, tenant_id=tenant_id).first()
-    settings = get_library_settings(session, tenant_id)
+    book = get_tenant_scoped(session, LibraryBook, issue.book_id, tenant_id)
+    settings = get_library_policy(session, tenant_id)
     
     # Update issue record
     issue.return_date = date.today()
@@ -327,6 +496,7 @@ def return_book(session: Session, issue_id: int, tenant_id: int,
     issue.return_remarks = return_remarks
     
     # Calculate fine if overdue
+    fine = Decimal('0.00')
     if issue.due_date < date.today():
         days_late = (date.today() - issue.due_date).days
         
@@ -337,17 +507,28 @@ def return_book(session: Session, issue_id: int, tenant_id: int,
                 Decimal(chargeable_days) * settings.fine_per_day,
                 settings.max_fine_amount
             )
-            issue.fine_amount = fine
-            issue.status = IssueStatusEnum.OVERDUE
-        else:
-            issue.status = IssueStatusEnum.RETURNED
-    else:
-        issue.status = IssueStatusEnum.RETURNED
-    
-    # Update book availability
-    book.available_copies += 1
-    if book.status == BookStatusEnum.ISSUED:
-        book.status = BookStatusEnum.AVAILABLE
+    issue.status = IssueStatusEnum.OVERDUE if fine > 0 else IssueStatusEnum.RETURNED
+    
+    # The final fine replaces any accrued by mark_overdue_fines. A fine paid
+    # while the book was out stays paid unless the final fine is larger
+    if not issue.fine_paid:
+        issue.fine_amount = fine
+    elif fine > (issue.fine_amount or 0):
+        issue.fine_amount = fine
+        issue.fine_paid = False
+        issue.fine_paid_date = None
+    
+    # Update book availability in one atomic UPDATE (see issue_book)
+    session.execute(
+        update(LibraryBook).where(
+            LibraryBook.id == issue.book_id,
+            LibraryBook.tenant_id == tenant_id
+        ).ordered_values(
+            (LibraryBook.status, case((LibraryBook.status == BookStatusEnum.ISSUED, _book_status(BookStatusEnum.AVAILABLE)), else_=LibraryBook.status)),
+            (LibraryBook.available_copies, LibraryBook.available_copies + 1)
+        ).execution_options(synchronize_session=False)
+    )
+    session.expire(book, ['available_copies', 'status'])
     
     # Update book condition if damaged
     if return_condition and return_condition in [BookConditionEnum.DAMAGED, BookConditionEnum.POOR]:
@@ -356,7 +537,6 @@ def return_book(session: Session, issue_id: int, tenant_id: int,
             book.status = BookStatusEnum.DAMAGED
     
     session.commit()
-    session.refresh(issue)
     
     return issue
 
@@ -364,7 +544,7 @@ def return_book(session: Session, issue_id: int, tenant_id: int,
 def renew_book(session: Session, issue_id: int, tenant_id: int) -> LibraryIssue:
     """Renew book issue (extend due date)"""
     
-    issue = session.query(LibraryIssue).filter_by(id=issue_id, tenant_id=tenant_id).first()
+    issue = get_tenant_scoped(session, LibraryIssue, issue_id, tenant_id)
     
     if not issue:
         raise ValueError("Issue record not found")
@@ -372,17 +552,18 @@ def renew_book(session: Session, issue_id: int, tenant_id: int) -> LibraryIssue:
     if issue.status != IssueStatusEnum.ISSUED:
         raise ValueError("Only issued books can be renewed")
     
-    # Check for unpaid fines
-    if issue.fine_amount > 0 and not issue.fine_paid:
-        raise ValueError("Cannot renew with unpaid fines")
-    
-    settings = get_library_settings(session, tenant_id)
+    settings = get_library_policy(session, tenant_id)
     
     # Extend due date
     issue.due_date = date.today() + timedelta(days=settings.issue_duration_days)
     
+    # An issued book only carries a provisional fine accrued by
+    # mark_overdue_fines. It does not block renewal, and renewing waives it
+    # (unless already paid), as renewing a late book did before fines accrued
+    if not issue.fine_paid:
+        issue.fine_amount = Decimal('0.00')
+    
     session.commit()
-    session.refresh(issue)
     
     return issue
 
@@ -390,7 +571,7 @@ def renew_book(session: Session, issue_id: int, tenant_id: int) -> LibraryIssue:
 def pay_fine(session: Session, issue_id: int, tenant_id: int) -> LibraryIssue:
     """Mark fine as paid"""
     
-    issue = session.query(LibraryIssue).filter_by(id=issue_id, tenant_id=tenant_id).first()
+    issue = get_tenant_scoped(session, LibraryIssue, issue_id, tenant_id)
     
     if not issue:
         raise ValueError("Issue record not found")
@@ -402,13 +583,72 @@ def pay_fine(session: Session, issue_id: int, tenant_id: int) -> LibraryIssue:
     issue.fine_paid_date = date.today()
     
     session.commit()
-    session.refresh(issue)
     
     return issue
 
 
+def mark_overdue_fines(session: Session, tenant_id: int) -> int:
+    """Accrue fines on every overdue, still-issued book in one UPDATE.
+
+    Uses the same grace period, per-day rate and cap as return_book, which
+    recomputes the final fine when the book comes back. Status stays ISSUED
+    (OVERDUE marks a late return), and paid fines are left untouched.
+    Returns the number of issues updated.
+    """
+    settings = get_library_policy(session, tenant_id)
+    today = date.today()
+    
+    fine = (DaysBetween(today, LibraryIssue.due_date) - settings.grace_period_days) * settings.fine_per_day
+    result = session.execute(
+        update(LibraryIssue).where(
+            LibraryIssue.tenant_id == tenant_id,
+            LibraryIssue.status == IssueStatusEnum.ISSUED,
+            LibraryIssue.fine_paid == False,
+            LibraryIssue.due_date < today - timedelta(days=settings.grace_period_days)
+        ).values(
+            fine_amount=case((fine > settings.max_fine_amount, settings.max_fine_amount), else_=fine)
+        ).execution_options(synchronize_session=False)
+    )
+    session.commit()
+    
+    return result.rowcount
+
+
 # ===== REPORTS AND QUERIES =====
 
+# Shortest word InnoDB indexes for FULLTEXT search (innodb_ft_min_token_size)
+FULLTEXT_MIN_WORD_LENGTH = 3
+
+
+def book_search_filter(session: Session, search: str):
+    """
+    Filter for a catalogue search on title, author, accession number and ISBN.
+    On MySQL, searches with words of FULLTEXT_MIN_WORD_LENGTH+ characters match
+    title/author words by prefix through the idx_library_book_fulltext index and
+    accession number/ISBN by prefix; otherwise every field is matched by substring.
+    """
+    words = [word for word in re.findall(r'\w+', search) if len(word) >= FULLTEXT_MIN_WORD_LENGTH]
+    
+    if words and session.get_bind().dialect.name == 'mysql':
+        return or_(
+            mysql_match(
+                LibraryBook.title, LibraryBook.author,
+                against=' '.join(f'+{word}*' for word in words)
+            ).in_boolean_mode(),
+            LibraryBook.accession_number.like(f"{search}%"),
+            LibraryBook.isbn.like(f"{search}%")
+        )
+    
+    search_pattern = f"%{search}%"
+    return or_(
+        LibraryBook.title.like(search_pattern),
+        LibraryBook.author.like(search_pattern),
+        LibraryBook.accession_number.like(search_pattern),
+        LibraryBook.isbn.like(search_pattern)
+    )
+
+
+@query_budget(1)
 def get_available_books(session: Session, tenant_id: int, category_id: int = None, search: str = None):
     """Get list of available books"""
     query = session.query(LibraryBook).filter(
@@ -421,41 +661,43 @@ def get_available_books(session: Session, tenant_id: int, category_id: int = Non
         query = query.filter(LibraryBook.category_id == category_id)
     
     if search:
-        search_pattern = f"%{search}%"
-        query = query.filter(
-            or_(
-                LibraryBook.title.like(search_pattern),
-                LibraryBook.author.like(search_pattern),
-                LibraryBook.accession_number.like(search_pattern),
-                LibraryBook.isbn.like(search_pattern)
-            )
-        )
+        query = query.filter(book_search_filter(session, search))
     
     return query.order_by(LibraryBook.title).all()
 
 
+@query_budget(3)
 def get_issued_books(session: Session, tenant_id: int, student_id: int = None):
     """Get currently issued books"""
-    query = session.query(LibraryIssue).filter(
+    stmt = lambda_stmt(lambda: select(LibraryIssue).where(
         LibraryIssue.tenant_id == tenant_id,
         LibraryIssue.status == IssueStatusEnum.ISSUED
-    )
+    ))
     
     if student_id:
-        query = query.filter(LibraryIssue.student_id == student_id)
+        stmt += lambda s: s.where(LibraryIssue.student_id == student_id)
     
-    return query.order_by(LibraryIssue.issue_date.desc()).all()
+    # Book and student of every issue in one IN query each, not one per row
+    stmt += lambda s: s.options(
+        selectinload(LibraryIssue.book),
+        selectinload(LibraryIssue.student)
+    ).order_by(LibraryIssue.issue_date.desc())
+    return session.execute(stmt).scalars().all()
 
 
+@query_budget(3)
 def get_overdue_books(session: Session, tenant_id: int):
     """Get overdue book issues"""
-    return session.query(LibraryIssue).filter(
+    return session.query(LibraryIssue).options(
+        selectinload(LibraryIssue.book),
+        selectinload(LibraryIssue.student)
+    ).filter(
         LibraryIssue.tenant_id == tenant_id,
-        LibraryIssue.status == IssueStatusEnum.ISSUED,
-        LibraryIssue.due_date < date.today()
+        LibraryIssue.is_overdue
     ).order_by(LibraryIssue.due_date).all()
 
 
+@query_budget(1)
 def get_student_issue_history(session: Session, student_id: int, tenant_id: int):
     """Get complete issue history for a student"""
     return session.query(LibraryIssue).filter(
@@ -464,42 +706,33 @@ def get_student_issue_history(session: Session, student_id: int, tenant_id: int)
     ).order_by(LibraryIssue.issue_date.desc()).all()
 
 
+@query_budget(2)
 def get_library_statistics(session: Session, tenant_id: int) -> dict:
     """Get overall library statistics"""
     
-    total_books = session.query(func.sum(LibraryBook.total_copies)).filter(
-        LibraryBook.tenant_id == tenant_id
-    ).scalar() or 0
-    
-    available_books = session.query(func.sum(LibraryBook.available_copies)).filter(
-        LibraryBook.tenant_id == tenant_id
-    ).scalar() or 0
-    
-    issued_books = session.query(LibraryIssue).filter(
-        LibraryIssue.tenant_id == tenant_id,
-        LibraryIssue.status == IssueStatusEnum.ISSUED
-    ).count()
-    
-    overdue_books = session.query(LibraryIssue).filter(
-        LibraryIssue.tenant_id == tenant_id,
-        LibraryIssue.status == IssueStatusEnum.ISSUED,
-        LibraryIssue.due_date < date.today()
-    ).count()
-    
-    total_fines = session.query(func.sum(LibraryIssue.fine_amount)).filter(
-        LibraryIssue.tenant_id == tenant_id,
-        LibraryIssue.fine_paid == False
-    ).scalar() or Decimal('0.00')
-    
-    unique_titles = session.query(LibraryBook).filter(
-        LibraryBook.tenant_id == tenant_id
-    ).count()
+    # Book stats in one query
+    total_books, available_books, unique_titles = session.execute(
+        select(
+            func.coalesce(func.sum(LibraryBook.total_copies), 0),
+            func.coalesce(func.sum(LibraryBook.available_copies), 0),
+            func.count()
+        ).where(LibraryBook.tenant_id == tenant_id)
+    ).one()
+    
+    # Issue stats in one query (CASE aggregates; MySQL has no FILTER clause)
+    issued_books, overdue_books, total_fines = session.execute(
+        select(
+            func.coalesce(func.sum(case((LibraryIssue.status == IssueStatusEnum.ISSUED, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((LibraryIssue.is_overdue, 1), else_=0)), 0),
+            func.sum(case((LibraryIssue.fine_paid == False, LibraryIssue.fine_amount), else_=None))
+        ).where(LibraryIssue.tenant_id == tenant_id)
+    ).one()
     
     return {
         'total_books': int(total_books),
         'available_books': int(available_books),
-        'issued_books': issued_books,
-        'overdue_books': overdue_books,
-        'total_unpaid_fines': float(total_fines),
+        'issued_books': int(issued_books),
+        'overdue_books': int(overdue_books),
+        'total_unpaid_fines': float(total_fines or Decimal('0.00')),
         'unique_titles': unique_titles
     }
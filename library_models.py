@@ -3,12 +3,37 @@ Library Management Models
 Multi-tenant library management system for tracking books and student issues
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Numeric, Date, Enum, Index, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Numeric, Date, Enum, Index, UniqueConstraint, and_, case, func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql.expression import FunctionElement
 from models import Base
 from datetime import datetime, date
 import enum
 
+
+class DaysBetween(FunctionElement):
+    """Whole days from start to end, as DaysBetween(end, start), in any dialect"""
+    type = Integer()
+    name = 'days_between'
+    inherit_cache = True
+
+
+@compiles(DaysBetween)
+def _days_between_default(element, compiler, **kw):
+    end, start = element.clauses
+    return "CAST(julianday(%s) - julianday(%s) AS INTEGER)" % (
+        compiler.process(end, **kw), compiler.process(start, **kw)
+    )
+
+
+@compiles(DaysBetween, 'mysql')
+def _days_between_mysql(element, compiler, **kw):
+    end, start = element.clauses
+    return "DATEDIFF(%s, %s)" % (compiler.process(end, **kw), compiler.process(start, **kw))
+
+
 # ===== ENUMS =====
 class BookStatusEnum(enum.Enum):
     AVAILABLE = "Available"
@@ -104,6 +129,8 @@ class LibraryBook(Base):
         Index('idx_library_book_tenant', 'tenant_id'),
         Index('idx_library_book_status', 'tenant_id', 'status'),
         Index('idx_library_book_isbn', 'isbn'),
+        # Catalogue search (see library_helpers.book_search_filter)
+        Index('idx_library_book_fulltext', 'title', 'author', mysql_prefix='FULLTEXT'),
     )
     
     def __repr__(self):
@@ -161,24 +188,53 @@ class LibraryIssue(Base):
         Index('idx_library_issue_book', 'tenant_id', 'book_id'),
         Index('idx_library_issue_status', 'tenant_id', 'status'),
         Index('idx_library_issue_due_date', 'tenant_id', 'due_date', 'status'),
+        # Covers the per-student counts in can_issue_book (MySQL has no partial indexes)
+        Index('idx_library_issue_student_cover', 'tenant_id', 'student_id', 'status', 'book_id', 'fine_paid', 'fine_amount'),
+        # Overdue lookups: equality on status, then a due_date range
+        Index('idx_library_issue_overdue', 'tenant_id', 'status', 'due_date'),
     )
     
     def __repr__(self):
         return f'<LibraryIssue {self.issue_number}: Book#{self.book_id} to Student#{self.student_id}>'
     
-    @property
+    @hybrid_property
     def is_overdue(self):
         """Check if book return is overdue"""
         if self.status == IssueStatusEnum.ISSUED and self.due_date < date.today():
             return True
         return False
     
-    @property
+    @is_overdue.expression
+    def is_overdue(cls):
+        return and_(cls.status == IssueStatusEnum.ISSUED, cls.due_date < func.current_date())
+    
+    @hybrid_property
     def days_overdue(self):
         """Calculate number of days overdue"""
         if self.is_overdue:
             return (date.today() - self.due_date).days
         return 0
+    
+    @days_overdue.expression
+    def days_overdue(cls):
+        return case((cls.is_overdue, DaysBetween(func.current_date(), cls.due_date)), else_=0)
+
+
+class LibraryIssueSequence(Base):
+    """Per-tenant monthly counter behind issue numbers (ISS-YYYYMM-XXXXX)"""
+    __tablename__ = 'library_issue_sequences'
+    
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
+    period = Column(String(6), nullable=False)  # YYYYMM
+    next_val = Column(Integer, nullable=False, default=1)
+    
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'period', name='uq_library_issue_sequence_tenant_period'),
+    )
+    
+    def __repr__(self):
+        return f'<LibraryIssueSequence Tenant#{self.tenant_id} {self.period}: {self.next_val}>'
 
 
 class LibrarySettings(Base):
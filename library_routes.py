@@ -20,7 +20,8 @@ from library_helpers import (
     add_book, bulk_add_books, update_book, delete_book, get_book_details,
     can_issue_book, issue_book, return_book, renew_book, pay_fine,
     get_available_books, get_issued_books, get_overdue_books,
-    get_student_issue_history, get_library_statistics, get_library_settings
+    get_student_issue_history, get_library_statistics, get_library_settings,
+    invalidate_library_settings, book_search_filter
 )
 from models import Student, User
 
@@ -166,15 +167,7 @@ def create_library_routes(school_blueprint, require_school_auth):
                 query = query.filter_by(status=status)
             
             if search:
-                search_pattern = f"%{search}%"
-                query = query.filter(
-                    or_(
-                        LibraryBook.title.like(search_pattern),
-                        LibraryBook.author.like(search_pattern),
-                        LibraryBook.accession_number.like(search_pattern),
-                        LibraryBook.isbn.like(search_pattern)
-                    )
-                )
+                query = query.filter(book_search_filter(session, search))
             
             books = query.order_by(LibraryBook.title).all()
             categories = session.query(LibraryCategory).filter_by(
@@ -323,7 +316,11 @@ def create_library_routes(school_blueprint, require_school_auth):
         session = get_session()
         try:
             tenant_id = g.current_tenant.id
-            book_details = get_book_details(session, book_id, tenant_id)
+            # Keyset cursor of the last issue on the previous page
+            before_date = request.args.get('before_date', type=date.fromisoformat)
+            before_id = request.args.get('before_id', type=int)
+            before = (before_date, before_id) if before_date and before_id else None
+            book_details = get_book_details(session, book_id, tenant_id, before=before)
             
             if not book_details:
                 flash('Book not found!', 'danger')
@@ -333,6 +330,7 @@ def create_library_routes(school_blueprint, require_school_auth):
                                  school=g.current_tenant,
                                  book=book_details['book'],
                                  issues=book_details['issues'],
+                                 next_before=book_details['next_before'],
                                  stats=book_details['stats'],
                                  tenant_slug=tenant_slug)
         finally:
@@ -642,6 +640,7 @@ def create_library_routes(school_blueprint, require_school_auth):
                     settings.grace_period_days = int(request.form.get('grace_period_days', 0))
                     
                     session.commit()
+                    invalidate_library_settings(tenant_id)
                     flash('Settings updated successfully!', 'success')
                     
                 except Exception as e:
@@ -18,6 +18,11 @@ from config import Config
 from db_single import get_session, init_database, ENGINE
 from models import User, Tenant, Base
 from cli_commands import register_cli_commands
+from query_profiling import register_query_profiling
+from app_cache import cache
+
+# Logging, configured before the startup check so init_db's report is shown
+logging.basicConfig(level=logging.DEBUG)
 
 # Initialize database on startup
 print("\n" + "="*60)
@@ -44,13 +49,15 @@ def create_app() -> Flask:
     )
     app.config.from_object(Config)
 
-    # Logging
-    logging.basicConfig(level=logging.DEBUG)
+    # Logging (root handler configured at import, above)
     logger = logging.getLogger(__name__)
 
     # DB init
     engine, session_factory = init_database()
 
+    # Cache
+    cache.init_app(app)
+
     # Flask-Login
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -122,6 +129,9 @@ def create_app() -> Flask:
             logging.getLogger(__name__).error(f"user_loader error: {e}")
         return None
 
+    # Development query profiling (N+1 detection, per-request query budget)
+    register_query_profiling(app, engine)
+
     # CLI
     register_cli_commands(app)
 
@@ -151,6 +151,10 @@ employee_status_enum = Enum('Active', 'Inactive', 'On Leave', 'Resigned', name='
 
 class Student(Base):
     __tablename__ = 'students'
+    __table_args__ = (
+        # Covers the per-class active student counts (dashboard class distribution)
+        Index('idx_student_class_status', 'class_id', 'status', 'tenant_id'),
+    )
     
     id = Column(Integer, primary_key=True)
     tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
@@ -381,6 +385,7 @@ class StudentAttendance(Base):
         Index('idx_attend_student_date', 'student_id', 'attendance_date'),
         Index('idx_attend_class_date', 'class_id', 'attendance_date'),
         Index('idx_attend_tenant_date', 'tenant_id', 'attendance_date'),
+        Index('idx_attend_tenant_date_status', 'tenant_id', 'attendance_date', 'status'),  # Dashboard group-by
         Index('idx_attend_status', 'status'),
         Index('idx_attend_date', 'attendance_date'),
     )
@@ -417,6 +422,7 @@ class StudentAttendanceSummary(Base):
         Index('idx_summary_class', 'class_id'),
         Index('idx_summary_tenant', 'tenant_id'),
         Index('idx_summary_month_year', 'month', 'year'),
+        Index('idx_summary_tenant_year_month', 'tenant_id', 'year', 'month'),
         Index('idx_summary_percentage', 'attendance_percentage'),
     )
 
@@ -445,6 +451,26 @@ class StudentAttendanceSummary(Base):
         return f"<StudentAttendanceSummary student_id={self.student_id} {self.month}/{self.year} {self.attendance_percentage}%>"
 
 
+# ===== ATTENDANCE TREND MODEL =====
+class AttendanceTrendMonthly(Base):
+    """School-wide average attendance per month, precomputed from student_attendance_summary.
+    Refreshed nightly by `flask refresh-attendance-trend`; read by the home dashboard trend chart."""
+    __tablename__ = 'attendance_trend_monthly'
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'year', 'month', name='unique_trend_tenant_month'),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    tenant_id = Column(Integer, ForeignKey('tenants.id', ondelete='CASCADE'), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)  # 1-12
+    attendance_percentage = Column(Numeric(5, 2), default=0.00)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<AttendanceTrendMonthly tenant_id={self.tenant_id} {self.month}/{self.year} {self.attendance_percentage}%>"
+
+
 # ===== STUDENT HOLIDAYS MODEL =====
 class StudentHoliday(Base):
     """School holiday calendar with date range support"""
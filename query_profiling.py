@@ -0,0 +1,151 @@
+"""
+Query Profiling for Development
+Catches N+1 query regressions and per-request query budget overruns.
+
+Enabled through environment variables (see config.Config):
+1. ENABLE_NPLUSONE=1   - profile each request with nplusone; a lazy load inside
+                         a loop raises NPlusOneError, or is only logged as a
+                         warning when NPLUSONE_RAISE=0
+2. QUERY_BUDGET=<n>    - log a warning when a request issues more than n queries
+3. SQLALCHEMY_ECHO=1   - echo every SQL statement (handled in db_single)
+4. HELPER_QUERY_BUDGETS=1 - log a warning when a helper decorated with
+                         @query_budget(n) issues more than n queries
+
+`count_queries()` can also be used directly to assert query budgets:
+
+    with count_queries(engine) as counter:
+        client.get('/sastra/finance')
+    assert counter.count <= 8
+"""
+
+import functools
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from flask import Flask, g, has_app_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Read at import time: helpers are decorated when their module loads, before
+# any app config exists. Off in production, where query_budget is a no-op.
+HELPER_QUERY_BUDGETS = os.environ.get('HELPER_QUERY_BUDGETS', '').lower() in ('1', 'true', 'yes')
+
+_local = threading.local()
+
+
+class QueryCounter:
+    """Mutable counter of statements executed while it is active"""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+
+def _active_counters():
+    if not hasattr(_local, 'counters'):
+        _local.counters = []
+    return _local.counters
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    for counter in _active_counters():
+        counter.count += 1
+        counter.statements.append(statement)
+    if has_app_context() and 'query_count' in g:
+        g.query_count += 1
+
+
+def install_query_counter(engine):
+    """Attach the statement counter to an engine (idempotent)"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+
+
+@contextmanager
+def count_queries(engine):
+    """Count statements executed on the current thread within the block"""
+    install_query_counter(engine)
+    counter = QueryCounter()
+    counters = _active_counters()
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+def query_budget(budget: int):
+    """
+    Decorator for helpers taking the session as first argument: with
+    HELPER_QUERY_BUDGETS set, warn when one call issues more than budget queries
+    """
+    def decorator(fn):
+        if not HELPER_QUERY_BUDGETS:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(session, *args, **kwargs):
+            with count_queries(session.get_bind()) as counter:
+                result = fn(session, *args, **kwargs)
+            if counter.count > budget:
+                logger.warning(
+                    "Query budget exceeded: %s issued %d queries (budget %d):\n%s",
+                    fn.__qualname__, counter.count, budget, '\n'.join(counter.statements)
+                )
+            return result
+        return wrapper
+    return decorator
+
+
+def _nplusone_middleware(wsgi_app, profiler_class, raise_on_detect: bool):
+    """Wrap the WSGI app so every request runs under an nplusone profiler"""
+    class LoggingProfiler(profiler_class):
+        def notify(self, message):
+            if not message.match(self.whitelist):
+                logger.warning("N+1 query detected: %s", message.message)
+
+    profiler = profiler_class if raise_on_detect else LoggingProfiler
+
+    def middleware(environ, start_response):
+        with profiler():
+            return wsgi_app(environ, start_response)
+    return middleware
+
+
+def register_query_profiling(app: Flask, engine):
+    """Enable N+1 detection and query budgets according to app config"""
+    if app.config.get('NPLUSONE_ENABLED'):
+        try:
+            import nplusone.ext.sqlalchemy  # noqa: F401 - registers SQLAlchemy listeners
+            from nplusone.core.profiler import Profiler
+        except ImportError:
+            logger.warning("ENABLE_NPLUSONE is set but nplusone is not installed (pip install nplusone)")
+        else:
+            raise_on_detect = app.config.get('NPLUSONE_RAISE', True)
+            app.wsgi_app = _nplusone_middleware(app.wsgi_app, Profiler, raise_on_detect)
+            logger.info("✅ N+1 query detection enabled (%s)", 'raise' if raise_on_detect else 'log')
+
+    request_query_budget = app.config.get('QUERY_BUDGET') or 0
+    if request_query_budget <= 0:
+        return
+
+    install_query_counter(engine)
+
+    @app.before_request
+    def _start_query_count():
+        g.query_count = 0
+
+    @app.after_request
+    def _check_query_budget(response):
+        count = g.get('query_count', 0)
+        if count > request_query_budget:
+            logger.warning(
+                "Query budget exceeded: %s %s issued %d queries (budget %d)",
+                request.method, request.path, count, request_query_budget
+            )
+        return response
+
+    logger.info("✅ Query budget enabled (%d queries per request)", request_query_budget)
@@ -6,6 +6,7 @@ Usage: python setup_database.py
 """
 
 import sys
+import logging
 from init_db import run_on_startup
 
 if __name__ == '__main__':
@@ -19,6 +20,7 @@ if __name__ == '__main__':
     print("  4. Create a default admin user if none exists")
     print("="*70 + "\n")
     
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     success = run_on_startup()
     
     if success:
@@ -3,8 +3,8 @@ Helper functions for Student Attendance Management
 Provides reusable functions for attendance operations across school admin portal
 """
 
-from models import StudentAttendance, StudentAttendanceSummary, StudentHoliday, StudentAttendanceStatusEnum, Student
-from sqlalchemy import extract, func, and_, or_
+from models import StudentAttendance, StudentAttendanceSummary, StudentHoliday, StudentAttendanceStatusEnum, Student, AttendanceTrendMonthly
+from sqlalchemy import extract, func, and_, or_, select, insert, delete, literal
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 
@@ -261,6 +261,123 @@ def update_student_attendance_summary(db_session, student_id, class_id, tenant_i
         return None
 
 
+def refresh_attendance_trend(db_session):
+    """
+    Rebuild the precomputed monthly attendance trend for all tenants
+    
+    Replaces attendance_trend_monthly with AVG(attendance_percentage) per
+    tenant/year/month in a single transaction (INSERT ... SELECT).
+    
+    Args:
+        db_session: SQLAlchemy session
+        
+    Returns:
+        int: Number of trend rows written
+    """
+    try:
+        trend_rows = select(
+            StudentAttendanceSummary.tenant_id,
+            StudentAttendanceSummary.year,
+            StudentAttendanceSummary.month,
+            func.avg(StudentAttendanceSummary.attendance_percentage),
+            literal(datetime.utcnow())
+        ).group_by(
+            StudentAttendanceSummary.tenant_id,
+            StudentAttendanceSummary.year,
+            StudentAttendanceSummary.month
+        )
+        
+        db_session.execute(delete(AttendanceTrendMonthly))
+        result = db_session.execute(
+            insert(AttendanceTrendMonthly).from_select(
+                ['tenant_id', 'year', 'month', 'attendance_percentage', 'refreshed_at'],
+                trend_rows
+            )
+        )
+        db_session.commit()
+        return result.rowcount
+        
+    except Exception:
+        db_session.rollback()
+        raise
+
+
+def months_back(today, months):
+    """
+    Get the (year, month) that is a number of calendar months before today
+    
+    Args:
+        today: Reference date
+        months: Number of months to go back (0 = today's month)
+        
+    Returns:
+        tuple: (year, month)
+    """
+    year, month_index = divmod(today.year * 12 + today.month - 1 - months, 12)
+    return year, month_index + 1
+
+
+def _since_year_month(model, since_year, since_month):
+    """
+    Range predicate for (year, month) >= (since_year, since_month)
+    
+    Written as comparisons on the bare columns so a (tenant_id, year, month)
+    index can serve it as a range scan.
+    """
+    return or_(
+        model.year > since_year,
+        and_(model.year == since_year, model.month >= since_month)
+    )
+
+
+def get_monthly_attendance_trend(db_session, tenant_id, since_year, since_month=1):
+    """
+    Get average attendance percentage per month for a tenant
+    
+    Reads the precomputed attendance_trend_monthly rows; falls back to
+    aggregating student_attendance_summary when the trend has not been
+    refreshed for this tenant yet.
+    
+    Args:
+        db_session: SQLAlchemy session
+        tenant_id: Tenant ID
+        since_year: Year of the first month to include
+        since_month: First month to include within since_year (1-12)
+        
+    Returns:
+        list: (month, year, avg_percentage) tuples ordered by year, month
+    """
+    trend = db_session.query(
+        AttendanceTrendMonthly.month,
+        AttendanceTrendMonthly.year,
+        AttendanceTrendMonthly.attendance_percentage
+    ).filter(
+        AttendanceTrendMonthly.tenant_id == tenant_id,
+        _since_year_month(AttendanceTrendMonthly, since_year, since_month)
+    ).order_by(
+        AttendanceTrendMonthly.year,
+        AttendanceTrendMonthly.month
+    ).all()
+    
+    if trend:
+        return trend
+    
+    return db_session.query(
+        StudentAttendanceSummary.month,
+        StudentAttendanceSummary.year,
+        func.avg(StudentAttendanceSummary.attendance_percentage)
+    ).filter(
+        StudentAttendanceSummary.tenant_id == tenant_id,
+        _since_year_month(StudentAttendanceSummary, since_year, since_month)
+    ).group_by(
+        StudentAttendanceSummary.year,
+        StudentAttendanceSummary.month
+    ).order_by(
+        StudentAttendanceSummary.year,
+        StudentAttendanceSummary.month
+    ).all()
+
+
 def get_student_monthly_calendar(db_session, student_id, month, year):
     """
     Get attendance calendar for a student for a specific month
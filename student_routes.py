@@ -10,6 +10,7 @@ from datetime import datetime
 import logging
 
 from db_single import get_session
+from app_cache import invalidate_dashboard_cache
 from models import Tenant, Student
 
 logger = logging.getLogger(__name__)
@@ -524,6 +525,7 @@ def register_student_routes(school_bp, require_school_auth):
                 try:
                     session_db.add(new_student)
                     session_db.commit()
+                    invalidate_dashboard_cache(school.id)
                     
                     flash('Student registered successfully!', 'success')
                     return redirect(url_for('school.students', tenant_slug=tenant_slug))
@@ -857,6 +859,7 @@ def register_student_routes(school_bp, require_school_auth):
                 session_db.add_all(students_to_add)
                 session_db.commit()
                 success = len(students_to_add)
+                invalidate_dashboard_cache(tenant_id)
             except IntegrityError as ie:
                 session_db.rollback()
                 errors.append(f'Integrity error during commit: {str(ie.orig) if hasattr(ie, "orig") else str(ie)}')
@@ -1288,6 +1291,7 @@ def register_student_routes(school_bp, require_school_auth):
                                 errors.append(f"Student ID {student_id}: {message}")
                     
                     if marked_count > 0:
+                        invalidate_dashboard_cache(school.id)
                         flash(f'Attendance marked for {marked_count} student(s)', 'success')
                     
                     if errors:
@@ -1510,6 +1514,7 @@ def register_student_routes(school_bp, require_school_auth):
             # Delete record
             session_db.delete(attendance)
             session_db.commit()
+            invalidate_dashboard_cache(school.id)
             
             # Update summary
             update_student_attendance_summary(session_db, student_id, class_id, school.id, month, year)
@@ -2120,6 +2125,7 @@ def register_student_routes(school_bp, require_school_auth):
                 from models import StudentStatusEnum
                 student.status = StudentStatusEnum.ACTIVE
                 session_db.commit()
+                invalidate_dashboard_cache(school.id)
                 return jsonify({
                     'success': True,
                     'message': f'Student "{student.full_name}" has been reactivated.',
@@ -2138,6 +2144,7 @@ def register_student_routes(school_bp, require_school_auth):
             
             if result['success']:
                 session_db.commit()
+                invalidate_dashboard_cache(school.id)
                 return jsonify(result)
             else:
                 session_db.rollback()
@@ -10,6 +10,7 @@ from datetime import datetime
 import logging
 
 from db_single import get_session
+from app_cache import invalidate_dashboard_cache
 from models import Tenant
 from teacher_models import Teacher, TeacherAuth
 
@@ -1089,6 +1090,7 @@ def mark_student_attendance(tenant_slug):
                             errors.append(f"Student ID {student_id}: {message}")
                 
                 if marked_count > 0:
+                    invalidate_dashboard_cache(school.id)
                     flash(f'Attendance marked for {marked_count} student(s)', 'success')
                 
                 if errors:
@@ -1617,14 +1619,17 @@ def leave_balance_json(tenant_slug):
 
     session_db = get_session()
     try:
+        from flask import current_app
         from leave_helpers import get_current_academic_year, get_teacher_balance
+        from leave_models import to_json_bytes
         school = session_db.query(Tenant).filter_by(slug=tenant_slug).first()
         if not school or school.id != current_user.tenant_id:
             return jsonify({'error': 'Invalid school'}), 400
 
         academic_year = get_current_academic_year()
         balance = get_teacher_balance(session_db, current_user.teacher_id, academic_year)
-        return jsonify({'success': True, 'academic_year': academic_year, 'balance': (balance.to_dict() if balance else None)})
+        payload = {'success': True, 'academic_year': academic_year, 'balance': (balance.to_dto() if balance else None)}
+        return current_app.response_class(to_json_bytes(payload), mimetype='application/json')
     except Exception as e:
         logger.exception("leave_balance_json error")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1641,19 +1646,20 @@ def leave_history_json(tenant_slug):
 
     session_db = get_session()
     try:
-        from leave_models import TeacherLeaveApplication
+        from leave_models import TeacherLeaveApplication, APPLICATION_DICT_COLUMNS, application_rows_to_dicts
         from leave_helpers import get_current_academic_year
         school = session_db.query(Tenant).filter_by(slug=tenant_slug).first()
         if not school or school.id != current_user.tenant_id:
             return jsonify({'error': 'Invalid school'}), 400
 
         year = request.args.get('year') or get_current_academic_year()
-        apps = session_db.query(TeacherLeaveApplication).filter_by(
-            teacher_id=current_user.teacher_id,
-            academic_year=year
+        # Plain column rows: the JSON needs no ORM instances
+        rows = session_db.query(*APPLICATION_DICT_COLUMNS).filter(
+            TeacherLeaveApplication.teacher_id == current_user.teacher_id,
+            TeacherLeaveApplication.academic_year == year
         ).order_by(TeacherLeaveApplication.applied_date.desc()).all()
 
-        return jsonify({'success': True, 'academic_year': year, 'applications': [a.to_dict() for a in apps]})
+        return jsonify({'success': True, 'academic_year': year, 'applications': application_rows_to_dicts(rows)})
     except Exception as e:
         logger.exception("leave_history_json error")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -532,6 +532,7 @@ class TeacherAttendance(Base):
         UniqueConstraint('teacher_id', 'attendance_date', name='unique_teacher_date'),
         Index('idx_attend_teacher_date', 'teacher_id', 'attendance_date'),
         Index('idx_attend_tenant_date', 'tenant_id', 'attendance_date'),
+        Index('idx_attend_tenant_date_status', 'tenant_id', 'attendance_date', 'status'),  # Dashboard group-by
     )
 
     id = Column(BigInteger, primary_key=True, autoincrement=True)
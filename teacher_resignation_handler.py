@@ -29,7 +29,8 @@ def handle_teacher_resignation(session: Session, teacher_id: int, tenant_id: int
     """
     from teacher_models import Teacher, TeacherAuth, TeacherSalary, EmployeeStatusEnum
     from timetable_models import TimetableSchedule, ClassTeacherAssignment
-    from leave_models import TeacherLeaveApplication, LeaveStatusEnum
+    from leave_models import TeacherLeaveApplication, TeacherLeaveBalance, LeaveStatusEnum
+    from leave_helpers import LEAVE_TYPE_PREFIX
     from question_paper_models import QuestionPaperAssignment
     from copy_checking_models import CopyCheckingAssignment
     
@@ -96,9 +97,15 @@ def handle_teacher_resignation(session: Session, teacher_id: int, tenant_id: int
             TeacherLeaveApplication.status == LeaveStatusEnum.PENDING
         ).all()
         
+        released_days = []
         for leave in pending_leaves:
             leave.status = LeaveStatusEnum.CANCELLED
             leave.admin_notes = (leave.admin_notes or '') + '\n[Auto-cancelled: Teacher resigned on ' + str(resignation_date) + ']'
+            prefix = LEAVE_TYPE_PREFIX.get(leave.leave_type.value)
+            if prefix:
+                released_days.append((teacher_id, leave.academic_year, f'{prefix}_pending', -leave.total_days))
+        # Give the cancelled days back to the pending balances in bulk
+        TeacherLeaveBalance.apply_deltas(session, released_days)
         cleanup_summary['leave_applications_cancelled'] = len(pending_leaves)
         logger.info(f"Cancelled {len(pending_leaves)} pending leave applications for teacher {teacher_id}")
         
@@ -6,6 +6,7 @@ from datetime import datetime
 import logging
 
 from db_single import get_session
+from app_cache import invalidate_dashboard_cache
 from models import User, Tenant, Student, Exam, StudentMark
 from teacher_models import Teacher, EmployeeStatusEnum
 
@@ -2877,6 +2878,7 @@ def register_teacher_routes(school_bp, require_school_auth):
                                 errors.append(f"Teacher ID {teacher_id}: {message}")
                     
                     if marked_count > 0:
+                        invalidate_dashboard_cache(school.id)
                         flash(f'Attendance marked for {marked_count} teacher(s)', 'success')
                     
                     if errors:
@@ -2891,7 +2893,8 @@ def register_teacher_routes(school_bp, require_school_auth):
                     flash(f'Error marking attendance: {str(e)}', 'error')
             
             # Auto-mark teachers on approved leave
-            check_leave_and_automark(session_db, school.id, selected_date)
+            if check_leave_and_automark(session_db, school.id, selected_date):
+                invalidate_dashboard_cache(school.id)
             
             # Fetch all active teachers
             tquery = session_db.query(Teacher).filter_by(
@@ -3109,6 +3112,7 @@ def register_teacher_routes(school_bp, require_school_auth):
             )
             
             if success:
+                invalidate_dashboard_cache(school.id)
                 return jsonify({
                     'status': 'success',
                     'message': message,
@@ -3147,7 +3151,7 @@ def register_teacher_routes(school_bp, require_school_auth):
         session_db = get_session()
         try:
             from leave_models import LeaveQuotaSettings
-            from leave_helpers import get_current_academic_year, get_or_create_quota_settings
+            from leave_helpers import get_current_academic_year, get_or_create_quota_settings, invalidate_quota_cache
             
             school = session_db.query(Tenant).filter_by(slug=tenant_slug).first()
             if not school:
@@ -3180,6 +3184,7 @@ def register_teacher_routes(school_bp, require_school_auth):
                     
                     settings.updated_at = datetime.utcnow()
                     session_db.commit()
+                    invalidate_quota_cache(school.id, academic_year)
                     
                     flash(f'Leave quota settings updated successfully for {academic_year}!', 'success')
                     return redirect(url_for('school.leave_quota_settings', tenant_slug=tenant_slug))
@@ -3232,8 +3237,7 @@ def register_teacher_routes(school_bp, require_school_auth):
         
         session_db = get_session()
         try:
-            from leave_models import TeacherLeaveBalance
-            from leave_helpers import get_current_academic_year
+            from leave_helpers import get_current_academic_year, get_all_teacher_balances
             
             school = session_db.query(Tenant).filter_by(slug=tenant_slug).first()
             if not school:
@@ -3250,14 +3254,12 @@ def register_teacher_routes(school_bp, require_school_auth):
                 employee_status=EmployeeStatusEnum.ACTIVE
             ).order_by(Teacher.first_name, Teacher.last_name).all()
             
-            # Fetch balances
-            balances = {}
-            for teacher in teachers:
-                balance = session_db.query(TeacherLeaveBalance).filter_by(
-                    teacher_id=teacher.id,
-                    academic_year=academic_year
-                ).first()
-                balances[teacher.id] = balance
+            # Fetch all balances of the year in one query (None if not initialized)
+            year_balances = {
+                balance.teacher_id: balance
+                for balance in get_all_teacher_balances(session_db, school.id, academic_year)
+            }
+            balances = {teacher.id: year_balances.get(teacher.id) for teacher in teachers}
             
             return render_template('akademi/teacher/leaves/view_balances.html',
                                  school=school,
@@ -3275,6 +3277,42 @@ def register_teacher_routes(school_bp, require_school_auth):
         finally:
             session_db.close()
     
+    @school_bp.route('/<tenant_slug>/leaves/balances/export.csv', methods=['GET'])
+    @require_school_auth
+    def export_teacher_balances_csv(tenant_slug):
+        """Download all teacher leave balances of an academic year as CSV"""
+        if current_user.role not in ['school_admin', 'portal_admin']:
+            flash('Access denied - admin only', 'error')
+            return redirect(url_for('school.dashboard', tenant_slug=tenant_slug))
+        
+        session_db = get_session()
+        try:
+            import csv
+            import io
+            from flask import make_response
+            from leave_helpers import get_current_academic_year, export_teacher_balances
+            
+            school = g.current_tenant
+            academic_year = request.args.get('year', get_current_academic_year())
+            header, rows = export_teacher_balances(session_db, school.id, academic_year)
+            
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow(header)
+            writer.writerows(rows)
+            
+            resp = make_response(output.getvalue())
+            resp.headers['Content-Type'] = 'text/csv; charset=utf-8'
+            resp.headers['Content-Disposition'] = f'attachment; filename={tenant_slug}_leave_balances_{academic_year}.csv'
+            return resp
+        
+        except Exception as e:
+            logger.error(f"Export balances error for {tenant_slug}: {e}")
+            flash('Error exporting teacher balances', 'error')
+            return redirect(url_for('school.view_teacher_balances', tenant_slug=tenant_slug))
+        finally:
+            session_db.close()
+    
     
     @school_bp.route('/<tenant_slug>/leaves/balances/initialize', methods=['POST'])
     @require_school_auth
@@ -3411,7 +3449,8 @@ def register_teacher_routes(school_bp, require_school_auth):
         """Admin view for teacher leave management - matches student leaves pattern"""
         session_db = get_session()
         try:
-            from leave_models import TeacherLeaveApplication, LeaveTypeEnum
+            from leave_models import TeacherLeaveApplication, LeaveTypeEnum, LeaveApplicationView, LEAVE_VIEW_COLUMNS
+            from leave_helpers import summarize_leave_applications
             from teacher_models import Teacher, TeacherDocument
             
             school = g.current_tenant
@@ -3422,8 +3461,8 @@ def register_teacher_routes(school_bp, require_school_auth):
             from_date_str = request.args.get('from_date')
             to_date_str = request.args.get('to_date')
             
-            # Base query
-            query = session_db.query(TeacherLeaveApplication).filter_by(tenant_id=school.id)
+            # Base query over plain column rows; the list can hold thousands of leaves
+            query = session_db.query(*LEAVE_VIEW_COLUMNS).filter(TeacherLeaveApplication.tenant_id == school.id)
             
             # Apply filters
             if status_filter:
@@ -3441,51 +3480,48 @@ def register_teacher_routes(school_bp, require_school_auth):
                 query = query.filter(TeacherLeaveApplication.end_date <= to_date)
             
             # Order by latest first
-            leaves = query.order_by(TeacherLeaveApplication.created_at.desc()).all()
+            rows = query.order_by(TeacherLeaveApplication.created_at.desc()).all()
+            
+            # Load each listed teacher and their documents once, documents newest first
+            teachers = {}
+            docs_by_teacher = {}
+            teacher_ids = {row.teacher_id for row in rows if row.teacher_id}
+            if teacher_ids:
+                teachers = {
+                    t.id: t for t in session_db.query(Teacher).filter(Teacher.id.in_(teacher_ids))
+                }
+                docs = session_db.query(TeacherDocument).filter(
+                    TeacherDocument.tenant_id == school.id,
+                    TeacherDocument.teacher_id.in_(teacher_ids)
+                ).order_by(TeacherDocument.uploaded_at.desc()).all()
+                for d in docs:
+                    docs_by_teacher.setdefault(d.teacher_id, []).append(d)
+            
+            # Slotted views: leave columns plus teacher and attachments
+            leaves = [LeaveApplicationView(row, teachers.get(row.teacher_id)) for row in rows]
             
-            # Load teachers and attachments
+            # Attachments are documents uploaded within 24 hours of applying
             for leave in leaves:
-                if leave.teacher_id:
-                    leave.teacher = session_db.query(Teacher).filter_by(id=leave.teacher_id).first()
-                else:
-                    leave.teacher = None
-                
-                # Load attachments
+                applied_at = leave.applied_date or leave.created_at
                 try:
-                    docs = session_db.query(TeacherDocument).filter_by(
-                        tenant_id=school.id,
-                        teacher_id=leave.teacher_id
-                    ).order_by(TeacherDocument.uploaded_at.desc()).all()
-                    
-                    attachments = []
-                    for d in docs:
-                        if leave.applied_date:
-                            delta = (d.uploaded_at - leave.applied_date).total_seconds()
-                            if abs(delta) <= 60*60*24:  # within 24 hours
-                                attachments.append(d)
-                        elif leave.created_at:
-                            delta = (d.uploaded_at - leave.created_at).total_seconds()
-                            if abs(delta) <= 60*60*24:
-                                attachments.append(d)
-                    leave.attachments = attachments
+                    leave.attachments = [
+                        d for d in docs_by_teacher.get(leave.teacher_id, [])
+                        if applied_at and abs((d.uploaded_at - applied_at).total_seconds()) <= 60*60*24
+                    ]
                 except Exception:
                     leave.attachments = []
             
-            # Calculate statistics
+            # Calculate statistics (one grouped query instead of four counts)
+            summary = summarize_leave_applications(session_db, school.id)
+            status_counts = {
+                status: sum(count for count, _ in by_type.values())
+                for status, by_type in summary.items()
+            }
             stats = {
-                'pending': session_db.query(TeacherLeaveApplication).filter_by(
-                    tenant_id=school.id, 
-                    status='Pending'
-                ).count(),
-                'approved': session_db.query(TeacherLeaveApplication).filter_by(
-                    tenant_id=school.id, 
-                    status='Approved'
-                ).count(),
-                'rejected': session_db.query(TeacherLeaveApplication).filter_by(
-                    tenant_id=school.id, 
-                    status='Rejected'
-                ).count(),
-                'total': session_db.query(TeacherLeaveApplication).filter_by(tenant_id=school.id).count()
+                'pending': status_counts.get('Pending', 0),
+                'approved': status_counts.get('Approved', 0),
+                'rejected': status_counts.get('Rejected', 0),
+                'total': sum(status_counts.values())
             }
             
             return render_template('akademi/teacher/teacher_leaves_list.html',
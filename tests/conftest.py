@@ -0,0 +1,89 @@
+"""
+Shared fixtures: an in-memory SQLite database with the full schema, used to
+pin the query budgets of the dashboard, finance and library helpers
+"""
+
+import os
+import sys
+from datetime import date
+
+import pytest
+from sqlalchemy import BigInteger, create_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateTable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from init_db import load_models  # noqa: E402
+
+
+@compiles(BigInteger, 'sqlite')
+def _compile_big_integer_sqlite(type_, compiler, **kw):
+    # SQLite only auto-increments INTEGER PRIMARY KEY columns
+    return 'INTEGER'
+
+
+@pytest.fixture
+def engine():
+    """Fresh in-memory database with every model table created"""
+    Base = load_models()
+    engine = create_engine(
+        'sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool
+    )
+    # Tables only: index names are unique per table on MySQL but per database
+    # on SQLite, and query counts do not depend on indexes
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            conn.execute(CreateTable(table))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def school(session):
+    """One tenant with a session, a class, a student and a teacher"""
+    from models import Tenant, AcademicSession, Class, Student, GenderEnum
+    from teacher_models import Teacher, GenderEnum as TeacherGenderEnum
+
+    tenant = Tenant(name='Test School', slug='test-school')
+    session.add(tenant)
+    session.flush()
+
+    academic_session = AcademicSession(
+        tenant_id=tenant.id, session_name='2026-27',
+        start_date=date(2026, 4, 1), end_date=date(2027, 3, 31)
+    )
+    school_class = Class(tenant_id=tenant.id, class_name='5', section='A')
+    session.add_all([academic_session, school_class])
+    session.flush()
+
+    student = Student(
+        tenant_id=tenant.id, admission_number='ADM001',
+        first_name='Asha', last_name='Rao', full_name='Asha Rao',
+        date_of_birth=date(2015, 6, 1), gender=GenderEnum.FEMALE, father_name='Ravi Rao',
+        guardian_phone='9000000001', class_id=school_class.id, session_id=academic_session.id
+    )
+    teacher = Teacher(
+        tenant_id=tenant.id, employee_id='EMP001', first_name='Meena', last_name='Iyer',
+        gender=TeacherGenderEnum.FEMALE, date_of_birth=date(1990, 1, 1), email='meena@example.com',
+        phone_primary='9000000002', joining_date=date(2020, 6, 1)
+    )
+    session.add_all([student, teacher])
+    session.commit()
+
+    return {
+        'tenant': tenant,
+        'academic_session': academic_session,
+        'class': school_class,
+        'student': student,
+        'teacher': teacher,
+    }
@@ -0,0 +1,116 @@
+"""
+Query budgets of the library helpers, matching their @query_budget(n)
+declarations; each helper runs against a cold identity map
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+import library_helpers as lib
+from library_models import LibraryBook
+from query_profiling import count_queries
+
+
+@pytest.fixture
+def library(session, school):
+    """Three catalogued books and one overdue issue of the first to the school's student"""
+    tenant_id = school['tenant'].id
+    student_id = school['student'].id
+    lib.invalidate_library_settings(tenant_id)
+
+    lib.bulk_add_books(session, tenant_id, [
+        dict(accession_number=f'ACC{i}', title=f'Book {i}', author='Author', total_copies=2)
+        for i in range(3)
+    ])
+    book_ids = session.scalars(select(LibraryBook.id).order_by(LibraryBook.id)).all()
+
+    issue = lib.issue_book(session, student_id, book_ids[0], tenant_id,
+                           custom_due_date=date.today() - timedelta(days=2))
+    issue_id = issue.id
+
+    # Counted calls start from an empty identity map and a cold settings cache
+    session.expunge_all()
+    lib.invalidate_library_settings(tenant_id)
+    yield {'tenant_id': tenant_id, 'student_id': student_id, 'book_ids': book_ids, 'issue_id': issue_id}
+    lib.invalidate_library_settings(tenant_id)
+
+
+def test_bulk_add_books_budget(engine, session, library):
+    books = [
+        dict(accession_number='ACC0', title='Duplicate', author='Author'),
+        dict(accession_number='NEW1', title='New 1', author='Author', total_copies=1),
+        dict(accession_number='NEW2', title='New 2', author='Author', total_copies=1),
+    ]
+    with count_queries(engine) as counter:
+        result = lib.bulk_add_books(session, library['tenant_id'], books)
+
+    # One accession-number lookup and one multi-row INSERT per batch
+    assert counter.count == 2
+    assert result['success'] == 2
+    assert result['failed'] == 1
+
+
+def test_can_issue_book_budget(engine, session, library):
+    with count_queries(engine) as counter:
+        can_issue, reason, _ = lib.can_issue_book(
+            session, library['student_id'], library['book_ids'][1], library['tenant_id']
+        )
+
+    assert counter.count <= 3
+    assert can_issue, reason
+
+
+def test_get_book_details_budget(engine, session, library):
+    with count_queries(engine) as counter:
+        details = lib.get_book_details(session, library['book_ids'][0], library['tenant_id'])
+        student_names = [issue.student.full_name for issue in details['issues']]
+
+    assert counter.count <= 4
+    assert student_names == ['Asha Rao']
+    assert details['stats'] == {'total_issues': 1, 'active_issues': 1, 'overdue_issues': 1}
+
+
+def test_get_available_books_budget(engine, session, library):
+    with count_queries(engine) as counter:
+        books = lib.get_available_books(session, library['tenant_id'])
+
+    assert counter.count <= 1
+    assert len(books) == 3
+
+
+def test_get_issued_books_budget(engine, session, library):
+    with count_queries(engine) as counter:
+        issues = lib.get_issued_books(session, library['tenant_id'])
+        titles = [(issue.book.title, issue.student.full_name) for issue in issues]
+
+    assert counter.count <= 3
+    assert titles == [('Book 0', 'Asha Rao')]
+
+
+def test_get_overdue_books_budget(engine, session, library):
+    with count_queries(engine) as counter:
+        issues = lib.get_overdue_books(session, library['tenant_id'])
+        titles = [(issue.book.title, issue.student.full_name) for issue in issues]
+
+    assert counter.count <= 3
+    assert titles == [('Book 0', 'Asha Rao')]
+
+
+def test_get_student_issue_history_budget(engine, session, library):
+    with count_queries(engine) as counter:
+        issues = lib.get_student_issue_history(session, library['student_id'], library['tenant_id'])
+
+    assert counter.count <= 1
+    assert [issue.id for issue in issues] == [library['issue_id']]
+
+
+def test_get_library_statistics_budget(engine, session, library):
+    with count_queries(engine) as counter:
+        stats = lib.get_library_statistics(session, library['tenant_id'])
+
+    assert counter.count <= 2
+    assert stats['total_books'] == 6
+    assert stats['issued_books'] == 1
+    assert stats['overdue_books'] == 1
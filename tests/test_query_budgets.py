@@ -0,0 +1,162 @@
+"""
+Query budgets of the dashboard and finance helpers; a failure here means a
+helper started issuing extra round-trips (usually an N+1 or a split query)
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from query_profiling import count_queries
+
+
+@pytest.fixture
+def fees(session, school):
+    """Two students' fees in the school's class, one overdue and part paid"""
+    from models import Student, GenderEnum, StudentAttendance, StudentAttendanceStatusEnum
+    from teacher_models import TeacherAttendance, AttendanceStatusEnum as TeacherAttendanceStatusEnum
+    from fee_models import (
+        FeeStructure, StudentFee, FeeReceipt, FeeStatusEnum, PaymentModeEnum, PaymentStatusEnum
+    )
+
+    tenant_id = school['tenant'].id
+    session_id = school['academic_session'].id
+    today = date.today()
+    second_student = Student(
+        tenant_id=tenant_id, admission_number='ADM002',
+        first_name='Kiran', last_name='Das', full_name='Kiran Das',
+        date_of_birth=date(2015, 2, 1), gender=GenderEnum.MALE, father_name='Mohan Das',
+        guardian_phone='9000000003', class_id=school['class'].id,
+        session_id=session_id
+    )
+    structure = FeeStructure(
+        tenant_id=tenant_id, session_id=session_id,
+        class_id=school['class'].id, structure_name='Tuition', valid_from=date(2026, 4, 1)
+    )
+    session.add_all([second_student, structure])
+    session.flush()
+
+    student_fees = [
+        StudentFee(
+            tenant_id=tenant_id, student_id=student.id,
+            session_id=session_id, fee_structure_id=structure.id,
+            total_amount=Decimal('1000.00'), paid_amount=paid, status=status,
+            due_date=today - timedelta(days=10)
+        )
+        for student, paid, status in (
+            (school['student'], Decimal('400.00'), FeeStatusEnum.OVERDUE),
+            (second_student, Decimal('0.00'), FeeStatusEnum.PENDING),
+        )
+    ]
+    session.add_all(student_fees)
+    session.flush()
+
+    session.add_all([
+        FeeReceipt(
+            tenant_id=tenant_id, student_id=school['student'].id,
+            student_fee_id=student_fees[0].id, receipt_number='RCP001',
+            amount_paid=Decimal('400.00'), payment_mode=PaymentModeEnum.CASH,
+            status=PaymentStatusEnum.VERIFIED, payment_date=today
+        ),
+        StudentAttendance(
+            tenant_id=tenant_id, student_id=school['student'].id, class_id=school['class'].id,
+            attendance_date=today, status=StudentAttendanceStatusEnum.PRESENT
+        ),
+        StudentAttendance(
+            tenant_id=tenant_id, student_id=second_student.id, class_id=school['class'].id,
+            attendance_date=today, status=StudentAttendanceStatusEnum.ABSENT
+        ),
+        TeacherAttendance(
+            tenant_id=tenant_id, teacher_id=school['teacher'].id,
+            attendance_date=today, status=TeacherAttendanceStatusEnum.PRESENT
+        ),
+    ])
+    session.commit()
+    return student_fees
+
+
+@pytest.fixture
+def ids(school, fees):
+    """Tenant and session ids, loaded before counting (commit expires the objects)"""
+    return school['tenant'].id, school['academic_session'].id
+
+
+def test_dashboard_counts_budget(engine, session, ids):
+    from home_routes import _dashboard_counts
+
+    tenant_id, session_id = ids
+    with count_queries(engine) as counter:
+        counts = _dashboard_counts(session, tenant_id, date.today())
+
+    assert counter.count == 1
+    assert counts['total_students'] == 2
+    assert counts['total_teachers'] == 1
+    assert counts['this_week_revenue'] == Decimal('400.00')
+
+
+def test_today_attendance_budget(engine, session, ids):
+    from home_routes import _today_attendance
+
+    tenant_id, session_id = ids
+    with count_queries(engine) as counter:
+        attendance = _today_attendance(session, tenant_id, date.today())
+
+    assert counter.count == 1
+    assert attendance['student_attendance']['present'] == 1
+    assert attendance['student_attendance']['absent'] == 1
+    assert attendance['student_attendance']['percentage'] == 50
+    assert attendance['teacher_attendance']['total'] == 1
+
+
+def test_fee_collection_summary_budget(engine, session, ids):
+    from fee_helpers import get_fee_collection_summary
+
+    today = date.today()
+    tenant_id, session_id = ids
+    with count_queries(engine) as counter:
+        summary = get_fee_collection_summary(
+            session, tenant_id, today - timedelta(days=30), today,
+            session_id=session_id
+        )
+
+    assert counter.count == 1
+    assert summary['total_receipts'] == 1
+    assert summary['cash_collected'] == 400.0
+
+
+def test_outstanding_fees_summary_budget(engine, session, ids):
+    from fee_helpers import get_outstanding_fees_summary
+
+    tenant_id, session_id = ids
+    with count_queries(engine) as counter:
+        summary = get_outstanding_fees_summary(session, tenant_id, session_id)
+
+    assert counter.count == 2
+    assert summary['total_students'] == 2
+    assert summary['outstanding'] == 1600.0
+    assert summary['overdue_count'] == 1
+
+
+def test_class_wise_collection_budget(engine, session, ids):
+    from fee_helpers import get_class_wise_collection
+
+    tenant_id, session_id = ids
+    with count_queries(engine) as counter:
+        classes = get_class_wise_collection(session, tenant_id, session_id)
+
+    assert counter.count == 1
+    assert len(classes) == 1
+    assert classes[0]['total_students'] == 2
+    assert classes[0]['overdue_count'] == 1
+
+
+def test_defaulter_list_budget(engine, session, ids):
+    from fee_helpers import get_defaulter_list
+
+    tenant_id, session_id = ids
+    with count_queries(engine) as counter:
+        defaulters = get_defaulter_list(session, tenant_id, session_id)
+
+    assert counter.count == 1
+    assert {row['admission_number'] for row in defaulters} == {'ADM001', 'ADM002'}